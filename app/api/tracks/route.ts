@@ -3,10 +3,15 @@ import fs from 'fs';
 import path from 'path';
 
 const TRACKS_DIR = path.join(process.cwd(), 'public', 'tracks');
-const IGNORED_FOLDERS = ['backups', 'node_modules', '.git', '_backup_original'];
+// Índice generado en el build por tracks_index.py (mismo formato que esta respuesta)
+const TRACKS_INDEX = path.join(TRACKS_DIR, 'tracks.json');
+const IGNORED_FOLDERS = ['backups', 'node_modules', '.git', '_backup_original', '_renditions', '_clips', '_atlas', '_pack', '_immutable'];
 
 const AUDIO_EXTENSIONS = ['.mp3', '.wav', '.ogg', '.m4a', '.aac'];
-const IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg'];
+const IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg', '.avif'];
+// Formatos alternativos que genera el optimizador junto a la imagen principal
+// (foto.webp + foto.webp.avif, o foto.avif en versiones anteriores)
+const ALTERNATE_EXTENSIONS = ['.avif'];
 const GUION_EXTENSIONS = ['.js'];
 
 function isFileType(filePath: string, extensions: string[]): boolean {
@@ -14,13 +19,35 @@ function isFileType(filePath: string, extensions: string[]): boolean {
   return extensions.includes(ext);
 }
 
+function stripExtension(filePath: string): string {
+  return filePath.slice(0, filePath.length - path.extname(filePath).length);
+}
+
+let tracksIndexCache: {mtimeMs: number, data: any} | null = null;
+
+// Devuelve el índice precalculado (releído solo si cambia su mtime) o null si no existe
+function readTracksIndex(): any {
+  try {
+    const { mtimeMs } = fs.statSync(TRACKS_INDEX);
+    if (!tracksIndexCache || tracksIndexCache.mtimeMs !== mtimeMs) {
+      tracksIndexCache = { mtimeMs, data: JSON.parse(fs.readFileSync(TRACKS_INDEX, 'utf-8')) };
+    }
+    return tracksIndexCache.data;
+  } catch {
+    return null;
+  }
+}
+
 function getAllFiles(dirPath: string, basePath: string = '', arrayOfFiles: Array<{path: string, fullPath: string, name: string}> = []): Array<{path: string, fullPath: string, name: string}> {
   const files = fs.readdirSync(dirPath);
 
   files.forEach((file) => {
     const filePath = path.join(dirPath, file);
     if (fs.statSync(filePath).isDirectory()) {
-      arrayOfFiles = getAllFiles(filePath, basePath, arrayOfFiles);
+      // Backups y variantes generadas por el optimizador no son imágenes del track
+      if (!IGNORED_FOLDERS.includes(file)) {
+        arrayOfFiles = getAllFiles(filePath, basePath, arrayOfFiles);
+      }
     } else {
       arrayOfFiles.push({
         path: path.join(basePath, file).replace(/\\/g, '/'),
@@ -35,6 +62,12 @@ function getAllFiles(dirPath: string, basePath: string = '', arrayOfFiles: Array
 
 export async function GET() {
   try {
+    const tracksIndex = readTracksIndex();
+    if (tracksIndex) {
+      return NextResponse.json(tracksIndex);
+    }
+
+    // Sin índice (p. ej. en desarrollo sin haber pasado el optimizador): recorrer public/tracks
     if (!fs.existsSync(TRACKS_DIR)) {
       return NextResponse.json({ error: 'Tracks directory not found' }, { status: 404 });
     }
@@ -98,7 +131,19 @@ export async function GET() {
           filesToProcess = getAllFiles(folderPath, `${trackName}/${subfolder}`);
         }
 
+        // Un .avif solo es una imagen más si no hay otra versión del mismo archivo
+        const primaryImages = new Set<string>();
+        filesToProcess
+          .filter(file => isFileType(file.fullPath, IMAGE_EXTENSIONS) && !isFileType(file.fullPath, ALTERNATE_EXTENSIONS))
+          .forEach(file => {
+            primaryImages.add(file.path);
+            primaryImages.add(stripExtension(file.path));
+          });
+
         filesToProcess.forEach(file => {
+          if (isFileType(file.fullPath, ALTERNATE_EXTENSIONS) && primaryImages.has(stripExtension(file.path))) {
+            return;
+          }
           const relativePath = file.path;
           // Codificar cada segmento de la ruta para URLs (espacios, paréntesis, etc.)
           const urlSegments = relativePath.split('/').map(segment => encodeURIComponent(segment));
@@ -0,0 +1,141 @@
+"""
+Manifest de salidas por asset (public/tracks/assets.json)
+Para cada archivo de tracks guarda lo que ha generado el optimizador
+(variantes de la escalera, etc.), de modo que el front-end pueda elegir
+sin decodificar nada. Las entradas de archivos que ya no existen se eliminan
+junto con lo que el optimizador generó para ellos (AVIF, variantes, clips), y
+las salidas que una entrada deja de usar se borran en cuanto ninguna otra
+las usa.
+"""
+
+import os
+from collections import Counter
+from pathlib import Path
+from urllib.parse import quote
+
+from json_store import load_versioned, save_versioned
+
+ASSET_MANIFEST_NAME = "assets.json"
+ASSET_MANIFEST_VERSION = 1
+TRACKS_URL_PREFIX = "/tracks"
+GENERATED_SECTIONS = ('formats', 'renditions', 'clip')  # Secciones con archivos propios del asset
+
+
+def asset_url(rel):
+    """URL pública de una ruta relativa a public/tracks, codificando cada segmento
+    igual que encodeURIComponent en app/api/tracks/route.ts"""
+    return TRACKS_URL_PREFIX + '/' + '/'.join(quote(segment, safe="-_.!~*'()") for segment in rel.split('/'))
+
+
+def output_rels(value):
+    """Rutas relativas de las salidas ({'path', 'url', ...}) que hay dentro de una sección
+
+    No incluye los nombres con huella ('immutable'): los mantiene fingerprints.py.
+    """
+    if isinstance(value, dict):
+        if 'path' in value and 'url' in value:
+            yield value['path']
+        for key, item in value.items():
+            if key != 'immutable':
+                yield from output_rels(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from output_rels(item)
+
+
+class AssetManifest:
+    """{ruta relativa del asset: {sección: datos}} guardado en <tracks_dir>/assets.json"""
+
+    def __init__(self, tracks_dir):
+        self.tracks_dir = Path(tracks_dir)
+        self.path = self.tracks_dir / ASSET_MANIFEST_NAME
+        self.assets = {}
+        self.references = Counter()  # Entradas que usan cada salida de GENERATED_SECTIONS
+        self.dirty = False
+
+    @classmethod
+    def load(cls, tracks_dir):
+        manifest = cls(tracks_dir)
+        manifest.assets = load_versioned(manifest.path, ASSET_MANIFEST_VERSION).get('assets', {})
+        for entry in manifest.assets.values():
+            for section in GENERATED_SECTIONS:
+                manifest.references.update(set(output_rels(entry.get(section))))
+        return manifest
+
+    def save(self):
+        if self.dirty:
+            save_versioned(self.path, ASSET_MANIFEST_VERSION, {'assets': self.assets})
+            self.dirty = False
+
+    def rel_path(self, path):
+        """Ruta relativa a tracks_dir con '/'"""
+        return Path(os.path.relpath(path, self.tracks_dir)).as_posix()
+
+    def get(self, rel, section, default=None):
+        return self.assets.get(rel, {}).get(section, default)
+
+    def set(self, rel, section, value):
+        """Guarda (o borra, si value está vacío) una sección de un asset
+
+        En GENERATED_SECTIONS, las salidas del valor anterior que ya no usa
+        nadie se borran del disco (p. ej. las variantes .jpeg de una imagen
+        convertida a WebP).
+        """
+        entry = self.assets.get(rel, {})
+        old = entry.get(section)
+        if value:
+            if old == value:
+                return
+            entry[section] = value
+            self.assets[rel] = entry
+        else:
+            if section not in entry:
+                return
+            del entry[section]
+            if not entry:
+                del self.assets[rel]
+        self.dirty = True
+        if section in GENERATED_SECTIONS:
+            self.references.update(set(output_rels(value)))
+            self.release(old, rel)
+
+    def release(self, value, owner=None):
+        """Deja de contar las salidas de una sección y borra las que ya no usa nadie
+
+        Nunca se borra el propio asset (owner, que 'formats' también lista) ni
+        otro archivo con entrada propia. Devuelve el número de archivos borrados.
+        """
+        removed = 0
+        for output_rel in set(output_rels(value)):
+            self.references[output_rel] -= 1
+            if self.references[output_rel] > 0:
+                continue
+            del self.references[output_rel]
+            path = self.tracks_dir / output_rel
+            if output_rel != owner and output_rel not in self.assets and path.is_file():
+                path.unlink()
+                removed += 1
+        return removed
+
+    def move(self, old_rel, new_rel):
+        """Traslada las entradas de un asset renombrado"""
+        if old_rel in self.assets:
+            self.assets[new_rel] = self.assets.pop(old_rel)
+            self.dirty = True
+
+    def prune(self, existing_rels):
+        """Elimina las entradas de archivos que ya no están en el árbol
+
+        También se borran sus salidas de GENERATED_SECTIONS (el .avif junto al
+        archivo, las variantes de _renditions/, los clips de _clips/), que si
+        no quedarían huérfanas; un .avif sin su original se listaría como una
+        imagen más. Devuelve el número de archivos borrados.
+        """
+        existing_rels = set(existing_rels)
+        removed = 0
+        for rel in [rel for rel in self.assets if rel not in existing_rels]:
+            entry = self.assets.pop(rel)
+            self.dirty = True
+            for section in GENERATED_SECTIONS:
+                removed += self.release(entry.get(section))
+        return removed
@@ -0,0 +1,151 @@
+"""
+Atlas (sprites) de las imágenes pequeñas de cada carpeta
+Las imágenes estáticas de una carpeta que ocupan poco (ATLAS_MAX_ITEM_BYTES)
+se empaquetan en una o pocas hojas WebP de como mucho ATLAS_MAX_SIDE px de
+lado, en <carpeta>/_atlas/. Así el móvil descarga un segmento entero en un
+par de peticiones en vez de en decenas.
+- Empaquetado por estanterías: de más alta a más baja, se llenan filas de
+  izquierda a derecha y se abre otra fila (u otra hoja) cuando no cabe
+- El nombre de cada hoja lleva la firma de sus imágenes (ruta, tamaño y
+  mtime) y de los ajustes: si nada cambia no se vuelve a generar, y las
+  hojas que ya no se usan se borran
+- Las imágenes ya vienen comprimidas con pérdida, así que la hoja se
+  codifica con la mayor calidad registrada en assets.json para sus imágenes
+  (la que eligió --target-ssim, o QUALITY) y no con una fija. Si aun así las
+  hojas de una carpeta ocupan más que sus imágenes por separado, se borran y
+  la carpeta se queda sin atlas (un archivo <firma>.skip vacío lo recuerda)
+- Cada imagen del atlas guarda en assets.json su hoja y su rectángulo
+"""
+
+import hashlib
+import math
+
+from PIL import Image
+
+from media_probe import probe_image
+from media_walker import prune_generated
+from optimize_images import QUALITY
+
+ATLAS_DIR = "_atlas"
+ATLAS_MAX_ITEM_BYTES = 64 * 1024  # Solo se empaquetan las imágenes que ocupan menos que esto
+ATLAS_MAX_SIDE = 2048  # Lado máximo de cada hoja (textura segura en móviles)
+ATLAS_PADDING = 2  # Separación entre imágenes para que el filtrado no mezcle vecinas
+ATLAS_MIN_ITEMS = 4  # Con menos imágenes no compensa
+ATLAS_QUALITY = QUALITY  # Para las imágenes sin calidad registrada (PNG, o anteriores a registrarla)
+ATLAS_FORMAT = 'WEBP'
+ATLAS_SKIPPED_SUFFIX = ".skip"  # Marca de una carpeta cuyas hojas ocupaban más que sus imágenes
+
+
+def eligible_images(files):
+    """{carpeta: [(MediaFile, (ancho, alto))]} de imágenes estáticas pequeñas, por carpeta"""
+    groups = {}
+    for item in files:
+        if item.kind != 'image' or item.size > ATLAS_MAX_ITEM_BYTES:
+            continue
+        info = probe_image(item.path)
+        if info is None or info['animated'] or max(info['width'], info['height']) > ATLAS_MAX_SIDE:
+            continue
+        groups.setdefault(item.path.parent, []).append((item, (info['width'], info['height'])))
+    return {folder: items for folder, items in groups.items() if len(items) >= ATLAS_MIN_ITEMS}
+
+
+def pack_shelves(sizes, max_side=ATLAS_MAX_SIDE, padding=ATLAS_PADDING):
+    """Coloca rectángulos (ancho, alto) en hojas por estanterías
+
+    Devuelve ([(hoja, x, y)] en el orden de sizes, [(ancho, alto)] de cada hoja).
+    El ancho de la hoja se elige para que salga aproximadamente cuadrada.
+    """
+    area = sum((w + padding) * (h + padding) for w, h in sizes)
+    width = min(max_side, max(max(w for w, _ in sizes), math.ceil(math.sqrt(area))))
+    placements = [None] * len(sizes)
+    sheets = []
+    sheet = x = y = shelf = used = 0
+    for index in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0])):
+        w, h = sizes[index]
+        if x and x + w > width:  # Nueva estantería
+            x, y, shelf = 0, y + shelf + padding, 0
+        if y and y + h > max_side:  # Nueva hoja
+            sheets.append((used, y - padding))
+            sheet, x, y, shelf, used = sheet + 1, 0, 0, 0, 0
+        placements[index] = (sheet, x, y)
+        x += w + padding
+        shelf = max(shelf, h)
+        used = max(used, x - padding)
+    sheets.append((used, y + shelf))
+    return placements, sheets
+
+
+def sheet_quality(items, quality_of=None):
+    """Calidad de las hojas: la mayor de las registradas para sus imágenes (ATLAS_QUALITY si falta alguna)"""
+    return max((quality_of and quality_of(item.rel)) or ATLAS_QUALITY for item, _ in items)
+
+
+def signature(items, quality=ATLAS_QUALITY):
+    """Firma de un conjunto de imágenes y de los ajustes del atlas"""
+    digest = hashlib.sha256(repr((ATLAS_MAX_SIDE, ATLAS_PADDING, quality, ATLAS_FORMAT)).encode())
+    for item, _ in items:
+        digest.update(f"{item.rel}\0{item.size}\0{item.mtime_ns}\n".encode())
+    return digest.hexdigest()[:12]
+
+
+def render_sheet(path, size, members, quality=ATLAS_QUALITY):
+    """Pega las imágenes [(ruta, x, y)] en una hoja y la guarda"""
+    sheet = Image.new('RGBA', size)
+    has_alpha = False
+    for source, x, y in members:
+        with Image.open(source) as img:
+            has_alpha = has_alpha or img.has_transparency_data
+            sheet.paste(img.convert('RGBA'), (x, y))
+    if not has_alpha:
+        sheet = sheet.convert('RGB')
+    path.parent.mkdir(exist_ok=True)
+    sheet.save(path, ATLAS_FORMAT, quality=quality)
+
+
+def build_atlases(files, tracks_dir, quality_of=None):
+    """Genera las hojas que falten y borra las que sobran (files: recorrido, TrackFiles)
+
+    quality_of(ruta relativa) devuelve la calidad con la que se codificó la
+    imagen (assets.json), o None.
+    Devuelve ({ruta relativa de la imagen: {'sheet': ruta de la hoja, 'x', 'y',
+    'width', 'height'}}, hojas generadas, hojas reutilizadas, carpetas sin
+    atlas porque sus hojas ocupaban más que sus imágenes).
+    """
+    entries = {}
+    keep = set()
+    generated = reused = larger = 0
+    for folder, items in sorted(eligible_images(files).items()):
+        quality = sheet_quality(items, quality_of)
+        name = signature(items, quality)
+        skipped_marker = folder / ATLAS_DIR / f"{name}{ATLAS_SKIPPED_SUFFIX}"
+        if skipped_marker.exists():
+            keep.add(skipped_marker)
+            larger += 1
+            continue
+        placements, sheet_sizes = pack_shelves([size for _, size in items])
+        sheet_paths = [folder / ATLAS_DIR / f"{name}-{index}.{ATLAS_FORMAT.lower()}"
+                       for index in range(len(sheet_sizes))]
+        folder_generated = folder_reused = 0
+        for index, (sheet_path, sheet_size) in enumerate(zip(sheet_paths, sheet_sizes)):
+            if sheet_path.exists():
+                folder_reused += 1
+                continue
+            render_sheet(sheet_path, sheet_size,
+                         [(item.path, x, y) for (item, _), (sheet, x, y) in zip(items, placements) if sheet == index],
+                         quality)
+            folder_generated += 1
+        if sum(path.stat().st_size for path in sheet_paths) > sum(item.size for item, _ in items):
+            for sheet_path in sheet_paths:
+                sheet_path.unlink()
+            skipped_marker.touch()
+            keep.add(skipped_marker)
+            larger += 1
+            continue
+        keep.update(sheet_paths)
+        generated += folder_generated
+        reused += folder_reused
+        for (item, (width, height)), (sheet, x, y) in zip(items, placements):
+            entries[item.rel] = {'sheet': sheet_paths[sheet], 'x': x, 'y': y, 'width': width, 'height': height}
+
+    prune_generated(files, ATLAS_DIR, keep)
+    return entries, generated, reused, larger
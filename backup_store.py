@@ -0,0 +1,174 @@
+"""
+Almacén de originales direccionado por contenido (fuera de public/)
+Cada original se guarda una sola vez, comprimido, con su SHA-256 como nombre:
+
+  .backup_store/objects/ab/abcdef....zst   (zstd si está instalado 'zstandard',
+                                            .zz con zlib si no, .raw si no comprime)
+  .backup_store/index.json                 {ruta del asset: hash, nombre y tamaño del original}
+
+Archivos idénticos en distintas carpetas (p. ej. 1.webp y '1 copy.webp')
+comparten el mismo objeto. Las claves del índice son rutas relativas a la
+carpeta que contiene .backup_store, como en la caché incremental.
+Los objetos se escriben desde los procesos del pool (de forma atómica: el
+nombre depende solo del contenido); el índice solo desde el proceso principal.
+"""
+
+import hashlib
+import os
+import shutil
+import zlib
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from json_store import load_versioned, save_versioned
+
+BACKUP_STORE_DIR = Path(".backup_store")
+BACKUP_INDEX_VERSION = 1
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+LEGACY_BACKUP_DIR = "_backup_original"  # Carpetas de backup antiguas dentro de public/tracks
+CODEC_SUFFIXES = {'zstd': '.zst', 'zlib': '.zz', 'raw': '.raw'}
+
+
+def compress(data):
+    """(codec, datos comprimidos); 'raw' si comprimir no reduce (JPEG, WebP, MP4...)"""
+    if zstandard is not None:
+        codec, packed = 'zstd', zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    else:
+        codec, packed = 'zlib', zlib.compress(data, ZLIB_LEVEL)
+    if len(packed) >= len(data):
+        return 'raw', data
+    return codec, packed
+
+
+def decompress(codec, packed):
+    if codec == 'raw':
+        return packed
+    if codec == 'zlib':
+        return zlib.decompress(packed)
+    if zstandard is None:
+        raise RuntimeError("Este original está comprimido con zstd: instala 'zstandard' para leerlo")
+    return zstandard.ZstdDecompressor().decompress(packed)
+
+
+def object_path(root, content_hash, codec):
+    return Path(root) / 'objects' / content_hash[:2] / (content_hash + CODEC_SUFFIXES[codec])
+
+
+def find_object(root, content_hash):
+    """(codec, ruta) del objeto guardado, o (None, None) si no existe"""
+    for codec in CODEC_SUFFIXES:
+        path = object_path(root, content_hash, codec)
+        if path.exists():
+            return codec, path
+    return None, None
+
+
+def store_blob(root, data):
+    """Guarda data en el almacén (si no estaba ya) y devuelve {'hash', 'size', 'stored'}
+
+    'stored' es False si el contenido ya existía (deduplicado).
+    """
+    content_hash = hashlib.sha256(data).hexdigest()
+    codec, _ = find_object(root, content_hash)
+    if codec is not None:
+        return {'hash': content_hash, 'size': len(data), 'stored': False}
+    codec, packed = compress(data)
+    path = object_path(root, content_hash, codec)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(packed)
+    os.replace(tmp_path, path)
+    return {'hash': content_hash, 'size': len(data), 'stored': True}
+
+
+def read_blob(root, content_hash):
+    """Bytes de un objeto del almacén (también desde los procesos del pool)"""
+    codec, path = find_object(root, content_hash)
+    if codec is None:
+        raise FileNotFoundError(f"Falta el objeto {content_hash} del almacén de originales")
+    return decompress(codec, path.read_bytes())
+
+
+class BackupStore:
+    """Índice persistente {ruta relativa del asset: original} sobre los objetos del almacén"""
+
+    def __init__(self, root=BACKUP_STORE_DIR):
+        self.root = Path(root)
+        self.index_path = self.root / 'index.json'
+        self.base = self.root.resolve().parent
+        self.entries = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, root=BACKUP_STORE_DIR):
+        store = cls(root)
+        store.entries = load_versioned(store.index_path, BACKUP_INDEX_VERSION).get('entries', {})
+        return store
+
+    def save(self):
+        if self.dirty:
+            save_versioned(self.index_path, BACKUP_INDEX_VERSION, {'entries': self.entries})
+            self.dirty = False
+
+    def key_for(self, path):
+        return Path(os.path.relpath(Path(path).resolve(), self.base)).as_posix()
+
+    def has(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def record(self, key, name, blob, replace=False):
+        """Asocia un asset a su original
+
+        Sin replace nunca sustituye uno ya guardado (el primero es el
+        prístino); replace es para cuando el asset se ha cambiado a mano.
+        """
+        if key in self.entries and not replace:
+            return
+        self.entries[key] = {'hash': blob['hash'], 'name': name, 'size': blob['size']}
+        self.dirty = True
+
+    def move(self, old_key, new_key):
+        """El asset cambió de nombre (p. ej. normalizado a .webp): su original le sigue"""
+        if old_key in self.entries and new_key not in self.entries:
+            self.entries[new_key] = self.entries.pop(old_key)
+            self.dirty = True
+
+    def read(self, key):
+        """Bytes del original de un asset"""
+        return read_blob(self.root, self.entries[key]['hash'])
+
+    def stats(self):
+        """(originales indexados, objetos únicos, bytes guardados en disco)"""
+        objects = list((self.root / 'objects').glob('*/*'))
+        return len(self.entries), len(objects), sum(path.stat().st_size for path in objects)
+
+    def import_legacy(self, legacy_dirs):
+        """Mueve al almacén las carpetas _backup_original dadas
+
+        Son las que encontró el recorrido de los tracks
+        (files.skipped_dirs[LEGACY_BACKUP_DIR]), así que una vez migradas no
+        cuesta nada. Cada archivo pasa a ser el original de <carpeta>/<nombre>
+        (si ese asset no tenía ya uno) y la carpeta se borra una vez guardado
+        el índice. Devuelve el número de archivos importados.
+        """
+        legacy_dirs = sorted(legacy_dirs)
+        imported = 0
+        for legacy_dir in legacy_dirs:
+            for path in sorted(p for p in legacy_dir.iterdir() if p.is_file()):
+                blob = store_blob(self.root, path.read_bytes())
+                self.record(self.key_for(legacy_dir.parent / path.name), path.name, blob)
+                imported += 1
+        if legacy_dirs:
+            self.dirty = True
+            self.save()
+            for legacy_dir in legacy_dirs:
+                shutil.rmtree(legacy_dir)
+        return imported
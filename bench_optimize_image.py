@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark del camino rápido de JPEG en optimize_image
+Compara la decodificación completa + LANCZOS con la decodificación reducida
+(draft) + reduce entero + LANCZOS: tiempo por megapíxel, aceleración y SSIM
+de cada salida frente a la referencia (decodificación completa + LANCZOS, sin
+comprimir). Termina con error si el camino rápido pierde más de
+FAST_PATH_MAX_SSIM_LOSS de SSIM respecto al camino completo.
+
+Uso:
+  python bench_optimize_image.py                 # JPEGs sintéticos de 12 y 24 MP
+  python bench_optimize_image.py foto1.jpg ...   # JPEGs propios
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageFilter
+
+from image_metrics import ssim
+from optimize_images import FAST_PATH_MAX_SSIM_LOSS, MAX_HEIGHT, QUALITY, optimize_image
+
+SYNTHETIC_SIZES = [(4000, 3000), (6000, 4000)]
+REPEATS = 3
+
+
+def make_synthetic_jpeg(path, size):
+    """JPEG de prueba con detalle fino y bordes (fractal + ruido), parecido a una foto de cámara"""
+    width, height = size
+    base = Image.effect_mandelbrot((width // 4, height // 4), (-2.2, -1.2, 1.0, 1.2), 200)
+    base = base.resize(size, Image.Resampling.BICUBIC)
+    noise = Image.effect_noise(size, 40).filter(ImageFilter.GaussianBlur(1))
+    img = Image.merge('RGB', (base, Image.blend(base, noise, 0.5), noise))
+    img.save(path, 'JPEG', quality=95)
+
+
+def time_optimize(src, dst, fast_jpeg):
+    """Mejor tiempo de REPEATS ejecuciones de optimize_image"""
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = optimize_image(src, dst, MAX_HEIGHT, QUALITY, fast_jpeg=fast_jpeg)
+        elapsed = time.perf_counter() - start
+        if not result['success']:
+            raise RuntimeError(result['error'])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        sources = [Path(p) for p in sys.argv[1:]]
+        if not sources:
+            for width, height in SYNTHETIC_SIZES:
+                path = tmp / f"synthetic_{width}x{height}.jpg"
+                make_synthetic_jpeg(path, (width, height))
+                sources.append(path)
+
+        print(f"{'Archivo':<28} {'MP':>6} {'completo ms/MP':>15} {'rápido ms/MP':>13} {'x':>5} "
+              f"{'SSIM completo':>14} {'SSIM rápido':>12}")
+        print("-" * 98)
+        worst_loss = 0.0
+        for src in sources:
+            with Image.open(src) as img:
+                megapixels = img.width * img.height / 1e6
+                if img.height <= MAX_HEIGHT:
+                    print(f"{src.name[:28]:<28} no supera {MAX_HEIGHT}px de alto, se omite")
+                    continue
+                new_size = (int((img.width / img.height) * MAX_HEIGHT), MAX_HEIGHT)
+                reference = img.resize(new_size, Image.Resampling.LANCZOS)
+
+            full_out = tmp / 'full.jpg'
+            fast_out = tmp / 'fast.jpg'
+            full_time = time_optimize(src, full_out, fast_jpeg=False)
+            fast_time = time_optimize(src, fast_out, fast_jpeg=True)
+
+            with Image.open(full_out) as full_img, Image.open(fast_out) as fast_img:
+                full_score = ssim(reference, full_img)
+                fast_score = ssim(reference, fast_img)
+            worst_loss = max(worst_loss, full_score - fast_score)
+
+            print(f"{src.name[:28]:<28} {megapixels:>6.1f} {full_time * 1000 / megapixels:>15.1f} "
+                  f"{fast_time * 1000 / megapixels:>13.1f} {full_time / fast_time:>5.1f} "
+                  f"{full_score:>14.4f} {fast_score:>12.4f}")
+
+        print("-" * 98)
+        print(f"Pérdida máxima de SSIM del camino rápido: {worst_loss:.4f} "
+              f"(tolerancia: {FAST_PATH_MAX_SSIM_LOSS})")
+        return 0 if worst_loss <= FAST_PATH_MAX_SSIM_LOSS else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
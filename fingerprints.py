@@ -0,0 +1,165 @@
+"""
+Nombres con huella de contenido para caché inmutable
+Cada archivo de tracks (imágenes, GIFs, videos y audio) y cada salida que
+recoge assets.json (variantes, AVIF, clips, hojas de atlas, paquetes) se
+publica también como _immutable/<hash><extensión>, con los primeros
+FINGERPRINT_LENGTH caracteres de su SHA-256. Esas URLs se sirven con
+Cache-Control immutable de un año (next.config.js): si el archivo se vuelve a
+optimizar cambia su hash y, con él, la URL.
+- Son enlaces duros (no ocupan espacio): antes de que los motores reescriban
+  un archivo en su sitio (el mismo inodo), detach_fingerprints cambia su
+  nombre con huella por una copia, para que la URL inmutable conserve el
+  contenido que anuncia; la copia se borra cuando ya nadie la usa
+- Cada nombre con huella guarda en assets.json el [tamaño, mtime] del
+  archivo del que salió: si no ha cambiado se reutiliza sin volver a leerlo,
+  y solo se calcula el hash de los archivos nuevos o modificados
+- Los nombres que ya no corresponden a ningún archivo se borran. Por eso, una
+  vez creada la carpeta, el optimizador la mantiene al día aunque no se pase
+  --fingerprint; --no-fingerprint la borra junto con los nombres de assets.json
+"""
+
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from media_walker import prune_generated
+from optimize_cache import file_hash, stat_key
+
+FINGERPRINT_DIR = "_immutable"
+FINGERPRINT_LENGTH = 16  # 64 bits de SHA-256: sin colisiones en la práctica
+FINGERPRINT_KINDS = ('image', 'gif', 'video', 'audio')
+FINGERPRINT_THREADS = 8  # Lectura y hash en paralelo (hashlib libera el GIL)
+
+
+def fingerprint_path(tracks_dir, path, content_hash):
+    return Path(tracks_dir) / FINGERPRINT_DIR / f"{content_hash[:FINGERPRINT_LENGTH]}{Path(path).suffix.lower()}"
+
+
+def link_fingerprint(path, target):
+    """Hace de target un enlace duro a path, de forma atómica"""
+    tmp_path = target.with_name(f".{target.name}.link")
+    tmp_path.unlink(missing_ok=True)
+    os.link(path, tmp_path)
+    os.replace(tmp_path, target)
+
+
+def is_linked(path, target):
+    try:
+        return os.path.samefile(path, target)
+    except OSError:
+        return False
+
+
+def detach_fingerprints(paths, recorded):
+    """Cambia por una copia el nombre con huella de cada ruta que comparta inodo con él
+
+    Se llama antes de que los motores reescriban esas rutas en su sitio.
+    recorded: {ruta: ([tamaño, mtime], ruta con huella)} (recorded_fingerprints).
+    Devuelve cuántos nombres se separaron.
+    """
+    detached = 0
+    for path in paths:
+        _, target = recorded.get(path, (None, None))
+        if target is not None and is_linked(path, target):
+            tmp_path = target.with_name(f".{target.name}.tmp")
+            shutil.copyfile(target, tmp_path)
+            os.replace(tmp_path, target)
+            detached += 1
+    return detached
+
+
+def build_fingerprints(paths, files, tracks_dir, recorded=None, threads=FINGERPRINT_THREADS):
+    """Publica cada archivo con el nombre de su hash y borra los nombres que sobran
+
+    files: recorrido de los tracks (TrackFiles), del que sale la carpeta
+    FINGERPRINT_DIR que ya hubiera.
+    recorded: {ruta: ([tamaño, mtime], ruta con huella)} de la ejecución
+    anterior (recorded_fingerprints); si el stat coincide y el nombre sigue
+    ahí, el archivo no se vuelve a leer. Un nombre que quedó como copia
+    (detach_fingerprints) y no comparte inodo con nada se vuelve a enlazar.
+    Devuelve ({ruta: ruta con huella}, enlazados, reutilizados).
+    """
+    recorded = recorded or {}
+    fingerprints = {}
+    pending = []
+    for path in sorted(set(paths)):
+        stat, target = recorded.get(path, (None, None))
+        if stat == stat_key(path) and target.exists():
+            fingerprints[path] = target
+        else:
+            pending.append(path)
+
+    (Path(tracks_dir) / FINGERPRINT_DIR).mkdir(exist_ok=True)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        hashes = list(executor.map(file_hash, pending))
+    for path, content_hash in zip(pending, hashes):
+        fingerprints[path] = fingerprint_path(tracks_dir, path, content_hash)
+
+    linked = 0
+    for path, target in fingerprints.items():
+        # Los archivos con el mismo contenido comparten nombre: basta con que esté enlazado a uno
+        if not target.exists() or (os.stat(target).st_nlink == 1 and not is_linked(path, target)):
+            link_fingerprint(path, target)
+            linked += 1
+
+    prune_generated(files, FINGERPRINT_DIR, set(fingerprints.values()))
+    return fingerprints, linked, len(fingerprints) - linked
+
+
+def output_paths(value, tracks_dir):
+    """Rutas de todas las salidas ({'path', 'url', ...}) que hay dentro de una sección de assets.json"""
+    if isinstance(value, dict):
+        if 'path' in value and 'url' in value:
+            yield Path(tracks_dir) / value['path']
+        for key, item in value.items():
+            if key != 'immutable':
+                yield from output_paths(item, tracks_dir)
+    elif isinstance(value, list):
+        for item in value:
+            yield from output_paths(item, tracks_dir)
+
+
+def recorded_fingerprints(assets, tracks_dir):
+    """{ruta: ([tamaño, mtime], ruta con huella)} de los nombres con huella que ya recoge assets.json"""
+    recorded = {}
+
+    def collect(path, immutable):
+        if isinstance(immutable, dict) and 'stat' in immutable:
+            recorded[Path(tracks_dir) / path] = (immutable['stat'], Path(tracks_dir) / immutable['path'])
+
+    def walk(value):
+        if isinstance(value, dict):
+            if 'path' in value and 'url' in value:
+                collect(value['path'], value.get('immutable'))
+            for key, item in value.items():
+                if key != 'immutable':
+                    walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    for rel, entry in assets.items():
+        collect(rel, entry.get('immutable'))
+        for section, value in entry.items():
+            if section != 'immutable':
+                walk(value)
+    return recorded
+
+
+def with_immutable(value, immutable_of):
+    """Copia de una sección de assets.json con 'immutable' en cada salida que tenga huella
+
+    immutable_of(ruta relativa) devuelve {'path', 'url', 'stat'} de su nombre
+    con huella, o None.
+    """
+    if isinstance(value, list):
+        return [with_immutable(item, immutable_of) for item in value]
+    if not isinstance(value, dict):
+        return value
+    result = {key: with_immutable(item, immutable_of) for key, item in value.items() if key != 'immutable'}
+    if 'path' in value and 'url' in value:
+        immutable = immutable_of(value['path'])
+        if immutable:
+            result['immutable'] = immutable
+    return result
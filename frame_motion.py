@@ -0,0 +1,136 @@
+"""
+Análisis de movimiento de animaciones (videos y GIFs) con NumPy
+Cada fotograma se reduce a la media de luminancia por bloques de BLOCK x BLOCK
+píxeles: el ruido de tramado (dithering) se promedia y desaparece, mientras
+que cualquier cambio local de tamaño apreciable mueve al menos un bloque.
+- Dos fotogramas son casi idénticos si ningún bloque cambia más de
+  MERGE_TOLERANCE: se fusionan alargando la duración del primero
+- El movimiento de un tramo es la diferencia media entre bloques de
+  fotogramas consecutivos; los fps necesarios son los que reparten ese
+  movimiento en pasos de MOTION_PER_FRAME, sin pasar del número de
+  fotogramas distintos por segundo (un clip casi quieto o con muchos
+  fotogramas repetidos necesita muy pocos fps)
+"""
+
+import math
+import subprocess
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+BLOCK = 8
+MOTION_WIDTH = 160  # Ancho al que se analizan los fotogramas
+MERGE_TOLERANCE = 3.0  # Diferencia máxima de un bloque (0-255) para considerar iguales dos fotogramas
+MOTION_PER_FRAME = 1.0  # Movimiento medio por bloque (0-255) que debe aportar cada fotograma de salida
+MAX_ANALYSIS_FPS = 30  # Los videos se analizan a como mucho estos fps
+
+
+def decimate_filter():
+    """Filtro mpdecimate de ffmpeg equivalente a fusionar fotogramas con MERGE_TOLERANCE
+
+    mpdecimate compara bloques de 8x8 por suma de diferencias absolutas: un
+    fotograma se descarta (y el anterior dura más) si ningún bloque difiere
+    del último conservado más de MERGE_TOLERANCE de media por píxel.
+    """
+    threshold = round(MERGE_TOLERANCE * 8 * 8)
+    return f"mpdecimate=hi={threshold}:lo={threshold}:frac=0"
+
+
+def block_means(luma):
+    """Media por bloques de BLOCK x BLOCK de una luminancia (alto, ancho) o pila (N, alto, ancho)
+
+    Los píxeles que no completan un bloque en el borde se descartan.
+    """
+    rows = luma.shape[-2] // BLOCK * BLOCK or luma.shape[-2]
+    cols = luma.shape[-1] // BLOCK * BLOCK or luma.shape[-1]
+    block_rows = min(BLOCK, luma.shape[-2])
+    block_cols = min(BLOCK, luma.shape[-1])
+    x = np.asarray(luma[..., :rows, :cols], dtype=np.float32)
+    x = x.reshape(x.shape[:-2] + (rows // block_rows, block_rows, cols // block_cols, block_cols))
+    return x.mean(axis=(-3, -1))
+
+
+def block_difference(a, b):
+    """Mayor diferencia entre bloques de dos fotogramas (ya reducidos con block_means)"""
+    return float(np.abs(a - b).max())
+
+
+def motion_scores(blocks):
+    """Movimiento entre fotogramas consecutivos de una pila de bloques (N, filas, columnas)"""
+    return np.abs(np.diff(blocks, axis=0)).mean(axis=(-2, -1))
+
+
+def rgba_luma(pixels):
+    """Luminancia (float32) de píxeles RGBA uint8; los transparentes cuentan como negro"""
+    rgb = pixels[..., :3].astype(np.float32) * (pixels[..., 3:4] > 0)
+    return rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def analysis_size(size):
+    width, height = size
+    if width <= MOTION_WIDTH:
+        return size
+    return MOTION_WIDTH, max(1, round(height * MOTION_WIDTH / width))
+
+
+def summarize(total_motion, duration_s, frames, still):
+    """Movimiento por segundo, fps necesarios y fotogramas casi repetidos"""
+    if duration_s <= 0:
+        duration_s = 1.0
+    per_second = total_motion / duration_s
+    distinct_per_second = (max(frames - 1, 0) - still) / duration_s
+    return {'motion_per_second': round(per_second, 3),
+            'needed_fps': round(min(per_second / MOTION_PER_FRAME, distinct_per_second), 2),
+            'frames': frames,
+            'still_frames': still}
+
+
+def gif_motion(img):
+    """Movimiento de una animación PIL, fotograma a fotograma sin cargarla entera"""
+    size = analysis_size(img.size)
+    previous = None
+    total_motion = 0.0
+    total_ms = 0
+    frames = still = 0
+    for frame in ImageSequence.Iterator(img):
+        total_ms += frame.info.get('duration') or 100
+        luma = frame.convert('L')
+        if luma.size != size:
+            luma = luma.resize(size, Image.Resampling.BOX)
+        blocks = block_means(np.asarray(luma))
+        if previous is not None:
+            total_motion += float(np.abs(blocks - previous).mean())
+            still += block_difference(blocks, previous) <= MERGE_TOLERANCE
+        previous = blocks
+        frames += 1
+    return summarize(total_motion, total_ms / 1000, frames, still)
+
+
+def video_motion(video_path, start_time, duration, size, source_fps=None):
+    """Movimiento del tramo de un video: ffmpeg lo decodifica en gris y pequeño por una tubería
+
+    size: (ancho, alto) mostrado del video, del sondeo de media_probe.
+    """
+    fps = min(source_fps or MAX_ANALYSIS_FPS, MAX_ANALYSIS_FPS)
+    width = MOTION_WIDTH
+    height = max(2, round(size[1] * width / size[0] / 2) * 2)
+    cmd = [
+        'ffmpeg', '-v', 'error', '-ss', str(start_time), '-t', str(duration), '-i', str(video_path),
+        '-vf', f'fps={fps},scale={width}:{height}', '-pix_fmt', 'gray', '-f', 'rawvideo', '-'
+    ]
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    stack = np.frombuffer(result.stdout, dtype=np.uint8)
+    stack = stack[:len(stack) // (width * height) * width * height].reshape(-1, height, width)
+    if len(stack) < 2:
+        return summarize(0.0, duration, len(stack), 0)
+    blocks = block_means(stack)
+    diffs = np.abs(np.diff(blocks, axis=0))
+    still = int((diffs.max(axis=(-2, -1)) <= MERGE_TOLERANCE).sum())
+    return summarize(float(motion_scores(blocks).sum()), len(stack) / fps, len(stack), still)
+
+
+def adaptive_fps(motion, fps_values):
+    """Menor fps de la rejilla que cubre los fps necesarios (o el mayor si ninguno llega)"""
+    needed = math.ceil(motion['needed_fps'] * 100) / 100
+    fitting = [fps for fps in sorted(fps_values) if fps >= needed]
+    return fitting[0] if fitting else max(fps_values)
@@ -0,0 +1,229 @@
+"""
+Re-codificador de GIFs con NumPy (sin gifsicle ni ffmpeg)
+Recorre los fotogramas dos veces sin cargarlos todos en memoria:
+- 1ª pasada: muestra de píxeles de todos los fotogramas para una paleta
+  global única (un índice queda reservado para la transparencia)
+- 2ª pasada: cada fotograma se compara con lo que hay en pantalla; solo se
+  codifica el rectángulo que cambia, los píxeles que no cambian dentro de él
+  van como transparentes (LZW los comprime casi gratis) y los fotogramas
+  idénticos o casi idénticos (frame_motion.py) a lo que ya se ve se eliminan
+  sumando su duración al anterior; con fps, además, no se emite más de un
+  fotograma cada 1/fps segundos
+Si un píxel tiene que volverse transparente, el fotograma anterior se
+desecha (disposal 2) sobre un rectángulo que lo cubre.
+La compresión LZW de cada rectángulo la hace PIL (GifImagePlugin.getdata).
+"""
+
+import io
+import struct
+from pathlib import Path
+
+import numpy as np
+from PIL import GifImagePlugin, Image, ImageSequence
+
+from frame_motion import MERGE_TOLERANCE, block_difference, block_means, rgba_luma
+
+SAMPLE_PIXELS = 1 << 18  # Píxeles de muestra (en total) para calcular la paleta global
+ALPHA_THRESHOLD = 128  # Por debajo, el píxel se considera transparente
+DEFAULT_DELAY_MS = 100  # Retardo que usan los navegadores cuando el GIF indica 0
+DISPOSE_NONE = 1  # Dejar el fotograma en pantalla
+DISPOSE_BACKGROUND = 2  # Borrar su rectángulo a transparente
+
+
+def target_size(size, max_width=None):
+    """Tamaño de salida: el original o reducido proporcionalmente a max_width"""
+    width, height = size
+    if max_width is None or width <= max_width:
+        return size
+    return max_width, max(1, round(height * max_width / width))
+
+
+def frame_arrays(img, size):
+    """Generador de (píxeles RGBA uint8, duración en ms) de cada fotograma ya compuesto
+
+    Los píxeles transparentes se normalizan a (0, 0, 0, 0) y el resto a alfa
+    255, de modo que dos píxeles transparentes siempre son iguales.
+    """
+    for frame in ImageSequence.Iterator(img):
+        duration = frame.info.get('duration') or DEFAULT_DELAY_MS
+        rgba = frame.convert('RGBA')
+        if rgba.size != size:
+            rgba = rgba.resize(size, Image.Resampling.LANCZOS)
+        pixels = np.array(rgba)
+        transparent = pixels[..., 3] < ALPHA_THRESHOLD
+        pixels[transparent] = 0
+        pixels[..., 3] = np.where(transparent, 0, 255)
+        yield pixels, duration
+
+
+def global_palette(img, size, colors=256):
+    """Paleta común (imagen 'P' de como mucho colors - 1 colores) de una muestra de todos los fotogramas"""
+    per_frame = max(1, SAMPLE_PIXELS // getattr(img, 'n_frames', 1))
+    samples = []
+    for pixels, _ in frame_arrays(img, size):
+        opaque = pixels[pixels[..., 3] > 0][:, :3]
+        if len(opaque):
+            samples.append(opaque[::max(1, len(opaque) // per_frame)])
+    sample = np.concatenate(samples) if samples else np.zeros((1, 3), dtype=np.uint8)
+    return Image.fromarray(np.ascontiguousarray(sample[np.newaxis])).quantize(
+        colors - 1, method=Image.Quantize.MEDIANCUT)
+
+
+def changed_mask(canvas, pixels):
+    """Píxeles en los que el fotograma difiere de lo que hay en pantalla"""
+    return np.any(canvas != pixels, axis=-1)
+
+
+def bounding_box(mask):
+    """(x0, y0, x1, y1) que encierra los True de mask, o None si no hay ninguno"""
+    rows = np.flatnonzero(mask.any(axis=1))
+    if not len(rows):
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def union_box(a, b):
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def skip_sub_blocks(data, pos):
+    """Posición tras una secuencia de sub-bloques (longitud + datos, terminada en 0)"""
+    while data[pos]:
+        pos += data[pos] + 1
+    return pos + 1
+
+
+def delay_offsets(data):
+    """Posiciones del retardo (2 bytes, en centésimas) de cada Graphic Control Extension"""
+    pos = 13
+    if data[10] & 0x80:  # Tabla de colores global
+        pos += 3 << ((data[10] & 0x07) + 1)
+    offsets = []
+    while pos < len(data) and data[pos] != 0x3B:
+        if data[pos] == 0x21:  # Extensión
+            if data[pos + 1] == 0xF9:
+                offsets.append(pos + 4)
+            pos = skip_sub_blocks(data, pos + 2)
+        elif data[pos] == 0x2C:  # Descriptor de imagen
+            flags = data[pos + 9]
+            pos += 10
+            if flags & 0x80:  # Tabla de colores local
+                pos += 3 << ((flags & 0x07) + 1)
+            pos = skip_sub_blocks(data, pos + 1)  # Tras el tamaño mínimo de código LZW
+        else:
+            raise ValueError(f"Bloque GIF desconocido en {pos}: {data[pos]:#x}")
+    return offsets
+
+
+def pad_final_delay(path, total_ms):
+    """Alarga el último fotograma de un GIF hasta que la animación dure total_ms
+
+    Al quitar fotogramas repetidos (mpdecimate), los del final desaparecen sin
+    que nadie alargue el último que queda. Devuelve los ms añadidos.
+    """
+    data = bytearray(Path(path).read_bytes())
+    offsets = delay_offsets(data)
+    if not offsets:
+        return 0
+    delays = [int.from_bytes(data[offset:offset + 2], 'little') for offset in offsets]
+    missing = round(total_ms / 10) - sum(delays)
+    if missing <= 0:
+        return 0
+    data[offsets[-1]:offsets[-1] + 2] = min(delays[-1] + missing, 0xFFFF).to_bytes(2, 'little')
+    Path(path).write_bytes(data)
+    return missing * 10
+
+
+def header(size, palette_rgb, transparent_index, loop):
+    """Cabecera GIF89a con la paleta global (con el índice transparente) y la extensión de bucle"""
+    bits = max(1, transparent_index.bit_length())  # Tabla de 2^bits colores que incluye el transparente
+    table = bytes(palette_rgb) + bytes(3 * (2 ** bits) - len(palette_rgb))
+    flags = 0x80 | ((bits - 1) << 4) | (bits - 1)
+    data = b'GIF89a' + struct.pack('<HHBBB', size[0], size[1], flags, transparent_index, 0) + table
+    if loop is not None:
+        data += b'!\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', loop) + b'\x00'
+    return data
+
+
+def frame_data(frame, transparent_index):
+    """Bloques de un fotograma: control gráfico, descriptor y datos LZW"""
+    x0, y0, x1, y1 = frame['box']
+    sub = Image.frombytes('P', (x1 - x0, y1 - y0), np.ascontiguousarray(frame['indices']).tobytes())
+    return b''.join(GifImagePlugin.getdata(sub, (x0, y0), duration=frame['duration'],
+                                           transparency=transparent_index, disposal=frame['disposal']))
+
+
+def expand(frame, box, transparent_index):
+    """El mismo fotograma sobre un rectángulo mayor (lo añadido, transparente = sin cambios)"""
+    x0, y0, x1, y1 = box
+    indices = np.full((y1 - y0, x1 - x0), transparent_index, dtype=np.uint8)
+    fx0, fy0, fx1, fy1 = frame['box']
+    indices[fy0 - y0:fy1 - y0, fx0 - x0:fx1 - x0] = frame['indices']
+    return dict(frame, box=box, indices=indices)
+
+
+def reencode_gif(source, output_path, max_width=None, colors=256, fps=None):
+    """Re-codifica un GIF con paleta global, rectángulos de cambio y transparencia
+
+    Puede escribir sobre el propio source. Devuelve el número de fotogramas
+    de entrada y de salida y el tamaño resultante.
+    """
+    min_interval = 1000 / fps if fps else 0
+    with Image.open(source) as img:
+        size = target_size(img.size, max_width)
+        palette = global_palette(img, size, colors)
+        palette_rgb = palette.getpalette()
+        transparent_index = len(palette_rgb) // 3
+        out = io.BytesIO()
+        out.write(header(size, palette_rgb, transparent_index, img.info.get('loop')))
+
+        canvas = np.zeros((size[1], size[0], 4), dtype=np.uint8)  # Lo que hay en pantalla
+        shown_blocks = block_means(rgba_luma(canvas))
+        pending = None  # Último fotograma, a la espera de saber su duración y su disposal
+        frames_in = frames_out = 0
+        for pixels, duration in frame_arrays(img, size):
+            frames_in += 1
+            changed = changed_mask(canvas, pixels)
+            if pending is not None and (
+                    not changed.any()
+                    or pending['duration'] < min_interval
+                    or block_difference(block_means(rgba_luma(pixels)), shown_blocks) <= MERGE_TOLERANCE):
+                # Igual o casi igual a lo que ya se ve, o demasiado pronto para
+                # los fps pedidos: se alarga el anterior (los cambios que no se
+                # muestran se acumulan y entran en el siguiente fotograma)
+                pending['duration'] += duration
+                continue
+
+            # Un índice transparente significa "no cambia": para que un píxel
+            # pase a transparente hay que desechar el fotograma anterior
+            clear = bounding_box(changed & (pixels[..., 3] == 0))
+            if clear is not None:
+                pending = expand(pending, union_box(pending['box'], clear), transparent_index)
+                pending['disposal'] = DISPOSE_BACKGROUND
+                x0, y0, x1, y1 = pending['box']
+                canvas[y0:y1, x0:x1] = 0
+                changed = changed_mask(canvas, pixels)
+
+            if pending is not None:
+                out.write(frame_data(pending, transparent_index))
+                frames_out += 1
+
+            box = bounding_box(changed) or (0, 0, 1, 1)
+            x0, y0, x1, y1 = box
+            crop = Image.fromarray(np.ascontiguousarray(pixels[y0:y1, x0:x1, :3]))
+            indices = np.array(crop.quantize(palette=palette, dither=Image.Dither.FLOYDSTEINBERG))
+            indices[~changed[y0:y1, x0:x1]] = transparent_index
+            canvas[changed] = pixels[changed]
+            shown_blocks = block_means(rgba_luma(canvas))
+            pending = {'box': box, 'indices': indices, 'duration': duration, 'disposal': DISPOSE_NONE}
+
+        if pending is not None:
+            out.write(frame_data(pending, transparent_index))
+            frames_out += 1
+        out.write(b';')
+
+    data = out.getvalue()
+    Path(output_path).write_bytes(data)
+    return {'frames': frames_in, 'frames_out': frames_out, 'bytes': len(data)}
+
@@ -0,0 +1,180 @@
+"""
+Búsqueda de parámetros de GIF para un tamaño objetivo
+En vez de una escalera fija de intentos, se predice el tamaño de cada
+combinación de ancho, fps, colores y lossy a partir de unas pocas
+codificaciones baratas a baja resolución, y solo se codifican a tamaño real
+(en paralelo) las combinaciones de mayor calidad que se prevé que caben.
+Si ninguna cabe, el error de la predicción corrige el modelo y se prueba la
+siguiente tanda.
+
+El codificador lo aporta quien llama: encode(params, ruta_salida), con
+params = {'width', 'fps', 'colors', 'lossy'}.
+"""
+
+import math
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+GIF_WIDTHS = (800, 720, 640, 560, 480, 400, 320, 240)
+GIF_FPS = (15, 12, 10, 8, 6)
+GIF_COLORS = (256, 192, 128, 96, 64, 48, 32)
+GIF_LOSSY = (0, 20, 40, 60, 80, 100)  # Solo con gifsicle
+GIF_SEARCH_THREADS = 4  # Codificaciones en paralelo (cada una es un proceso ffmpeg/gifsicle)
+GIF_SEARCH_ROUNDS = 4  # Tandas de codificaciones a tamaño real como máximo
+GIF_SEARCH_SLACK = 1.1  # Se prueban candidatos que se prevé que se pasen hasta un 10%
+
+# Peso de cada parámetro en la calidad percibida (por cada mitad de ancho,
+# de fps o de colores que se pierde, y por cada 100 de lossy)
+QUALITY_WEIGHTS = {'width': 1.0, 'fps': 0.75, 'colors': 0.25, 'lossy': 0.5}
+
+# Calibración a baja resolución
+CALIBRATION_WIDTH = 160
+CALIBRATION_COLORS = 64
+CALIBRATION_LOSSY = 80
+# Límites de los exponentes ajustados (una prueba ruidosa no dispara la extrapolación)
+EXPONENT_LIMITS = {'width': (0.5, 2.5), 'fps': (0.2, 1.2), 'colors': (0.0, 1.0)}
+
+
+def quality_score(params, max_width, max_fps):
+    """Calidad relativa de una combinación (0 = la mejor posible, negativo = peor)"""
+    return (QUALITY_WEIGHTS['width'] * math.log2(params['width'] / max_width)
+            + QUALITY_WEIGHTS['fps'] * math.log2(params['fps'] / max_fps)
+            + QUALITY_WEIGHTS['colors'] * math.log2(params['colors'] / max(GIF_COLORS))
+            - QUALITY_WEIGHTS['lossy'] * params['lossy'] / 100)
+
+
+def candidates(source_width, fps_values, lossy_values):
+    """Todas las combinaciones, de mayor a menor calidad, sin superar el ancho de la fuente"""
+    widths = sorted({min(width, source_width) for width in GIF_WIDTHS}, reverse=True)
+    max_fps = max(fps_values)
+    combos = [{'width': width, 'fps': fps, 'colors': colors, 'lossy': lossy}
+              for width in widths for fps in fps_values
+              for colors in GIF_COLORS for lossy in lossy_values]
+    combos.sort(key=lambda params: quality_score(params, widths[0], max_fps), reverse=True)
+    return combos
+
+
+def _fit_exponent(base_bytes, trial_bytes, base_value, trial_value, limits):
+    if not base_bytes or not trial_bytes or base_value == trial_value:
+        return sum(limits) / 2
+    exponent = math.log(trial_bytes / base_bytes) / math.log(trial_value / base_value)
+    return min(max(exponent, limits[0]), limits[1])
+
+
+class SizeModel:
+    """bytes ≈ base · (ancho/w0)^a · (fps/f0)^b · (colores/c0)^c · r^(lossy/L0)
+
+    Los exponentes y r se ajustan con una codificación a baja resolución que
+    cambia un solo parámetro cada vez respecto a la base.
+    """
+
+    def __init__(self, base, trials):
+        self.base = base
+        self.base_bytes = trials['base']
+        self.exponents = {
+            'width': _fit_exponent(trials['base'], trials.get('width'), base['width'],
+                                   trials.get('width_value', base['width']), EXPONENT_LIMITS['width']),
+            'fps': _fit_exponent(trials['base'], trials.get('fps'), base['fps'],
+                                 trials.get('fps_value', base['fps']), EXPONENT_LIMITS['fps']),
+            'colors': _fit_exponent(trials['base'], trials.get('colors'), base['colors'],
+                                    CALIBRATION_COLORS, EXPONENT_LIMITS['colors']),
+        }
+        lossy_ratio = trials['lossy'] / trials['base'] if trials.get('lossy') else 1.0
+        self.lossy_ratio = min(max(lossy_ratio, 0.2), 1.0)
+        self.correction = 1.0
+
+    def predict(self, params):
+        size = self.base_bytes * self.correction
+        for name, exponent in self.exponents.items():
+            size *= (params[name] / self.base[name]) ** exponent
+        return size * self.lossy_ratio ** (params['lossy'] / CALIBRATION_LOSSY)
+
+
+def _encode_all(encode, params_list, tmp_dir, first_index, threads):
+    """Codifica en paralelo; devuelve [(params, ruta, bytes)]"""
+    def run(indexed):
+        index, params = indexed
+        path = Path(tmp_dir) / f"trial_{index}.gif"
+        encode(params, path)
+        return params, path, os.path.getsize(path)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(params_list)))) as executor:
+        return list(executor.map(run, enumerate(params_list, first_index)))
+
+
+def calibrate(encode, source_width, fps_values, lossy_values, tmp_dir, threads):
+    """Codificaciones baratas a baja resolución para ajustar el modelo de tamaño"""
+    width = min(CALIBRATION_WIDTH, source_width)
+    base = {'width': width, 'fps': max(fps_values), 'colors': max(GIF_COLORS), 'lossy': 0}
+    plan = {'base': base}
+    if source_width > width:
+        plan['width'] = dict(base, width=min(width * 2, source_width))
+    if len(fps_values) > 1:
+        plan['fps'] = dict(base, fps=min(fps_values))
+    plan['colors'] = dict(base, colors=CALIBRATION_COLORS)
+    if max(lossy_values) > 0:
+        plan['lossy'] = dict(base, lossy=CALIBRATION_LOSSY)
+
+    names = list(plan)
+    encoded = _encode_all(encode, [plan[name] for name in names], tmp_dir, 0, threads)
+    trials = {name: size for name, (_, _, size) in zip(names, encoded)}
+    if 'width' in plan:
+        trials['width_value'] = plan['width']['width']
+    if 'fps' in plan:
+        trials['fps_value'] = plan['fps']['fps']
+    return SizeModel(base, trials), len(encoded)
+
+
+def search_gif_size(encode, output_path, max_bytes, source_width, fps_values, lossy_values=(0,),
+                    threads=GIF_SEARCH_THREADS):
+    """Busca la combinación de mayor calidad que no supera max_bytes y la escribe en output_path
+
+    Devuelve los parámetros elegidos, su tamaño, el tamaño previsto, el
+    número de codificaciones (calibración incluida) y si cabe en el límite;
+    si ninguna cabe se escribe la más pequeña que se probó.
+    """
+    ranked = candidates(source_width, fps_values, lossy_values)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model, trials = calibrate(encode, source_width, fps_values, lossy_values, tmp_dir, threads)
+
+        tried = {}  # posición en ranked -> (ruta, bytes, bytes previstos)
+        best = None  # Posición del mejor candidato que cabe
+        for _ in range(GIF_SEARCH_ROUNDS):
+            # Solo interesan candidatos de más calidad que el mejor que ya cabe
+            limit = len(ranked) if best is None else best
+            batch = [rank for rank in range(limit)
+                     if rank not in tried and model.predict(ranked[rank]) <= max_bytes * GIF_SEARCH_SLACK][:threads]
+            if not batch:
+                break
+            predicted = [model.predict(ranked[rank]) for rank in batch]
+            encoded = _encode_all(encode, [ranked[rank] for rank in batch], tmp_dir, trials, threads)
+            trials += len(encoded)
+            ratios = []
+            for rank, (_, path, size), guess in zip(batch, encoded, predicted):
+                tried[rank] = (path, size, guess)
+                ratios.append(size / guess)
+                if size <= max_bytes and (best is None or rank < best):
+                    best = rank
+            # Se corrige el modelo con el error observado: si nada cabe, con el
+            # peor caso; si algo cabe, con la mediana, por si sobra margen
+            ratios.sort()
+            model.correction *= ratios[-1] if best is None else ratios[len(ratios) // 2]
+
+        if not tried:
+            # El modelo prevé que nada cabe: se codifica la combinación más pequeña posible
+            rank = min(range(len(ranked)), key=lambda r: model.predict(ranked[r]))
+            guess = model.predict(ranked[rank])
+            ((_, path, size),) = _encode_all(encode, [ranked[rank]], tmp_dir, trials, 1)
+            trials += 1
+            tried[rank] = (path, size, guess)
+
+        if best is None:
+            best = min(tried, key=lambda rank: tried[rank][1])
+        params = ranked[best]
+        path, size, guess = tried[best]
+        Path(output_path).write_bytes(Path(path).read_bytes())
+
+    return dict(params, bytes=size, predicted_bytes=int(guess),
+                trials=trials, within_limit=size <= max_bytes)
@@ -0,0 +1,216 @@
+"""
+Métricas de calidad perceptual con NumPy (SSIM, MS-SSIM, PSNR)
+Todo se calcula sobre la luminancia y de forma vectorizada sobre los dos
+últimos ejes, así que una pila de fotogramas (N, alto, ancho) se evalúa en
+bloque igual que una imagen suelta:
+- SSIM con ventana uniforme mediante imágenes integrales (coste O(píxeles)
+  independiente del tamaño de ventana)
+- MS-SSIM con ventana gaussiana separable (11x11, sigma 1.5, como el artículo
+  original) y reducción 2x2 entre escalas
+"""
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+DATA_RANGE = 255.0
+SSIM_WINDOW = 7  # Lado de la ventana uniforme (igual que scikit-image por defecto)
+K1, K2 = 0.01, 0.03
+GAUSSIAN_SIZE = 11
+GAUSSIAN_SIGMA = 1.5
+MS_SSIM_WEIGHTS = (0.0448, 0.2856, 0.3001, 0.2363, 0.1333)
+FRAME_BATCH = 4  # Fotogramas por bloque al comparar animaciones (acota la memoria)
+
+
+def to_luma(img):
+    """Luminancia en float64 de una imagen PIL (o de un array ya en escala de grises)"""
+    if isinstance(img, Image.Image) and img.mode != 'L':
+        img = img.convert('L')
+    return np.asarray(img, dtype=np.float64)
+
+
+def box_mean(x, size):
+    """Media en ventanas size x size (solo posiciones válidas) con una imagen integral
+
+    Opera sobre los dos últimos ejes, por lo que acepta pilas de fotogramas.
+    """
+    integral = np.zeros(x.shape[:-2] + (x.shape[-2] + 1, x.shape[-1] + 1), dtype=np.float64)
+    np.cumsum(np.cumsum(x, axis=-2), axis=-1, out=integral[..., 1:, 1:])
+    total = (integral[..., size:, size:] - integral[..., :-size, size:]
+             - integral[..., size:, :-size] + integral[..., :-size, :-size])
+    return total / (size * size)
+
+
+def gaussian_kernel(size=GAUSSIAN_SIZE, sigma=GAUSSIAN_SIGMA):
+    offsets = np.arange(size, dtype=np.float64) - (size - 1) / 2
+    kernel = np.exp(-(offsets ** 2) / (2 * sigma ** 2))
+    return kernel / kernel.sum()
+
+
+def gaussian_mean(x, size=GAUSSIAN_SIZE, sigma=GAUSSIAN_SIGMA):
+    """Media gaussiana separable (solo posiciones válidas) sobre los dos últimos ejes
+
+    Cada pasada es una suma de size desplazamientos del array completo, sin
+    bucles por píxel.
+    """
+    kernel = gaussian_kernel(size, sigma).astype(x.dtype)
+    rows = x.shape[-2] - size + 1
+    cols = x.shape[-1] - size + 1
+    vertical = sum(w * x[..., k:k + rows, :] for k, w in enumerate(kernel))
+    return sum(w * vertical[..., :, k:k + cols] for k, w in enumerate(kernel))
+
+
+def _ssim_maps(x, y, window, data_range, gaussian):
+    """Mapas de SSIM y de contraste-estructura (cs) de dos arrays del mismo tamaño"""
+    c1 = (K1 * data_range) ** 2
+    c2 = (K2 * data_range) ** 2
+    if gaussian:
+        def mean(v):
+            return gaussian_mean(v, window)
+        cov_norm = 1.0
+    else:
+        def mean(v):
+            return box_mean(v, window)
+        n = window * window
+        cov_norm = n / (n - 1) if n > 1 else 1.0  # Varianza muestral, como scikit-image
+
+    mu_x = mean(x)
+    mu_y = mean(y)
+    var_x = cov_norm * (mean(x * x) - mu_x * mu_x)
+    var_y = cov_norm * (mean(y * y) - mu_y * mu_y)
+    cov_xy = cov_norm * (mean(x * y) - mu_x * mu_y)
+
+    cs_map = (2 * cov_xy + c2) / (var_x + var_y + c2)
+    luminance = (2 * mu_x * mu_y + c1) / (mu_x * mu_x + mu_y * mu_y + c1)
+    return luminance * cs_map, cs_map
+
+
+def _as_pair(a, b):
+    x = to_luma(a)
+    y = to_luma(b)
+    if x.shape != y.shape:
+        raise ValueError(f"Tamaños distintos: {x.shape} vs {y.shape}")
+    return x, y
+
+
+def ssim(a, b, window=SSIM_WINDOW, data_range=DATA_RANGE):
+    """SSIM medio entre dos imágenes del mismo tamaño (1.0 = idénticas)
+
+    Con pilas (N, alto, ancho) devuelve un array con el SSIM de cada fotograma.
+    """
+    x, y = _as_pair(a, b)
+    window = min(window, *x.shape[-2:])
+    ssim_map, _ = _ssim_maps(x, y, window, data_range, gaussian=False)
+    result = ssim_map.mean(axis=(-2, -1))
+    return float(result) if result.ndim == 0 else result
+
+
+def downsample(x):
+    """Reducción 2x2 por media (descarta la última fila/columna si son impares)"""
+    rows = x.shape[-2] // 2 * 2
+    cols = x.shape[-1] // 2 * 2
+    x = x[..., :rows, :cols]
+    return (x[..., 0::2, 0::2] + x[..., 1::2, 0::2] + x[..., 0::2, 1::2] + x[..., 1::2, 1::2]) / 4
+
+
+def ms_ssim(a, b, weights=MS_SSIM_WEIGHTS, data_range=DATA_RANGE):
+    """MS-SSIM (Wang et al. 2003) entre dos imágenes o pilas de fotogramas
+
+    Si la imagen es demasiado pequeña para todas las escalas se usan solo las
+    que caben y se renormalizan los pesos.
+    """
+    x, y = _as_pair(a, b)
+    # La media gaussiana no acumula sumas grandes: float32 basta y va el doble de rápido
+    x = x.astype(np.float32)
+    y = y.astype(np.float32)
+    scales = len(weights)
+    while scales > 1 and min(x.shape[-2:]) // (2 ** (scales - 1)) < GAUSSIAN_SIZE:
+        scales -= 1
+    weights = np.asarray(weights[:scales], dtype=np.float64)
+    weights /= weights.sum()
+    window = min(GAUSSIAN_SIZE, *x.shape[-2:])
+
+    values = []
+    for scale in range(scales):
+        ssim_map, cs_map = _ssim_maps(x, y, window, data_range, gaussian=True)
+        last = scale == scales - 1
+        # Valores negativos (estructuras invertidas) se recortan a 0 como en las implementaciones de referencia
+        values.append(np.maximum((ssim_map if last else cs_map).mean(axis=(-2, -1)), 0))
+        if not last:
+            x, y = downsample(x), downsample(y)
+
+    result = np.prod([v ** w for v, w in zip(values, weights)], axis=0)
+    return float(result) if np.ndim(result) == 0 else result
+
+
+def psnr(a, b, data_range=DATA_RANGE):
+    """PSNR en dB (inf si son idénticas); con pilas, uno por fotograma"""
+    x, y = _as_pair(a, b)
+    mse = np.mean((x - y) ** 2, axis=(-2, -1))
+    with np.errstate(divide='ignore'):
+        result = 10 * np.log10(data_range ** 2 / mse)
+    return float(result) if np.ndim(result) == 0 else result
+
+
+def compare(reference, distorted):
+    """SSIM, MS-SSIM y PSNR de una imagen frente a su referencia (redimensionada si hace falta)"""
+    if isinstance(reference, Image.Image) and isinstance(distorted, Image.Image) \
+            and reference.size != distorted.size:
+        reference = reference.convert('L').resize(distorted.size, Image.Resampling.LANCZOS)
+    return {'ssim': ssim(reference, distorted),
+            'ms_ssim': ms_ssim(reference, distorted),
+            'psnr': psnr(reference, distorted)}
+
+
+def frame_lumas(img, size=None):
+    """Generador de (instante de inicio en ms, luminancia) de cada fotograma de una animación"""
+    elapsed = 0
+    for frame in ImageSequence.Iterator(img):
+        luma = frame.convert('L')
+        if size is not None and luma.size != size:
+            luma = luma.resize(size, Image.Resampling.LANCZOS)
+        yield elapsed, np.asarray(luma, dtype=np.float64)
+        elapsed += frame.info.get('duration', 0) or 0
+
+
+def matched_batches(reference, distorted, batch_size):
+    """Lotes (referencias, resultados) apilados, emparejando cada fotograma del
+    resultado con el de la referencia que se mostraba en ese mismo instante"""
+    reference_frames = frame_lumas(reference, distorted.size)
+    current_start, current = next(reference_frames)
+    upcoming = next(reference_frames, None)
+    batch_reference, batch_distorted = [], []
+    for start, frame in frame_lumas(distorted):
+        while upcoming is not None and upcoming[0] <= start:
+            current_start, current = upcoming
+            upcoming = next(reference_frames, None)
+        batch_reference.append(current)
+        batch_distorted.append(frame)
+        if len(batch_distorted) == batch_size:
+            yield np.stack(batch_reference), np.stack(batch_distorted)
+            batch_reference, batch_distorted = [], []
+    if batch_distorted:
+        yield np.stack(batch_reference), np.stack(batch_distorted)
+
+
+def compare_frames(reference, distorted, batch_size=FRAME_BATCH):
+    """Métricas de una animación frente a su referencia, calculadas por lotes
+
+    Cada fotograma del resultado se compara con el fotograma de la referencia
+    que se mostraba en ese mismo instante (la optimización puede eliminar o
+    fusionar fotogramas). Los fotogramas se decodifican sobre la marcha y se
+    evalúan en bloques de batch_size, así la memoria no depende de la duración.
+    Devuelve media y mínimo por métrica y el número de fotogramas de cada lado.
+    """
+    scores = {'ssim': [], 'ms_ssim': [], 'psnr': []}
+    for reference_batch, distorted_batch in matched_batches(reference, distorted, batch_size):
+        scores['ssim'].append(np.atleast_1d(ssim(reference_batch, distorted_batch)))
+        scores['ms_ssim'].append(np.atleast_1d(ms_ssim(reference_batch, distorted_batch)))
+        scores['psnr'].append(np.atleast_1d(psnr(reference_batch, distorted_batch)))
+
+    result = {'frames': int(sum(len(values) for values in scores['ssim'])),
+              'reference_frames': int(getattr(reference, 'n_frames', 1))}
+    for name, batches in scores.items():
+        values = np.concatenate(batches)
+        result[name] = float(values.mean())
+        result[f'{name}_min'] = float(values.min())
+    return result
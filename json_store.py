@@ -0,0 +1,33 @@
+"""
+JSON versionados del optimizador (caché, assets.json, almacén de originales, sondeos)
+Todos tienen la forma {"version": N, <secciones>...}. Un archivo que falta,
+no se puede leer o es de otra versión se trata como vacío, y se escriben en
+un temporal que luego se renombra, así una ejecución interrumpida nunca deja
+un JSON a medias.
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+def load_versioned(path, version):
+    """Secciones del JSON de path, o {} si no existe, está dañado o es de otra versión"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != version:
+        return {}
+    return data
+
+
+def save_versioned(path, version, sections):
+    """Escribe {'version': version, **sections} en path de forma atómica"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': version, **sections}, f, indent=1, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp_path, path)
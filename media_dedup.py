@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Detección de duplicados en public/tracks
+- Exactos: archivos con el mismo contenido. Solo se calcula el hash de los
+  que comparten tamaño con algún otro, así que casi ningún archivo se lee
+- Perceptuales: imágenes y GIFs que se ven igual aunque cambie el formato,
+  la compresión o el tamaño (p. ej. foto.gif y foto.webp). De cada una se
+  calcula un dHash y un pHash de 64 bits sobre una miniatura en gris; los
+  hashes de todas las imágenes se calculan a la vez con NumPy y se indexan en
+  un árbol BK, que devuelve los vecinos a una distancia de Hamming dada sin
+  comparar todos con todos
+Los duplicados exactos con la misma extensión se pueden sustituir por
+enlaces duros al primero (mismo inodo: se guardan y se optimizan una vez).
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from media_walker import walk_tracks, work_list
+from optimize_cache import file_hash
+
+HASH_SIZE = 8  # Hashes de HASH_SIZE x HASH_SIZE = 64 bits
+PHASH_SIZE = 32  # Miniatura sobre la que se calcula la DCT del pHash
+PHASH_RADIUS = 8  # Distancia de Hamming máxima del pHash entre dos imágenes iguales
+DHASH_RADIUS = 10  # Y la del dHash (las dos tienen que cumplirse)
+DEDUP_THREADS = 8  # Decodificación de miniaturas en paralelo (PIL libera el GIL)
+PERCEPTUAL_KINDS = ('image', 'gif')
+
+
+def canonical_order(item):
+    """Orden dentro de un grupo: primero el nombre más corto ('1.webp' antes que '1 copy.webp')"""
+    return len(item.path.name), item.rel
+
+
+def exact_groups(files):
+    """Grupos de archivos con el mismo contenido (listas de MediaFile, ver canonical_order)
+
+    Los tamaños únicos no pueden repetirse: solo se hashean los demás.
+    """
+    by_size = {}
+    for item in files:
+        by_size.setdefault(item.size, []).append(item)
+
+    by_hash = {}
+    for same_size in (group for group in by_size.values() if len(group) > 1):
+        for item in same_size:
+            by_hash.setdefault(file_hash(item.path), []).append(item)
+    return sorted((sorted(group, key=canonical_order) for group in by_hash.values() if len(group) > 1),
+                  key=lambda group: group[0].rel)
+
+
+def thumbnails(path):
+    """Miniaturas en gris del primer fotograma: (PHASH_SIZE x PHASH_SIZE, HASH_SIZE x HASH_SIZE+1)"""
+    with Image.open(path) as img:
+        img.draft('L', (PHASH_SIZE * 2, PHASH_SIZE * 2))  # Solo afecta a los JPEG
+        gray = img.convert('L')
+    return (np.asarray(gray.resize((PHASH_SIZE, PHASH_SIZE), Image.Resampling.BOX), dtype=np.float32),
+            np.asarray(gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX), dtype=np.int16))
+
+
+def dct_matrix(size):
+    """Matriz de la DCT-II ortonormal de size puntos"""
+    k = np.arange(size)[:, np.newaxis]
+    n = np.arange(size)[np.newaxis, :]
+    matrix = np.sqrt(2 / size) * np.cos(np.pi * (2 * n + 1) * k / (2 * size))
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+
+def pack_bits(bits):
+    """(N, 64) booleanos -> lista de N enteros de 64 bits"""
+    return [int.from_bytes(row.tobytes(), 'big') for row in np.packbits(bits, axis=1)]
+
+
+def dhash(stack):
+    """dHash de una pila (N, 8, 9): cada bit dice si un píxel es más claro que su vecino izquierdo"""
+    return pack_bits((stack[:, :, 1:] > stack[:, :, :-1]).reshape(len(stack), -1))
+
+
+def phash(stack):
+    """pHash de una pila (N, 32, 32): frecuencias bajas de la DCT 2D frente a su mediana"""
+    matrix = dct_matrix(stack.shape[-1])
+    low = (matrix @ stack @ matrix.T)[:, :HASH_SIZE, :HASH_SIZE].reshape(len(stack), -1)
+    median = np.median(low[:, 1:], axis=1)  # Sin la componente continua (el brillo medio)
+    return pack_bits(low > median[:, np.newaxis])
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def perceptual_hashes(files, threads=DEDUP_THREADS):
+    """{ruta: (pHash, dHash)} de los archivos que se pueden decodificar"""
+    def load(item):
+        try:
+            return thumbnails(item.path)
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        loaded = [(item, thumbs) for item, thumbs in zip(files, executor.map(load, files)) if thumbs is not None]
+    if not loaded:
+        return {}
+    phashes = phash(np.stack([thumbs[0] for _, thumbs in loaded]))
+    dhashes = dhash(np.stack([thumbs[1] for _, thumbs in loaded]))
+    return {item.path: hashes for (item, _), hashes in zip(loaded, zip(phashes, dhashes))}
+
+
+class BKTree:
+    """Árbol BK sobre la distancia de Hamming: nodo = [hash, valores, {distancia: hijo}]"""
+
+    def __init__(self):
+        self.root = None
+
+    def add(self, key, value):
+        if self.root is None:
+            self.root = [key, [value], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(key, node[0])
+            if distance == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, [value], {}]
+                return
+            node = child
+
+    def query(self, key, radius):
+        """Valores cuyo hash está a distancia <= radius de key"""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(key, node[0])
+            if distance <= radius:
+                found.extend(node[1])
+            # Desigualdad triangular: solo pueden estar cerca los hijos en esta franja
+            stack.extend(child for d, child in node[2].items() if distance - radius <= d <= distance + radius)
+        return found
+
+
+def perceptual_groups(files, hashes, phash_radius=PHASH_RADIUS, dhash_radius=DHASH_RADIUS):
+    """Grupos de archivos que se ven igual (listas de MediaFile, ver canonical_order)"""
+    items = [item for item in files if item.path in hashes]
+    tree = BKTree()
+    for index, item in enumerate(items):
+        tree.add(hashes[item.path][0], index)
+
+    parent = list(range(len(items)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for index, item in enumerate(items):
+        item_phash, item_dhash = hashes[item.path]
+        for other in tree.query(item_phash, phash_radius):
+            if other > index and hamming(item_dhash, hashes[items[other].path][1]) <= dhash_radius:
+                parent[find(other)] = find(index)
+
+    clusters = {}
+    for index, item in enumerate(items):
+        clusters.setdefault(find(index), []).append(item)
+    return sorted((sorted(group, key=canonical_order) for group in clusters.values() if len(group) > 1),
+                  key=lambda group: group[0].rel)
+
+
+def find_duplicates(files, threads=DEDUP_THREADS):
+    """Duplicados de una lista de MediaFile
+
+    'exact': grupos con el mismo contenido; 'perceptual': grupos que se ven
+    igual y no son todos el mismo archivo; 'duplicate_bytes': lo que ocupan
+    (y se descarga) de más las copias exactas.
+    """
+    exact = exact_groups(files)
+    group_of = {item.path: index for index, group in enumerate(exact) for item in group}
+    candidates = [item for item in files if item.kind in PERCEPTUAL_KINDS]
+    perceptual = [group for group in perceptual_groups(candidates, perceptual_hashes(candidates, threads))
+                  if len({group_of.get(item.path, item.path) for item in group}) > 1]
+    return {'exact': exact, 'perceptual': perceptual,
+            'duplicate_bytes': sum(group[0].size * (len(group) - 1) for group in exact)}
+
+
+def link_duplicates(groups):
+    """Sustituye cada copia exacta por un enlace duro al primer archivo de su grupo
+
+    Solo se enlazan archivos con la misma extensión (los mismos ajustes del
+    optimizador). Devuelve (archivos enlazados, bytes liberados).
+    """
+    linked = freed = 0
+    for group in groups:
+        first = group[0]
+        first_stat = os.stat(first.path)
+        for item in group[1:]:
+            if item.path.suffix.lower() != first.path.suffix.lower():
+                continue
+            stat = os.stat(item.path)
+            if (stat.st_dev, stat.st_ino) == (first_stat.st_dev, first_stat.st_ino):
+                continue
+            tmp_path = item.path.with_name(f".{item.path.name}.link")
+            os.link(first.path, tmp_path)
+            os.replace(tmp_path, item.path)
+            linked += 1
+            freed += item.size
+    return linked, freed
+
+
+def print_report(duplicates):
+    """Lista los grupos de duplicados"""
+    for title, groups in (("Duplicados exactos", duplicates['exact']),
+                          ("Duplicados perceptuales", duplicates['perceptual'])):
+        print(f"{title}: {len(groups)} grupos")
+        for group in groups:
+            print(f"  - {group[0].rel}")
+            for item in group[1:]:
+                print(f"    = {item.rel}")
+    print(f"Copias exactas: {duplicates['duplicate_bytes'] / (1024 * 1024):.2f} MB de más")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Busca imágenes, GIFs y videos duplicados en public/tracks")
+    parser.add_argument('tracks_dir', nargs='?', default="public/tracks",
+                        help="Carpeta raíz de los tracks (por defecto public/tracks)")
+    parser.add_argument('--link', action='store_true',
+                        help="Sustituye las copias exactas por enlaces duros al primer archivo del grupo")
+    args = parser.parse_args(argv)
+
+    tracks_dir = Path(args.tracks_dir)
+    if not tracks_dir.exists():
+        print(f"Error: No se encuentra el directorio {tracks_dir}")
+        return 1
+
+    duplicates = find_duplicates(work_list(walk_tracks(tracks_dir)))
+    print_report(duplicates)
+    if args.link:
+        linked, freed = link_duplicates(duplicates['exact'])
+        print("-" * 60)
+        print(f"Enlazados: {linked} archivos ({freed / (1024 * 1024):.2f} MB liberados)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
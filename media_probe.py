@@ -0,0 +1,163 @@
+"""
+Sondeo de videos con ffprobe (y de imágenes por su cabecera, con PIL)
+Una sola llamada a ffprobe por archivo, con salida JSON, devuelve duración,
+dimensiones (tal y como se muestran, con la rotación aplicada), códec,
+rotación y fps. Los resultados se guardan por hash de contenido en
+.optimize_cache/probes.json, así un video ya sondeado no vuelve a lanzar
+ningún proceso aunque se mueva o se renombre, y todas las etapas de una
+ejecución comparten el mismo sondeo.
+"""
+
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from json_store import load_versioned, save_versioned
+from optimize_cache import CACHE_DIR, file_hash
+
+PROBES_PATH = CACHE_DIR / "probes.json"
+PROBE_CACHE_VERSION = 1  # Cambiar si cambian los campos del sondeo
+PROBE_THREADS = 8  # ffprobe es un proceso aparte: los hilos solo esperan
+
+
+def parse_rate(value):
+    """'30000/1001' -> 29.97 (None si no hay dato)"""
+    try:
+        num, _, den = str(value).partition('/')
+        rate = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return round(rate, 3) if rate > 0 else None
+
+
+def stream_rotation(stream):
+    """Rotación en grados (0, 90, 180, 270) de la matriz de visualización o de la etiqueta rotate"""
+    for side_data in stream.get('side_data_list', []):
+        if 'rotation' in side_data:
+            return int(round(float(side_data['rotation']))) % 360
+    try:
+        return int(stream.get('tags', {}).get('rotate', 0)) % 360
+    except ValueError:
+        return 0
+
+
+def probe_media(path):
+    """Duración, dimensiones, códec, rotación y fps del primer stream de video, o None si falla"""
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'format=duration:stream=codec_name,width,height,avg_frame_rate,'
+                         'r_frame_rate,duration:stream_tags=rotate:stream_side_data=rotation',
+        '-of', 'json', str(path)
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        data = json.loads(result.stdout)
+        stream = data['streams'][0]
+        duration = float(data.get('format', {}).get('duration') or stream['duration'])
+        width, height = int(stream['width']), int(stream['height'])
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError, KeyError, IndexError):
+        return None
+
+    rotation = stream_rotation(stream)
+    # ffmpeg aplica la rotación al decodificar: las dimensiones útiles son las mostradas
+    if rotation in (90, 270):
+        width, height = height, width
+    return {
+        'duration': duration,
+        'width': width,
+        'height': height,
+        'codec': stream.get('codec_name'),
+        'rotation': rotation,
+        'fps': parse_rate(stream.get('avg_frame_rate')) or parse_rate(stream.get('r_frame_rate')),
+    }
+
+
+def probe_image(path):
+    """Dimensiones, formato, si es animada y número de fotogramas de una imagen, o None si no lo es
+
+    Solo se leen cabeceras: PIL no decodifica píxeles al abrir, y n_frames
+    recorre las cabeceras de los fotogramas (GIF) o los chunks (WebP, APNG,
+    AVIF) sin descomprimirlos.
+    """
+    try:
+        with Image.open(path) as img:
+            frames = getattr(img, 'n_frames', 1)
+            return {'width': img.width, 'height': img.height, 'format': img.format.lower(),
+                    'animated': frames > 1, 'frames': frames}
+    except (OSError, ValueError):
+        return None
+
+
+class ProbeCache:
+    """Sondeos persistentes {hash de contenido: sondeo} más {ruta relativa: stat y hash}
+
+    La tabla de rutas permite reutilizar un sondeo sin volver a calcular el
+    hash si el archivo no ha cambiado de tamaño ni de mtime.
+    """
+
+    def __init__(self, path=PROBES_PATH):
+        self.path = Path(path)
+        self.probes = {}
+        self.files = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path=PROBES_PATH):
+        cache = cls(path)
+        data = load_versioned(cache.path, PROBE_CACHE_VERSION)
+        cache.probes = data.get('probes', {})
+        cache.files = data.get('files', {})
+        return cache
+
+    def save(self):
+        if self.dirty:
+            save_versioned(self.path, PROBE_CACHE_VERSION, {'probes': self.probes, 'files': self.files})
+            self.dirty = False
+
+    def cached(self, key, stat):
+        """Sondeo de un archivo sin tocar el disco si su stat no ha cambiado, o None"""
+        entry = self.files.get(key)
+        if entry is not None and entry['stat'] == list(stat):
+            return self.probes.get(entry['hash'])
+        return None
+
+    def _resolve(self, path):
+        """(hash, sondeo, si venía de la caché); se ejecuta en hilos, no modifica la caché"""
+        content_hash = file_hash(path)
+        probe = self.probes.get(content_hash)
+        if probe is not None:
+            return content_hash, probe, True
+        return content_hash, probe_media(path), False
+
+    def probe_all(self, items, key_for, threads=PROBE_THREADS):
+        """Sondeos de una lista de MediaFile: {ruta: sondeo o None} y cuántos se lanzaron
+
+        Primero el camino rápido por stat; el resto se hashea y, si el contenido
+        no se conoce, se sondea, en paralelo.
+        """
+        probes = {}
+        missing = []
+        for item in items:
+            probe = self.cached(key_for(item.path), item.stat)
+            if probe is not None:
+                probes[item.path] = probe
+            else:
+                missing.append(item)
+        if not missing:
+            return probes, 0
+
+        launched = 0
+        with ThreadPoolExecutor(max_workers=min(threads, len(missing))) as executor:
+            for item, (content_hash, probe, cached) in zip(missing, executor.map(
+                    lambda item: self._resolve(item.path), missing)):
+                probes[item.path] = probe
+                launched += not cached
+                if probe is None:
+                    continue
+                self.probes[content_hash] = probe
+                self.files[key_for(item.path)] = {'stat': item.stat, 'hash': content_hash}
+                self.dirty = True
+        return probes, launched
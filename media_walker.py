@@ -0,0 +1,129 @@
+"""
+Recorrido único de la carpeta de tracks
+Un solo os.scandir por directorio: cada archivo se clasifica por extensión
+(sin distinguir mayúsculas) y se devuelve con su stat, de modo que todas las
+etapas del optimizador comparten la misma lista sin volver a tocar el disco.
+Las carpetas en las que no se entra (_backup_original, _atlas...) quedan
+anotadas en la lista, para que nadie tenga que volver a recorrer el árbol
+para encontrarlas.
+"""
+
+import os
+import shutil
+from pathlib import Path
+from typing import NamedTuple
+
+from optimize_images import GIF_EXTENSIONS, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.m4a', '.aac')
+GUION_NAME = 'guion.js'
+
+# Un .avif junto a otra imagen con su nombre (foto.webp.avif, o foto.avif de
+# versiones anteriores) es la versión alternativa que genera el optimizador,
+# no una imagen más. Las mismas imágenes que cuentan en route.ts
+ALTERNATE_EXTENSIONS = ('.avif',)
+ALTERNATE_OF_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg')
+
+EXTENSION_KINDS = {}
+for _kind, _extensions in (('image', IMAGE_EXTENSIONS), ('video', VIDEO_EXTENSIONS),
+                           ('gif', GIF_EXTENSIONS), ('audio', AUDIO_EXTENSIONS)):
+    EXTENSION_KINDS.update(dict.fromkeys(_extensions, _kind))
+
+# Tipos que procesa el optimizador (el resto solo se listan)
+OPTIMIZABLE_KINDS = ('image', 'video', 'gif')
+
+
+class MediaFile(NamedTuple):
+    """Archivo encontrado en el recorrido"""
+    kind: str  # 'image', 'video', 'gif', 'audio', 'guion', 'alternate' u 'other'
+    path: Path
+    rel: str  # Ruta relativa a la raíz del recorrido, con '/'
+    size: int
+    mtime_ns: int
+
+    @property
+    def stat(self):
+        return [self.size, self.mtime_ns]
+
+
+class TrackFiles(list):
+    """Lista de MediaFile del recorrido
+
+    skipped_dirs: {nombre: [rutas]} de las carpetas saltadas por su prefijo.
+    """
+
+    def __init__(self, files=(), skipped_dirs=None):
+        super().__init__(files)
+        self.skipped_dirs = skipped_dirs or {}
+
+
+def classify(name):
+    """Tipo de un archivo según su nombre"""
+    if name == GUION_NAME:
+        return 'guion'
+    return EXTENSION_KINDS.get(os.path.splitext(name)[1].lower(), 'other')
+
+
+def alternate_names(names):
+    """Nombres de una carpeta que son la versión alternativa (AVIF) de otra imagen de la misma carpeta"""
+    primary = {name for name in names if name.lower().endswith(ALTERNATE_OF_EXTENSIONS)}
+    primary.update([os.path.splitext(name)[0] for name in primary])
+    return {name for name in names
+            if name.lower().endswith(ALTERNATE_EXTENSIONS) and os.path.splitext(name)[0] in primary}
+
+
+def walk_tracks(root, skip_prefix='_'):
+    """Recorre root una sola vez y devuelve la lista de MediaFile ordenada por ruta (TrackFiles)
+
+    No se entra en carpetas (ni se listan archivos) cuyo nombre empiece por
+    skip_prefix, como _backup_original; esas carpetas quedan en skipped_dirs.
+    """
+    root = Path(root)
+    files = TrackFiles()
+    stack = [(root, '')]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        with os.scandir(dir_path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+
+        alternates = alternate_names([entry.name for entry in entries])
+        subdirs = []
+        for entry in entries:
+            if skip_prefix and entry.name.startswith(skip_prefix):
+                if entry.is_dir():
+                    files.skipped_dirs.setdefault(entry.name, []).append(Path(entry.path))
+                continue
+            rel = f"{rel_dir}{entry.name}"
+            if entry.is_dir():
+                subdirs.append((Path(entry.path), rel + '/'))
+            elif entry.is_file():
+                st = entry.stat()
+                kind = 'alternate' if entry.name in alternates else classify(entry.name)
+                files.append(MediaFile(kind, Path(entry.path), rel, st.st_size, st.st_mtime_ns))
+
+        # Orden inverso para que la pila saque las subcarpetas en orden alfabético
+        stack.extend(reversed(subdirs))
+
+    files.sort(key=lambda f: f.rel)
+    return files
+
+
+def work_list(files, kinds=OPTIMIZABLE_KINDS):
+    """Filtra la lista del recorrido a los tipos indicados"""
+    return [f for f in files if f.kind in kinds]
+
+
+def prune_generated(files, dir_name, keep):
+    """Borra de las carpetas dir_name del recorrido (files.skipped_dirs) los archivos que no están en keep
+
+    Es la limpieza de las salidas con firma en el nombre (atlas, paquetes): las
+    de firmas antiguas o de carpetas que ya no las tienen. Las carpetas que se
+    quedan vacías también se borran.
+    """
+    for generated_dir in files.skipped_dirs.get(dir_name, []):
+        if not generated_dir.is_dir():
+            continue
+        for stale in [path for path in generated_dir.iterdir() if path not in keep]:
+            stale.unlink()
+        if not any(generated_dir.iterdir()):
+            shutil.rmtree(generated_dir)
@@ -12,6 +12,17 @@ const nextConfig = {
           },
         ],
       },
+      {
+        // Nombres con huella de contenido (enlaces duros de optimize_all_images.py --fingerprint):
+        // si el archivo cambia, cambia la URL
+        source: '/tracks/_immutable/:path*',
+        headers: [
+          {
+            key: 'Cache-Control',
+            value: 'public, max-age=31536000, immutable',
+          },
+        ],
+      },
     ];
   },
 }
@@ -1,135 +1,916 @@
 #!/usr/bin/env python3
 """
 Script para optimizar todas las imágenes en todas las carpetas de tracks
-Ejecuta el script de optimización en cada subcarpeta que contenga imágenes
+Recorre public/tracks una sola vez y reparte el trabajo por archivo
+(optimize_image, optimize_gif, convert_video_to_gif) en un pool de procesos
+del tamaño de la máquina, usando directamente el motor de optimize_images.py
+Al terminar escribe public/tracks/tracks.json, el índice que sirve /api/tracks
 """
 
+import argparse
+import filecmp
+import json
 import os
-import subprocess
+import posixpath
+import re
+import shutil
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-def find_optimize_script():
-    """Busca el script de optimización en las carpetas de tracks"""
-    tracks_dir = Path("public/tracks")
-    if not tracks_dir.exists():
-        print(f"Error: No se encuentra el directorio {tracks_dir}")
-        return None
-    
-    # Buscar el script de optimización
-    optimize_script = tracks_dir / "Boda" / "Boda (2)" / "d - baile" / "optimize_images.py"
-    if optimize_script.exists():
-        return optimize_script
-    
-    # Si no se encuentra, buscar en cualquier subcarpeta
-    for script_path in tracks_dir.rglob("optimize_images.py"):
-        return script_path
-    
+import optimize_images as engine
+from asset_manifest import AssetManifest, asset_url
+from atlas_packer import ATLAS_DIR, ATLAS_MAX_ITEM_BYTES, ATLAS_MAX_SIDE, build_atlases
+from packfiles import PACK_DIR, build_packs
+from fingerprints import (FINGERPRINT_DIR, FINGERPRINT_KINDS, build_fingerprints, detach_fingerprints,
+                          output_paths, recorded_fingerprints, with_immutable)
+from backup_store import BACKUP_STORE_DIR, LEGACY_BACKUP_DIR, BackupStore, read_blob, store_blob
+from media_dedup import find_duplicates, link_duplicates, print_report
+from media_probe import ProbeCache, probe_image
+from media_walker import alternate_names, walk_tracks, work_list
+from optimize_cache import MANIFEST_PATH, OptimizeCache, file_hash, stat_key
+from placeholders import placeholder_from_file
+from tracks_index import TRACKS_INDEX_NAME, write_tracks_index
+
+TRACKS_DIR = Path("public/tracks")
+REBUILD_PREFIX = "_rebuild_"  # Directorios temporales de --rebuild (el recorrido salta los '_')
+
+
+def display_path(path):
+    """Ruta relativa al directorio actual para los mensajes (o absoluta si no se puede)"""
+    try:
+        return path.resolve().relative_to(Path.cwd())
+    except ValueError:
+        return path
+
+
+def resolve_original(path, original, last_output, store_root):
+    """(entrada del original en el almacén, blob recién guardado o None)
+
+    El archivo actual pasa a ser su propio original si el almacén aún no
+    tiene uno, o si no es la última salida registrada del optimizador (alguien
+    lo ha sustituido a mano).
+    """
+    if original is not None and (last_output is None or file_hash(path) == last_output):
+        return original, None
+    blob = store_blob(store_root, path.read_bytes())
+    if original is not None:
+        blob['replaced'] = True
+    return {'hash': blob['hash'], 'name': path.name, 'size': blob['size']}, blob
+
+
+def normalize_target(item, normalize):
+    """Ruta a la que la normalización convierte una imagen, o None si no se convierte"""
+    if item.kind == 'image' and normalize and item.path.suffix.lower() in engine.NORMALIZABLE_EXTENSIONS:
+        return item.path.with_suffix(f'.{normalize}')
     return None
 
-def copy_script_to_dirs(tracks_dir, optimize_script):
-    """Copia el script de optimización a cada carpeta que tenga imágenes"""
-    image_extensions = ['.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG', '.webp', '.WEBP']
-    
-    # Obtener todas las carpetas que contengan imágenes
-    dirs_with_images = set()
-    for ext in image_extensions:
-        for img_path in tracks_dir.rglob(f'*{ext}'):
-            # Excluir backups y el script mismo
-            if '_backup' not in str(img_path) and 'optimize_images.py' not in str(img_path):
-                dirs_with_images.add(img_path.parent)
-    
-    print(f"Encontradas {len(dirs_with_images)} carpetas con imágenes")
-    print("-" * 60)
-    
-    # Copiar script a cada carpeta si no existe
-    import shutil
-    for img_dir in sorted(dirs_with_images):
-        target_script = img_dir / "optimize_images.py"
-        if not target_script.exists():
-            try:
-                rel_dir = img_dir.relative_to(Path.cwd())
-                print(f"Copiando script a: {rel_dir}")
-            except ValueError:
-                print(f"Copiando script a: {img_dir}")
-            shutil.copy2(optimize_script, target_script)
-    
-    return dirs_with_images
-
-def main():
-    tracks_dir = Path("public/tracks")
-    if not tracks_dir.exists():
-        print(f"Error: No se encuentra el directorio {tracks_dir}")
-        return
-    
-    # Buscar el script de optimización
-    optimize_script = find_optimize_script()
-    if not optimize_script:
-        print("Error: No se encontró el script optimize_images.py")
-        print("Asegúrate de que existe en alguna carpeta de tracks")
-        return
-    
+
+def normalize_collisions(tasks, normalize):
+    """{ruta: destino} de las imágenes que la normalización convertiría al mismo archivo
+
+    foo.jpeg y foo.png en la misma carpeta acabarían las dos en foo.webp; en
+    el pool competirían por él, así que no se convierte ninguna.
+    """
+    by_target = {}
+    for item in tasks:
+        target = normalize_target(item, normalize)
+        if target is not None:
+            by_target.setdefault(target, []).append(item.path)
+    return {path: target for target, paths in by_target.items() if len(paths) > 1 for path in paths}
+
+
+def conversion_error(path, target):
+    """Motivo por el que path no puede convertirse en target (en la carpeta de path), o None
+
+    Además de un target que ya existe, un foo.avif junto a otra imagen foo.*
+    pasaría por su versión alternativa (media_walker.alternate_names) y
+    dejaría de listarse.
+    """
+    if target.exists():
+        return f'Ya existe {target.name}, no se convierte'
+    siblings = [sibling.name for sibling in path.parent.iterdir() if sibling != path]
+    if target.name in alternate_names(siblings + [target.name]):
+        return f'{target.name} se confundiría con la versión AVIF de otra imagen de la carpeta, no se convierte'
+    return None
+
+
+def run_engine(kind, path, options, probe=None):
+    """Optimiza un archivo con el motor; las imágenes convertidas sustituyen a su original"""
+    if kind == 'image':
+        output_path, output_format, quality, speed = path, None, engine.QUALITY, engine.AVIF_SPEED
+        normalize = options.get('normalize')
+        if normalize and path.suffix.lower() in engine.NORMALIZABLE_EXTENSIONS:
+            output_path = path.with_suffix(f'.{normalize}')
+            error = conversion_error(path, output_path)
+            if error:
+                return {'success': False, 'error': error}
+            output_format = engine.NORMALIZE_FORMATS[normalize]
+        if output_path.suffix.lower() == '.avif':
+            # Salida principal en AVIF (conversión o .avif del árbol): --avif-quality y --avif-speed
+            primary_avif = options.get('primary_avif') or {}
+            quality = primary_avif.get('quality', engine.AVIF_QUALITY)
+            speed = primary_avif.get('speed', engine.AVIF_SPEED)
+
+        result = engine.optimize_image(path, output_path, engine.MAX_HEIGHT, quality,
+                                       renditions=options.get('renditions', ()),
+                                       target_ssim=options.get('target_ssim'),
+                                       metrics=options.get('metrics', False),
+                                       avif=options.get('avif'),
+                                       output_format=output_format, speed=speed)
+        # El original convertido ya está en el almacén de originales: se quita del
+        # árbol, con las variantes que tuviera con su extensión
+        if result['success'] and output_path != path:
+            path.unlink()
+            engine.prune_renditions(path, [])
+            result['converted_to'] = str(output_path)
+        return result
+    if kind == 'video':
+        video_output = options.get('video_output', 'gif')
+        result = None
+        if video_output in ('gif', 'both'):
+            result = engine.convert_video_to_gif(path, path.with_suffix('.gif'),
+                                                 engine.GIF_DURATION, engine.MAX_GIF_SIZE_KB, probe)
+        if video_output in ('clip', 'both') and (result is None or result['success']):
+            clip = engine.convert_video_to_clip(path, engine.GIF_DURATION, probe=probe)
+            if result is None or not clip['success']:
+                result = clip
+            else:
+                result['clip'] = clip['clip']
+        return result
+    return engine.optimize_gif(path, engine.MAX_GIF_SIZE_KB, metrics=options.get('metrics', False))
+
+
+def relocate(value, scratch, target_dir):
+    """Cambia en un resultado las rutas del directorio temporal por las del árbol"""
+    if isinstance(value, dict):
+        return {key: relocate(item, scratch, target_dir) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(relocate(item, scratch, target_dir) for item in value)
+    if isinstance(value, str) and value.startswith(str(scratch) + os.sep):
+        return str(target_dir / Path(value).relative_to(scratch))
+    return value
+
+
+def rebuild_from_original(kind, path, original, options, probe=None):
+    """Regenera todas las salidas de un archivo desde su original del almacén
+
+    El motor trabaja sobre una copia del original en un directorio temporal
+    junto al archivo (con prefijo '_', el recorrido no entra); después solo se
+    sustituyen en el árbol las salidas cuyo contenido ha cambiado, así que un
+    archivo idéntico conserva su mtime y no aparece en el diff.
+    """
+    store_root = options.get('backup_store', BACKUP_STORE_DIR)
+    with tempfile.TemporaryDirectory(prefix=REBUILD_PREFIX, dir=path.parent) as scratch:
+        scratch = Path(scratch)
+        source = scratch / original['name']
+        source.write_bytes(read_blob(store_root, original['hash']))
+        result = run_engine(kind, source, options, probe)
+        if not result['success']:
+            return result
+
+        # Los videos no se reescriben: el video del árbol ya es el original
+        output = Path(result.get('converted_to', source))
+        target = path.parent / output.name
+        error = conversion_error(path, target) if kind != 'video' and target != path else None
+        if error:
+            return {'success': False, 'error': error}
+        outputs = sorted(p for p in scratch.rglob('*') if p.is_file() and not (kind == 'video' and p == source))
+        written = 0
+        for produced in outputs:
+            destination = path.parent / produced.relative_to(scratch)
+            if destination.exists() and filecmp.cmp(produced, destination, shallow=False):
+                continue
+            destination.parent.mkdir(exist_ok=True)
+            os.replace(produced, destination)
+            written += 1
+        result = relocate(result, scratch, path.parent)
+
+    if kind != 'video':
+        result.pop('converted_to', None)
+        if target != path:
+            path.unlink()
+            engine.prune_renditions(path, [])
+            result['converted_to'] = str(target)
+    result['rebuild'] = {'written': written, 'outputs': len(outputs)}
+    return result
+
+
+def backfill_placeholders(manifest, files, stale):
+    """Calcula el marcador de posición de las imágenes y GIFs que no lo tienen en assets.json
+
+    stale: rutas relativas cuyo marcador ya no vale (GIFs reprocesados en esta
+    ejecución; las imágenes lo traen en su resultado). Los archivos que no se
+    pueden decodificar se anotan con su stat en 'placeholder_failed' y no se
+    reintentan hasta que cambien. Devuelve cuántos se calcularon.
+    """
+    count = 0
+    for item in files:
+        if item.kind not in ('image', 'gif') or not item.path.exists():
+            continue
+        if item.rel not in stale and (manifest.get(item.rel, 'placeholder')
+                                      or manifest.get(item.rel, 'placeholder_failed') == item.stat):
+            continue
+        try:
+            manifest.set(item.rel, 'placeholder', placeholder_from_file(item.path))
+            manifest.set(item.rel, 'placeholder_failed', None)
+            count += 1
+        except (OSError, ValueError):
+            manifest.set(item.rel, 'placeholder_failed', item.stat)
+    return count
+
+
+def split_linked(pending):
+    """Separa de pending los enlaces duros a un archivo que ya está en la lista
+
+    Dos nombres del mismo inodo no se pueden optimizar a la vez (se
+    reescribirían uno encima del otro): se procesa el primero y el resto se
+    devuelve aparte como [(entrada de pending, MediaFile del primero)].
+    """
+    first_by_inode = {}
+    kept, linked = [], []
+    for entry in pending:
+        item = entry[0]
+        stat = os.stat(item.path)
+        inode = (stat.st_dev, stat.st_ino)
+        if stat.st_nlink > 1 and inode in first_by_inode:
+            linked.append((entry, first_by_inode[inode]))
+            continue
+        if stat.st_nlink > 1:
+            first_by_inode[inode] = item
+        kept.append(entry)
+    return kept, linked
+
+
+def rewritable_paths(manifest, item, tracks_dir):
+    """Archivos que el motor puede reescribir en su sitio al procesar item: el propio
+    archivo, sus salidas de assets.json y, en un video, el GIF que genera"""
+    rels = [item.rel]
+    if item.kind == 'video':
+        rels.append(posixpath.splitext(item.rel)[0] + '.gif')
+    paths = []
+    for rel in rels:
+        paths.append(tracks_dir / rel)
+        for section, value in manifest.assets.get(rel, {}).items():
+            if section != 'immutable':
+                paths.extend(output_paths(value, tracks_dir))
+    return paths
+
+
+def process_task(item, cached_hash=None, options=None, probe=None, original=None, last_output=None):
+    """Procesa un archivo en un proceso del pool (función de nivel de módulo para poder serializarla)
+
+    Si se pasa cached_hash y el contenido actual coincide, el archivo ya está
+    optimizado con estos ajustes y se salta sin decodificarlo.
+    options: ajustes de la ejecución ('renditions': alturas de la escalera,
+    'target_ssim': objetivo de la búsqueda de calidad por imagen,
+    'metrics': medir la calidad de imágenes y GIFs frente a su original,
+    'avif': calidad y velocidad del AVIF a generar junto a cada imagen,
+    'normalize': formato al que convertir los JPEG/PNG, 'webp' o 'avif',
+    'primary_avif': calidad y velocidad de las imágenes cuya salida principal
+    es AVIF (conversión a AVIF o .avif del árbol),
+    'video_output': salida de los videos, 'gif', 'clip' o 'both',
+    'rebuild': regenerar las salidas desde el original del almacén).
+    probe: sondeo del video hecho en el proceso principal (media_probe).
+    original: entrada del almacén de originales de este archivo, si la hay;
+    last_output: hash de la última salida registrada en la caché. Si falta el
+    original, o el archivo ya no es esa salida, se guarda antes de tocarlo y
+    se devuelve en result['backup'] para que el proceso principal lo registre.
+    """
+    options = options or {}
+    kind, path = item.kind, item.path
+    if cached_hash is not None:
+        try:
+            if file_hash(path) == cached_hash:
+                return {'success': True, 'skipped': True,
+                        'cache': {'hash': cached_hash, 'stat': stat_key(path)}}
+        except OSError:
+            pass
+
+    try:
+        original, backup = resolve_original(path, original, last_output,
+                                            options.get('backup_store', BACKUP_STORE_DIR))
+    except OSError as e:
+        return {'success': False, 'error': f'No se pudo hacer backup: {e}'}
+
+    # Una conversión de un archivo ya optimizado (reducido a MAX_HEIGHT) parte
+    # del original del almacén, o perdería las variantes más altas
+    from_original = options.get('rebuild') or (backup is None and
+                                               normalize_target(item, options.get('normalize')) is not None)
+    if from_original:
+        result = rebuild_from_original(kind, path, original, options, probe)
+    else:
+        result = run_engine(kind, path, options, probe)
+    if result.get('converted_to'):
+        path = Path(result['converted_to'])
+
+    # Imágenes y GIFs se reescriben en su sitio, así que se guarda el hash del
+    # resultado; de los videos se guarda el del original (el GIF va aparte).
+    # La salida viene del original si se ha reconstruido o si se acaba de guardar
+    if result['success']:
+        result['cache'] = {'hash': file_hash(path), 'stat': stat_key(path)}
+        if from_original or backup is not None:
+            result['cache']['original'] = original['hash']
+    if backup is not None:
+        result['backup'] = backup
+    return result
+
+
+def describe_metrics(metrics):
+    """' [SSIM x, MS-SSIM y, PSNR z dB]' o '' si no se midió"""
+    if not metrics:
+        return ''
+    if 'error' in metrics:
+        return f" [métricas: {metrics['error']}]"
+    text = f" [SSIM {metrics['ssim']:.4f}, MS-SSIM {metrics['ms_ssim']:.4f}, PSNR {metrics['psnr']:.1f}dB"
+    if 'frames' in metrics:
+        text += (f", {metrics['frames']}/{metrics['reference_frames']} fotogramas, "
+                 f"SSIM mín. {metrics['ssim_min']:.4f}")
+    return text + ']'
+
+
+def describe_gif_search(result):
+    """' [800px, 15fps, 256 colores, lossy 0; 9 pruebas]' o '' si no hubo búsqueda"""
+    search = result.get('gif_search')
+    if not search:
+        return ''
+    text = f" [{search['width']}px, {search['fps']:g}fps"
+    motion = result.get('motion')
+    if motion:
+        text += f" (movimiento: {motion['needed_fps']:g}fps, {motion['still_frames']} fotogramas repetidos)"
+    text += f", {search['colors']} colores, lossy {search['lossy']}; {search['trials']} pruebas"
+    if not search['within_limit']:
+        text += ", no cabe en el límite"
+    return text + ']'
+
+
+def describe_rebuild(result):
+    """' [desde el original: 1 de 3 archivos reescritos]' o '' si no se reconstruyó"""
+    rebuild = result.get('rebuild')
+    if not rebuild:
+        return ''
+    return f" [desde el original: {rebuild['written']} de {rebuild['outputs']} archivos reescritos]"
+
+
+def describe_result(kind, result):
+    """Texto de una línea con el resultado de un archivo"""
+    if not result['success']:
+        return f"ERROR: {result['error']}"
+    return describe_outcome(kind, result) + describe_metrics(result.get('metrics')) + describe_rebuild(result)
+
+
+def describe_outcome(kind, result):
+    """Resumen de lo que se hizo con un archivo"""
+    if kind == 'image':
+        reduction_mb = (result['original_size'] - result['new_size']) / (1024 * 1024)
+        text = (f"OK - {reduction_mb:.2f}MB reducido "
+                f"({result['original_dimensions'][0]}x{result['original_dimensions'][1]} -> "
+                f"{result['new_dimensions'][0]}x{result['new_dimensions'][1]})")
+        if result.get('animated'):
+            text += f" animado, {result['frames']} fotogramas"
+        search = result.get('quality_search')
+        if search:
+            text += (f" calidad {search['quality']} (SSIM {search['ssim']:.4f}, "
+                     f"{search['quality_trials']} pruebas, {search['bytes_saved'] / 1024:.1f}KB ahorrados)")
+        if result.get('avif'):
+            text += f" + AVIF {result['avif']['bytes'] / 1024:.1f}KB"
+        if result.get('renditions'):
+            text += f" + variantes {'/'.join(str(r['height']) for r in result['renditions'])}px"
+        if result.get('converted_to'):
+            text += f" -> convertido a {Path(result['converted_to']).name}"
+        return text
+    if kind == 'video':
+        outputs = []
+        if 'gif_size_kb' in result:
+            outputs.append(f"GIF creado: {result['gif_size_kb']:.1f}KB{describe_gif_search(result)}")
+        clip = result.get('clip')
+        if clip:
+            outputs.append(f"clip MP4 {clip['mp4']['bytes'] / 1024:.1f}KB, WebM {clip['webm']['bytes'] / 1024:.1f}KB, "
+                           f"póster {clip['poster']['bytes'] / 1024:.1f}KB")
+        return (f"OK - {', '.join(outputs)} "
+                f"(duración: {result['duration']:.1f}s desde {result['start_time']:.1f}s)")
+    if result.get('optimized', False):
+        reduction_kb = (result['original_size'] - result['new_size']) / 1024
+        return f"OK - {reduction_kb:.1f}KB reducido ({result['gif_size_kb']:.1f}KB final){describe_gif_search(result)}"
+    return f"OK - {result.get('message', 'Ya optimizado')} ({result['gif_size_kb']:.1f}KB)"
+
+
+def output_entry(manifest, output, image=True):
+    """{'path', 'url', 'bytes'} de un archivo generado, relativo a la carpeta de tracks
+
+    Las imágenes llevan además width, height, format, animated y frames de su cabecera.
+    """
+    rel = manifest.rel_path(output['path'])
+    entry = {'path': rel, 'url': asset_url(rel), 'bytes': output['bytes']}
+    if image:
+        entry.update(probe_image(output['path']) or {})
+    return entry
+
+
+def rendition_entries(manifest, renditions):
+    """Variantes de un resultado tal y como se guardan en assets.json"""
+    entries = []
+    for rendition in renditions:
+        entry = dict(output_entry(manifest, rendition), height=rendition['height'], width=rendition['width'])
+        if rendition.get('avif'):
+            entry['avif'] = output_entry(manifest, rendition['avif'])
+        entries.append(entry)
+    return entries
+
+
+def format_entries(manifest, path, result):
+    """Formatos disponibles de una imagen para negociar con el cliente (Accept: image/avif)
+
+    Solo se registran si hay alternativa a la salida principal.
+    """
+    if not result.get('avif'):
+        return None
+    return {
+        Path(path).suffix.lower().lstrip('.'): output_entry(manifest, {'path': path,
+                                                                       'bytes': result['new_size']}),
+        'avif': output_entry(manifest, result['avif']),
+    }
+
+
+def clip_entry(manifest, clip):
+    """Clip en bucle de un video (MP4, WebM y póster) tal y como se guarda en assets.json"""
+    if not clip:
+        return None
+    entry = {name: output_entry(manifest, clip[name]) for name in ('mp4', 'webm', 'poster')}
+    entry.update(width=clip['width'], height=clip['height'], duration=clip['duration'])
+    return entry
+
+
+def shared_entries(manifest, located, field, image=True):
+    """{ruta relativa: entrada} de un atlas o paquete tal y como se guarda en assets.json
+
+    located[rel][field] es la ruta del archivo compartido (hoja o paquete),
+    que se sustituye por su output_entry.
+    """
+    shared = {}
+    entries = {}
+    for rel, location in located.items():
+        path = location[field]
+        if path not in shared:
+            shared[path] = output_entry(manifest, {'path': path, 'bytes': os.path.getsize(path)}, image)
+        entries[rel] = dict(location, **{field: shared[path]})
+    return entries
+
+
+def reference_patterns(old_rel, new_rel, guion_rel):
+    """[(regex, reemplazo)] de las referencias a old_rel que puede contener un guion
+
+    La URL y la ruta relativa completas (no como parte de un nombre más
+    largo) y, entre comillas, el nombre del archivo solo o tras una ruta que
+    lleve a su carpeta desde la del guion.
+    """
+    folder, old_name = posixpath.split(old_rel)
+    new_name = posixpath.basename(new_rel)
+    guion_folder = posixpath.dirname(guion_rel)
+    prefixes = {folder + '/', posixpath.relpath(folder, guion_folder) + '/'}
+    if folder == guion_folder:
+        prefixes.update(('', './'))
+
+    def quoted(match):
+        prefix = match[2]
+        if prefix in prefixes or prefix.endswith('/' + folder + '/'):
+            return f"{match[1]}{prefix}{new_name}{match[1]}"
+        return match[0]
+
+    return [
+        (re.compile(rf"(?<![\w.\-/]){re.escape(asset_url(old_rel))}(?![\w\-]|\.\w)"),
+         lambda match: asset_url(new_rel)),
+        (re.compile(rf"(?<![\w.\-/]){re.escape(old_rel)}(?![\w\-]|\.\w)"), lambda match: new_rel),
+        (re.compile(rf"(['\"`])([^'\"`\n]*?){re.escape(old_name)}\1"), quoted),
+    ]
+
+
+def rewrite_references(files, renames):
+    """Actualiza en los guion.js las referencias a imágenes renombradas por la normalización
+
+    Solo se tocan los guiones del mismo track y solo referencias completas
+    (ver reference_patterns): al renombrar 1.jpeg no cambian 11.jpeg, a1.jpeg
+    ni un 1.jpeg de otra carpeta. Devuelve la lista de guiones modificados.
+    """
+    if not renames:
+        return []
+    changed = []
+    for guion in (f for f in files if f.kind == 'guion'):
+        track = guion.rel.split('/', 1)[0]
+        patterns = [pattern for old_rel, new_rel in renames.items() if old_rel.split('/', 1)[0] == track
+                    for pattern in reference_patterns(old_rel, new_rel, guion.rel)]
+        if not patterns:
+            continue
+        text = guion.path.read_text(encoding='utf-8')
+        new_text = text
+        for pattern, replacement in patterns:
+            new_text = pattern.sub(replacement, new_text)
+        if new_text != text:
+            guion.path.write_text(new_text, encoding='utf-8')
+            changed.append(guion.path)
+    return changed
+
+
+def write_report(path, report):
+    """Informe JSON por archivo (tamaños, dimensiones, calidad elegida, métricas...)"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(report.items())), f, indent=1, ensure_ascii=False, default=str)
+
+
+def parse_heights(value):
+    """'300,600,1200' -> (300, 600, 1200)"""
     try:
-        rel_path = optimize_script.relative_to(Path.cwd())
-        print(f"Script de optimización encontrado en: {rel_path}")
+        return tuple(sorted({int(h) for h in value.split(',') if h.strip()}))
     except ValueError:
-        print(f"Script de optimización encontrado en: {optimize_script}")
-    print("-" * 60)
-    
-    # Copiar script a todas las carpetas con imágenes
-    dirs_with_images = copy_script_to_dirs(tracks_dir, optimize_script)
-    
-    if not dirs_with_images:
-        print("No se encontraron carpetas con imágenes para optimizar.")
-        return
-    
+        raise argparse.ArgumentTypeError(f"Alturas no válidas: {value}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Optimiza todas las imágenes, videos y GIFs de public/tracks")
+    parser.add_argument('tracks_dir', nargs='?', default=str(TRACKS_DIR),
+                        help=f"Carpeta raíz de los tracks (por defecto {TRACKS_DIR})")
+    parser.add_argument('--only', metavar='CARPETA',
+                        help="Procesa solo esta carpeta (relativa a tracks_dir) y sus subcarpetas; tracks.json, "
+                             "assets.json y las etapas de todo el árbol (atlas, paquetes, huellas) siguen siendo "
+                             "los de tracks_dir")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Número de procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument('--cache', default=str(MANIFEST_PATH),
+                        help=f"Manifest de la caché incremental (por defecto {MANIFEST_PATH})")
+    parser.add_argument('--force', action='store_true',
+                        help="Ignora la caché y vuelve a procesar todos los archivos")
+    parser.add_argument('--renditions', type=parse_heights, nargs='?', default=(),
+                        const=engine.RENDITION_HEIGHTS, metavar='ALTURAS',
+                        help="Genera además una escalera de variantes para srcset desde una sola "
+                             "decodificación (por defecto "
+                             f"{','.join(map(str, engine.RENDITION_HEIGHTS))}) y la registra en assets.json")
+    parser.add_argument('--target-ssim', type=float, nargs='?', default=None,
+                        const=engine.TARGET_SSIM, metavar='SSIM',
+                        help="Busca por imagen la menor calidad JPEG/WEBP que alcanza este SSIM "
+                             f"(por defecto {engine.TARGET_SSIM}) en vez de usar calidad {engine.QUALITY} fija")
+    parser.add_argument('--avif', action='store_true',
+                        help="Genera también una versión AVIF de cada imagen y variante y la registra en assets.json")
+    parser.add_argument('--avif-quality', type=int, default=engine.AVIF_QUALITY,
+                        help=f"Calidad AVIF, de --avif y de las imágenes AVIF (por defecto {engine.AVIF_QUALITY})")
+    parser.add_argument('--avif-speed', type=int, default=engine.AVIF_SPEED,
+                        help=f"Velocidad del codificador AVIF, 0-10 (por defecto {engine.AVIF_SPEED}; "
+                             "8-10 para CI, 2-4 para release)")
+    parser.add_argument('--normalize', nargs='?', default=None, const=engine.PRIMARY_FORMAT,
+                        choices=sorted(engine.NORMALIZE_FORMATS), metavar='FORMATO',
+                        help="Convierte los JPEG/PNG al formato principal del sitio "
+                             f"(por defecto {engine.PRIMARY_FORMAT}; webp o avif). El original queda "
+                             "en el almacén de originales y se actualizan las referencias en los guiones")
+    parser.add_argument('--video-output', default='gif', choices=engine.VIDEO_OUTPUTS,
+                        help="Salida de los videos: gif (por defecto), clip (MP4 y WebM sin audio en bucle "
+                             f"más un póster WebP, en {engine.CLIPS_DIR}/ y registrados en assets.json) o both")
+    parser.add_argument('--backup-store', default=str(BACKUP_STORE_DIR),
+                        help="Almacén de originales, deduplicado por contenido y fuera de public/ "
+                             f"(por defecto {BACKUP_STORE_DIR})")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Regenera todas las salidas desde el original del almacén (nunca desde una "
+                             "salida anterior) y solo reescribe los archivos cuyo contenido cambia")
+    parser.add_argument('--dedup', nargs='?', default=None, const='report', choices=('report', 'link'),
+                        help="Busca duplicados exactos y perceptuales (dHash/pHash) antes de optimizar y "
+                             "marca las copias exactas en assets.json; con 'link' las sustituye por enlaces "
+                             "duros para optimizarlas y guardarlas una sola vez")
+    parser.add_argument('--atlas', action='store_true',
+                        help=f"Empaqueta las imágenes estáticas de menos de {ATLAS_MAX_ITEM_BYTES // 1024}KB de "
+                             f"cada carpeta en hojas WebP de hasta {ATLAS_MAX_SIDE}px (en {ATLAS_DIR}/) y "
+                             "registra la hoja y el rectángulo de cada una en assets.json (las carpetas "
+                             "cuyas hojas ocuparían más que sus imágenes se quedan sin atlas)")
+    parser.add_argument('--pack', action='store_true',
+                        help="Concatena las imágenes y GIFs optimizados de cada track y subcarpeta en un "
+                             f"paquete (en {PACK_DIR}/) para pedirlos con Range o de una vez, y registra el "
+                             "desplazamiento y la longitud de cada uno en assets.json")
+    parser.add_argument('--fingerprint', action=argparse.BooleanOptionalAction, default=None,
+                        help=f"Publica cada archivo y cada salida también como {FINGERPRINT_DIR}/<hash>.<ext> "
+                             "(un enlace duro) para servirlos con caché inmutable, y registra esos nombres en "
+                             f"assets.json. Una vez creada {FINGERPRINT_DIR}/ se mantiene en cada ejecución; "
+                             f"--no-fingerprint borra {FINGERPRINT_DIR}/ y sus nombres de assets.json")
+    parser.add_argument('--metrics', action='store_true',
+                        help="Mide SSIM, MS-SSIM y PSNR de cada imagen y GIF optimizado")
+    parser.add_argument('--report', metavar='JSON',
+                        help="Guarda el resultado de cada archivo procesado en este JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tracks_dir = Path(args.tracks_dir)
+    if not tracks_dir.exists():
+        print(f"Error: No se encuentra el directorio {tracks_dir}")
+        return 1
+    only = Path(args.only).as_posix() if args.only and Path(args.only) != Path('.') else None
+    if only is not None and not (tracks_dir / only).is_dir():
+        print(f"Error: No se encuentra la carpeta {only} dentro de {tracks_dir}")
+        return 1
+
+    def selected(files):
+        """Archivos a optimizar del recorrido, limitados a la carpeta de --only"""
+        return [item for item in work_list(files) if only is None or item.rel.startswith(only + '/')]
+
+    files = walk_tracks(tracks_dir)
+
+    # Los originales van al almacén; las carpetas _backup_original antiguas se trasladan allí
+    store = BackupStore.load(args.backup_store)
+    legacy = store.import_legacy(files.skipped_dirs.get(LEGACY_BACKUP_DIR, []))
+    if legacy:
+        print(f"Backups antiguos trasladados a {display_path(store.root)}: {legacy} archivos")
+
+    tasks = selected(files)
+    if not tasks:
+        print("No se encontraron archivos para optimizar.")
+        write_tracks_index(tracks_dir, files)
+        return 0
+
+    # Camino rápido: descartar por stat los archivos que no han cambiado
+    cache = OptimizeCache.load(args.cache)
+    manifest = AssetManifest.load(tracks_dir)
+    removed = manifest.prune(f.rel for f in files)
+    if removed:
+        # Las salidas borradas (p. ej. un .avif sin original) no cuentan como archivos del árbol
+        print(f"Salidas de archivos que ya no existen borradas: {removed}")
+        files = walk_tracks(tracks_dir)
+        tasks = selected(files)
+
+    if args.fingerprint is False and (tracks_dir / FINGERPRINT_DIR).exists():
+        shutil.rmtree(tracks_dir / FINGERPRINT_DIR)
+        for rel in list(manifest.assets):
+            for section, value in list(manifest.assets[rel].items()):
+                if section != 'immutable':
+                    manifest.set(rel, section, with_immutable(value, lambda _: None))
+            manifest.set(rel, 'immutable', None)
+        print(f"Nombres con huella borrados ({FINGERPRINT_DIR}/ y assets.json)")
+        files = walk_tracks(tracks_dir)
+        tasks = selected(files)
+    fingerprint = args.fingerprint or (args.fingerprint is None and (tracks_dir / FINGERPRINT_DIR).exists())
+
+    if args.dedup:
+        duplicates = find_duplicates(tasks)
+        print_report(duplicates)
+        if args.dedup == 'link':
+            linked_files, freed = link_duplicates(duplicates['exact'])
+            print(f"Enlazados: {linked_files} archivos ({freed / (1024 * 1024):.2f} MB liberados)")
+            # Las copias enlazadas tienen ahora el stat del primero
+            files = walk_tracks(tracks_dir)
+            tasks = selected(files)
+        # El front-end puede reutilizar la URL del primero en vez de descargar la copia
+        duplicate_of = {item.rel: group[0].rel for group in duplicates['exact'] for item in group[1:]}
+        for item in tasks:
+            manifest.set(item.rel, 'duplicate_of', duplicate_of.get(item.rel))
+        print("-" * 60)
+    avif = None
+    if args.avif:
+        if engine.avif_supported():
+            avif = {'quality': args.avif_quality, 'speed': args.avif_speed}
+        else:
+            print("Aviso: esta instalación de Pillow no codifica AVIF "
+                  "(actualiza Pillow o instala pillow-avif-plugin); se omite --avif")
+    if args.normalize == 'avif' and not engine.avif_supported():
+        print("Error: esta instalación de Pillow no codifica AVIF, no se puede usar --normalize avif")
+        return 1
+    # --avif-quality y --avif-speed también se aplican a las imágenes AVIF (convertidas o no), aunque no se pida --avif
+    primary_avif = {'quality': args.avif_quality, 'speed': args.avif_speed}
+    options = {'renditions': args.renditions, 'target_ssim': args.target_ssim, 'metrics': args.metrics,
+               'avif': avif, 'normalize': args.normalize, 'video_output': args.video_output,
+               'primary_avif': primary_avif,
+               'backup_store': str(store.root), 'rebuild': args.rebuild}
+
+    def settings_for(kind, path):
+        return engine.encoder_settings(kind, path, args.renditions, args.target_ssim, avif, args.normalize,
+                                       args.video_output, primary_avif)
+
+    collisions = normalize_collisions(tasks, args.normalize)
+    pending = []
+    unchanged = 0
+    for item in tasks:
+        if item.path in collisions:
+            continue
+        key = cache.key_for(item.path)
+        settings = settings_for(item.kind, item.path)
+        entry = None if args.force else cache.lookup(key, settings)
+        if args.rebuild and entry is not None:
+            # Solo cuenta como hecha si se derivó del original que hay ahora en el almacén
+            original = store.get(store.key_for(item.path))
+            if original is None or entry.get('original') != original['hash']:
+                entry = None
+        if entry is not None and cache.is_unchanged(key, item.stat, settings):
+            unchanged += 1
+            continue
+        pending.append((item, key, settings, entry['hash'] if entry else None))
+    pending, linked = split_linked(pending)
+    if fingerprint and pending:
+        # Los motores reescriben en su sitio: las URLs inmutables no deben cambiar con ellos
+        detach_fingerprints([path for item, _, _, _ in pending
+                             for path in rewritable_paths(manifest, item, tracks_dir)],
+                            recorded_fingerprints(manifest.assets, tracks_dir))
+
+    counts = {kind: sum(1 for item in tasks if item.kind == kind) for kind in ('image', 'video', 'gif')}
+    jobs = max(1, args.jobs)
+
+    # Un solo ffprobe por video pendiente (y ninguno si ese contenido ya se sondeó)
+    probe_cache = ProbeCache.load(Path(args.cache).with_name('probes.json'))
+    videos = [item for item, _, _, _ in pending if item.kind == 'video']
+    probes, probes_launched = probe_cache.probe_all(videos, cache.key_for)
+    probe_cache.save()
+
+    print(f"Encontrados en {display_path(tracks_dir / only if only else tracks_dir)}:")
+    print(f"  - {counts['image']} imágenes")
+    print(f"  - {counts['video']} videos")
+    print(f"  - {counts['gif']} GIFs")
+    print(f"Altura máxima imágenes: {engine.MAX_HEIGHT}px (ancho proporcional), Calidad JPEG: {engine.QUALITY}")
+    print(f"GIFs: máximo {engine.MAX_GIF_SIZE_KB}KB, duración: {engine.GIF_DURATION}s (parte central)")
+    if args.video_output != 'gif':
+        print(f"Clips de video: MP4 (CRF {engine.CLIP_H264_CRF}) y WebM (CRF {engine.CLIP_VP9_CRF}) "
+              f"hasta {engine.CLIP_MAX_WIDTH}px de ancho, en {engine.CLIPS_DIR}/")
+    if args.rebuild:
+        print(f"Reconstrucción desde los originales de {display_path(store.root)}")
+    if args.target_ssim is not None:
+        print(f"Calidad por imagen: objetivo SSIM {args.target_ssim} "
+              f"(entre {engine.QUALITY_SEARCH_MIN} y {engine.QUALITY_SEARCH_MAX})")
+    if avif:
+        print(f"AVIF: calidad {avif['quality']}, velocidad {avif['speed']}")
+    if args.renditions:
+        print(f"Variantes: {', '.join(map(str, args.renditions))}px (en {engine.RENDITIONS_DIR}/)")
+    print(f"Procesos en paralelo: {jobs}")
+    if videos:
+        print(f"Videos sondeados: {len(videos) - probes_launched} desde caché, {probes_launched} con ffprobe")
+    print(f"Sin cambios desde la última ejecución: {unchanged}, pendientes: {len(pending)}")
+    if linked:
+        print(f"Enlaces duros a archivos pendientes (se optimizan una vez): {len(linked)}")
     print("-" * 60)
-    print("Ejecutando optimización en cada carpeta...")
+    for path, target in sorted(collisions.items()):
+        print(f"{display_path(path)}: ERROR: otra imagen de la carpeta también se convertiría "
+              f"en {target.name}, no se convierte")
+
+    total_original_size = 0
+    total_new_size = 0
+    successful = 0
+    failed = len(collisions)
+    skipped = unchanged
+    search_saved = 0
+    report = {}
+    renames = {}
+    outputs = {}  # Hash de la salida de cada archivo procesado, para sus enlaces duros
+    stale = set()  # GIFs reprocesados: su marcador de posición se vuelve a calcular
+
+    try:
+        if pending:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as executor:
+                futures = {executor.submit(process_task, item, cached_hash, options, probes.get(item.path),
+                                           store.get(store.key_for(item.path)), cache.last_hash(key)):
+                           (item, key, settings)
+                           for item, key, settings, cached_hash in pending}
+                for future in as_completed(futures):
+                    item, key, settings = futures[future]
+                    kind, path = item.kind, item.path
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {'success': False, 'error': str(e)}
+
+                    if result.get('backup'):
+                        store.record(store.key_for(item.path), item.path.name, result['backup'],
+                                     replace=result['backup'].get('replaced', False))
+
+                    rel = item.rel
+                    if result.get('converted_to'):
+                        # A partir de aquí el asset es el archivo convertido
+                        cache.forget(key)
+                        path = Path(result['converted_to'])
+                        rel = manifest.rel_path(path)
+                        key = cache.key_for(path)
+                        settings = settings_for(kind, path)
+                        manifest.move(item.rel, rel)
+                        store.move(store.key_for(item.path), store.key_for(path))
+                        renames[item.rel] = rel
+
+                    if result['success']:
+                        cache.record(key, settings, result['cache']['hash'], result['cache']['stat'],
+                                     result['cache'].get('original'))
+                        outputs[path] = result['cache']['hash']
+                        if result.get('skipped'):
+                            pass  # Mismo contenido (solo cambió el mtime): sus salidas siguen valiendo
+                        elif kind == 'image':
+                            manifest.set(rel, 'renditions', rendition_entries(manifest, result['renditions']))
+                            manifest.set(rel, 'formats', format_entries(manifest, path, result))
+                            manifest.set(rel, 'placeholder', result.get('placeholder'))
+                            manifest.set(rel, 'quality', result.get('quality'))
+                        elif kind == 'gif' and result.get('optimized'):
+                            stale.add(rel)
+                        elif kind == 'video':
+                            manifest.set(rel, 'clip', clip_entry(manifest, result.get('clip')))
+                    else:
+                        cache.forget(key)
+
+                    if result.get('skipped', False):
+                        skipped += 1
+                        continue
+
+                    report[item.rel] = dict(result, kind=kind)
+
+                    print(f"{display_path(item.path)}: {describe_result(kind, result)}")
+
+                    if not result['success']:
+                        failed += 1
+                    elif kind != 'gif' or result.get('optimized', False):
+                        successful += 1
+                        total_original_size += result['original_size']
+                        total_new_size += result['new_size']
+                        if result.get('quality_search'):
+                            search_saved += result['quality_search']['bytes_saved']
+
+            # Los enlaces duros ya tienen la salida del primero, salvo que se haya
+            # separado de él (conversión o --rebuild): entonces esperan a la próxima ejecución
+            for (item, key, settings, _), first in linked:
+                content_hash = outputs.get(first.path)
+                if content_hash is None or file_hash(item.path) != content_hash:
+                    continue
+                cache.record(key, settings, content_hash, stat_key(item.path))
+                original = store.get(store.key_for(first.path))
+                if original is not None:
+                    store.record(store.key_for(item.path), item.path.name, original)
+                skipped += 1
+    finally:
+        # Guardar lo procesado aunque se interrumpa la ejecución
+        for guion in rewrite_references(files, renames):
+            print(f"Referencias actualizadas en: {display_path(guion)}")
+        cache.save()
+        manifest.save()
+        store.save()
+        if args.report:
+            write_report(args.report, report)
+
+    # Últimas etapas, sobre los nombres ya convertidos: marcadores de posición
+    # que falten, atlas, paquetes y nombres con huella (si se piden) y el índice
+    # que sirve /api/tracks
+    files = walk_tracks(tracks_dir)
+    backfilled = backfill_placeholders(manifest, files, stale)
+    if backfilled:
+        print(f"Marcadores de posición calculados: {backfilled}")
+    if args.atlas:
+        atlases, generated, reused, larger = build_atlases(
+            files, tracks_dir, lambda rel: manifest.get(rel, 'quality'))
+        entries = shared_entries(manifest, atlases, 'sheet')
+        for item in work_list(files, ('image',)):
+            manifest.set(item.rel, 'atlas', entries.get(item.rel))
+        print(f"Atlas: {len(atlases)} imágenes en {generated + reused} hojas "
+              f"({generated} generadas, {reused} sin cambios)")
+        if larger:
+            print(f"  Carpetas sin atlas (las hojas ocupaban más que sus imágenes): {larger}")
+    if args.pack:
+        packs, written, reused = build_packs(files, tracks_dir)
+        entries = shared_entries(manifest, packs, 'pack', image=False)
+        for item in work_list(files, ('image', 'gif')):
+            manifest.set(item.rel, 'pack', entries.get(item.rel))
+        print(f"Paquetes: {len(packs)} archivos en {written + reused} paquetes "
+              f"({written} escritos, {reused} sin cambios)")
+    if fingerprint:
+        sources = {item.rel: item.path for item in work_list(files, FINGERPRINT_KINDS)}
+        generated = [path for entry in manifest.assets.values() for section, value in entry.items()
+                     if section != 'immutable' for path in output_paths(value, tracks_dir)]
+        fingerprints, linked_names, reused = build_fingerprints(
+            list(sources.values()) + [path for path in generated if path.exists()], files, tracks_dir,
+            recorded_fingerprints(manifest.assets, tracks_dir))
+
+        def immutable_of(rel):
+            target = fingerprints.get(tracks_dir / rel)
+            if target is None:
+                return None
+            target_rel = f"{FINGERPRINT_DIR}/{target.name}"
+            return {'path': target_rel, 'url': asset_url(target_rel), 'stat': stat_key(tracks_dir / rel)}
+
+        for rel in list(manifest.assets):
+            for section, value in list(manifest.assets[rel].items()):
+                if section != 'immutable':
+                    manifest.set(rel, section, with_immutable(value, immutable_of))
+        for rel in sources:
+            manifest.set(rel, 'immutable', immutable_of(rel))
+        print(f"Nombres con huella: {len(fingerprints)} archivos ({linked_names} enlazados, {reused} sin cambios)")
+    manifest.save()
+    if write_tracks_index(tracks_dir, files):
+        print(f"Índice de tracks actualizado: {display_path(tracks_dir / TRACKS_INDEX_NAME)}")
+
     print("-" * 60)
-    
-    # Ejecutar el script en cada carpeta
-    successful_dirs = 0
-    failed_dirs = 0
-    
-    for img_dir in sorted(dirs_with_images):
-        script_path = img_dir / "optimize_images.py"
-        if script_path.exists():
-            print(f"\n{'='*60}")
-            try:
-                rel_dir = img_dir.relative_to(Path.cwd())
-                print(f"Procesando: {rel_dir}")
-            except ValueError:
-                print(f"Procesando: {img_dir}")
-            print(f"{'='*60}")
-            
-            try:
-                # Cambiar al directorio y ejecutar el script
-                # Usar path absoluto para evitar problemas
-                abs_script_path = script_path.resolve()
-                abs_img_dir = img_dir.resolve()
-                
-                result = subprocess.run(
-                    [sys.executable, str(abs_script_path)],
-                    cwd=str(abs_img_dir),
-                    capture_output=False,
-                    text=True
-                )
-                
-                if result.returncode == 0:
-                    successful_dirs += 1
-                else:
-                    failed_dirs += 1
-                    print(f"Error ejecutando script en {img_dir}")
-            except Exception as e:
-                failed_dirs += 1
-                print(f"Error ejecutando script en {img_dir}: {e}")
-    
-    print("\n" + "=" * 60)
-    print("Resumen:")
-    print(f"  Carpetas procesadas exitosamente: {successful_dirs}")
-    print(f"  Carpetas con errores: {failed_dirs}")
-    print("=" * 60)
+    print(f"Proceso completado:")
+    print(f"  Exitosas: {successful}")
+    print(f"  Fallidas: {failed}")
+    print(f"  Saltadas (sin cambios): {skipped}")
+    if successful > 0:
+        total_reduction = ((total_original_size - total_new_size) / total_original_size) * 100 if total_original_size > 0 else 0
+        total_reduction_mb = (total_original_size - total_new_size) / (1024 * 1024)
+        print(f"  Tamaño original: {total_original_size / (1024 * 1024):.2f} MB")
+        print(f"  Tamaño optimizado: {total_new_size / (1024 * 1024):.2f} MB")
+        print(f"  Reducción total: {total_reduction_mb:.2f} MB ({total_reduction:.1f}%)")
+        if args.target_ssim is not None:
+            print(f"  Ahorro de la búsqueda de calidad frente a calidad {engine.QUALITY}: "
+                  f"{search_saved / (1024 * 1024):.2f} MB")
+    originals, objects, stored_bytes = store.stats()
+    print(f"\nOriginales guardados en {display_path(store.root)}: {originals} archivos, "
+          f"{objects} distintos ({stored_bytes / (1024 * 1024):.2f} MB en disco)")
+    return 1 if failed else 0
 
-if __name__ == '__main__':
-    main()
 
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Caché incremental del optimizador
+Guarda, por cada archivo ya optimizado, el hash de su contenido, su tamaño y
+mtime, y los ajustes del codificador con los que se generó. En la siguiente
+ejecución los archivos cuyo stat y ajustes no han cambiado se saltan sin
+abrirlos; si solo cambió el stat (p. ej. un checkout), se compara el hash.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+from json_store import load_versioned, save_versioned
+
+CACHE_DIR = Path(".optimize_cache")
+MANIFEST_PATH = CACHE_DIR / "manifest.json"
+CACHE_VERSION = 1  # Cambiar si cambia el formato del manifest
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 del contenido de un archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stat_key(path):
+    """(tamaño, mtime en ns) de un archivo: lo único que se mira en el camino rápido"""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+class OptimizeCache:
+    """Manifest persistente {ruta relativa: entrada} de archivos ya optimizados"""
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = Path(path)
+        # Las claves son rutas relativas a la carpeta que contiene .optimize_cache,
+        # así una misma caché sirve para todo el árbol o para una sola subcarpeta
+        self.base = self.path.resolve().parent.parent
+        self.entries = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path=MANIFEST_PATH):
+        """Carga el manifest; si no existe o es de otra versión, empieza vacío"""
+        cache = cls(path)
+        cache.entries = load_versioned(cache.path, CACHE_VERSION).get('entries', {})
+        return cache
+
+    def save(self):
+        if self.dirty:
+            save_versioned(self.path, CACHE_VERSION, {'entries': self.entries})
+            self.dirty = False
+
+    def key_for(self, path):
+        """Clave estable de un archivo dentro del manifest"""
+        return Path(os.path.relpath(Path(path).resolve(), self.base)).as_posix()
+
+    def lookup(self, key, settings):
+        """Entrada de un archivo si se generó con los mismos ajustes, o None"""
+        entry = self.entries.get(key)
+        if entry is None or entry.get('settings') != settings:
+            return None
+        return entry
+
+    def is_unchanged(self, key, stat, settings):
+        """Camino rápido O(stat): mismos ajustes y mismo [tamaño, mtime] que la última vez"""
+        entry = self.lookup(key, settings)
+        return entry is not None and entry['stat'] == list(stat)
+
+    def last_hash(self, key):
+        """Hash de la última salida registrada de un archivo, con cualquier ajuste (o None)"""
+        entry = self.entries.get(key)
+        return entry['hash'] if entry else None
+
+    def record(self, key, settings, content_hash, stat, original=None):
+        """Registra un archivo como optimizado
+
+        original: hash del original del almacén del que se derivó la salida,
+        si se generó desde él (y no desde una salida anterior).
+        """
+        self.entries[key] = {'settings': settings, 'hash': content_hash, 'stat': stat}
+        if original is not None:
+            self.entries[key]['original'] = original
+        self.dirty = True
+
+    def forget(self, key):
+        if self.entries.pop(key, None) is not None:
+            self.dirty = True
@@ -0,0 +1,796 @@
+#!/usr/bin/env python3
+"""
+Script para optimizar imágenes, videos y GIFs
+- Optimiza imágenes reduciendo tamaño manteniendo alta calidad
+- Convierte videos a GIFs optimizados (2 segundos de la parte central, máximo 300KB)
+  o a clips MP4/WebM en bucle con póster WebP
+- Optimiza GIFs existentes para que no ocupen más de 300KB, buscando la
+  combinación de ancho, fps, colores y lossy de más calidad que cabe (gif_search.py)
+
+Las funciones por archivo (optimize_image, optimize_gif, convert_video_to_gif)
+se importan desde optimize_all_images.py, que las reparte en un pool de procesos.
+Uso directo sobre una sola carpeta: python optimize_images.py <carpeta>
+"""
+
+import io
+import os
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageSequence
+from pathlib import Path
+
+import frame_motion
+import gif_delta
+import gif_search
+import media_probe
+import placeholders
+
+# Configuración
+MAX_HEIGHT = 600  # Altura máxima en píxeles (solo para imágenes que midan más)
+QUALITY = 92  # Calidad JPEG (85-95 es un buen rango, 92 es alta calidad)
+MAX_GIF_SIZE_KB = 300  # Tamaño máximo para GIFs en KB
+GIF_DURATION = 2  # Duración del GIF en segundos (tomado de la parte central del video)
+
+# Camino rápido para JPEGs grandes: decodificar ya reducido en el dominio DCT
+# (1/2, 1/4 o 1/8) y reducir por enteros antes del LANCZOS final.
+# bench_optimize_image.py comprueba que, frente al camino completo, el SSIM
+# de la salida respecto a la referencia sin comprimir no pierde más de
+# FAST_PATH_MAX_SSIM_LOSS.
+JPEG_DRAFT_GAP = 2  # La decodificación reducida conserva al menos 2x el tamaño final
+REDUCING_GAP = 3.0  # Image.reduce() entero mientras quede al menos 3x el tamaño final
+FAST_PATH_MAX_SSIM_LOSS = 0.005
+
+# Búsqueda de calidad por imagen: la menor calidad cuyo SSIM frente a la
+# imagen redimensionada sin comprimir alcance TARGET_SSIM (solo JPEG/WEBP)
+TARGET_SSIM = 0.985
+QUALITY_SEARCH_MIN = 40
+QUALITY_SEARCH_MAX = 98
+QUALITY_SEARCH_STEP = 2  # Se para cuando el intervalo es menor que esto
+SEARCHABLE_FORMATS = ('JPEG', 'WEBP')
+
+# AVIF junto a cada salida (soporte nativo de Pillow o el plugin pillow-avif-plugin).
+# speed: 0 (más lento, más compacto) a 10; en CI conviene 8-10, en release 2-4
+AVIF_QUALITY = 60
+AVIF_SPEED = 6
+
+# WebP animados: se re-codifican fotograma a fotograma (method 0-6, más lento = más compacto)
+ANIMATED_WEBP_METHOD = 4
+# Distancia mínima y máxima entre fotogramas clave; se pasan siempre explícitas
+# para que las dos rutas de save_animated_webp den el mismo archivo
+ANIMATED_WEBP_KMIN = 3
+ANIMATED_WEBP_KMAX = 5
+
+# Normalización de formato: JPEG/PNG se convierten al formato principal del sitio
+NORMALIZABLE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+NORMALIZE_FORMATS = {'webp': 'WEBP', 'avif': 'AVIF'}
+PRIMARY_FORMAT = 'webp'
+
+# Escalera de variantes para srcset (alturas en px), en _renditions/ junto al original
+RENDITION_HEIGHTS = (300, 600, 1200, 1800)
+RENDITIONS_DIR = "_renditions"
+RENDITION_THREADS = 4
+
+# Clips de video en bucle (alternativa a los GIFs): MP4 H.264 y WebM VP9 sin
+# audio del mismo tramo central, más un póster WebP, en _clips/ junto al video
+CLIPS_DIR = "_clips"
+CLIP_MAX_WIDTH = 800
+CLIP_H264_CRF = 28  # 18-28 es el rango habitual; más alto = más pequeño
+CLIP_VP9_CRF = 36  # 15-35 recomendado por VP9 para 720p; clips cortos y de fondo toleran algo más
+POSTER_QUALITY = 80
+VIDEO_OUTPUTS = ('gif', 'clip', 'both')
+
+# Extensiones reconocidas (en minúsculas, se comparan sin distinguir mayúsculas)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.avif')  # .avif: solo si no es una alternativa
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi')
+GIF_EXTENSIONS = ('.gif',)
+
+def proportional_width(size, height):
+    """Ancho que mantiene la proporción de size para la altura dada"""
+    width, original_height = size
+    return int((width / original_height) * height)
+
+def draft_for_height(img, height, fast_jpeg=True):
+    """Pide al decodificador JPEG la menor escala DCT que conserve al menos
+    JPEG_DRAFT_GAP veces la altura indicada (debe llamarse antes de cargar la imagen)"""
+    if fast_jpeg and img.format == 'JPEG' and height < img.height:
+        width = proportional_width(img.size, height)
+        img.draft(img.mode, (width * JPEG_DRAFT_GAP, height * JPEG_DRAFT_GAP))
+
+def resize_image(img, new_size, fast_jpeg=True):
+    """Redimensiona img a new_size con LANCZOS
+
+    Con fast_jpeg, los JPEGs se reducen por factores enteros antes del
+    remuestreo final, en vez de remuestrear la imagen completa.
+    """
+    if not fast_jpeg or img.format != 'JPEG':
+        return img.resize(new_size, Image.Resampling.LANCZOS)
+    return img.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+
+def image_format(img, path):
+    """Formato de salida: el del archivo de origen"""
+    path_str = str(path).lower()
+    if img.format == 'JPEG' or path_str.endswith('.jpg') or path_str.endswith('.jpeg'):
+        return 'JPEG'
+    if img.format == 'PNG' or path_str.endswith('.png'):
+        return 'PNG'
+    if img.format == 'WEBP' or path_str.endswith('.webp'):
+        return 'WEBP'
+    if img.format == 'AVIF' or path_str.endswith('.avif'):
+        return 'AVIF'
+    return None
+
+def encode_image(img, fmt, quality=QUALITY):
+    """Codifica img en memoria con los mismos parámetros que save_image"""
+    buffer = io.BytesIO()
+    save_image(img, buffer, fmt or 'PNG', quality)
+    return buffer.getvalue()
+
+def search_quality(img, fmt, target_ssim=TARGET_SSIM, low=QUALITY_SEARCH_MIN, high=QUALITY_SEARCH_MAX,
+                   step=QUALITY_SEARCH_STEP):
+    """Búsqueda binaria de la menor calidad cuyo SSIM frente a img alcanza target_ssim
+
+    La luminancia de referencia se calcula una sola vez. Devuelve
+    (calidad, bytes codificados, ssim, número de codificaciones). Si ni la
+    calidad máxima alcanza el objetivo, se usa la máxima.
+    """
+    from image_metrics import ssim, to_luma
+
+    reference = to_luma(img)
+    trials = {}
+
+    def trial(quality):
+        if quality not in trials:
+            data = encode_image(img, fmt, quality)
+            with Image.open(io.BytesIO(data)) as decoded:
+                trials[quality] = (data, ssim(reference, to_luma(decoded)))
+        return trials[quality]
+
+    best = high
+    while high - low >= step:
+        middle = (low + high) // 2
+        _, score = trial(middle)
+        if score >= target_ssim:
+            best = high = middle
+        else:
+            low = middle + 1
+    data, score = trial(best)
+    return best, data, score, len(trials)
+
+def save_image(img, output_path, fmt, quality=QUALITY, speed=AVIF_SPEED):
+    """Guarda img optimizada en el formato indicado (speed solo se usa en AVIF)"""
+    if fmt == 'PNG':
+        img.save(output_path, 'PNG', optimize=True)
+    elif fmt == 'AVIF':
+        write_avif(img, output_path, quality, speed)
+    elif fmt is None:
+        img.save(output_path, quality=quality, optimize=True)
+    else:
+        img.save(output_path, fmt, quality=quality, optimize=True)
+
+def avif_supported():
+    """True si Pillow puede codificar AVIF (soporte nativo o plugin pillow-avif-plugin)"""
+    Image.init()
+    if 'AVIF' not in Image.SAVE:
+        try:
+            import pillow_avif  # noqa: F401  (registra el formato al importarse)
+        except ImportError:
+            return False
+    return 'AVIF' in Image.SAVE
+
+def write_avif(img, output, quality=AVIF_QUALITY, speed=AVIF_SPEED):
+    """Codifica img en AVIF (ruta o archivo abierto)"""
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if img.has_transparency_data else 'RGB')
+    img.save(output, 'AVIF', quality=quality, speed=speed)
+
+def avif_path(path):
+    """Ruta de la versión AVIF de una salida: <nombre>.<ext>.avif
+
+    Lleva la extensión de la salida para que foo.jpeg y foo.webp de la misma
+    carpeta no compartan (ni se disputen desde dos procesos) un foo.avif.
+    """
+    path = Path(path)
+    return path.with_name(path.name + '.avif')
+
+def save_avif(img, path, avif):
+    """Guarda la versión AVIF de img; avif = {'quality': ..., 'speed': ...}"""
+    write_avif(img, path, avif['quality'], avif['speed'])
+    return {'path': str(path), 'bytes': os.path.getsize(path)}
+
+def rendition_path(output_path, height):
+    """Ruta de la variante de una altura: <carpeta>/_renditions/<nombre>.<altura><ext>"""
+    output_path = Path(output_path)
+    return output_path.parent / RENDITIONS_DIR / f"{output_path.stem}.{height}{output_path.suffix}"
+
+def save_rendition(img, original_size, output_path, height, fmt, quality, fast_jpeg, avif=None,
+                   speed=AVIF_SPEED):
+    """Genera y guarda una variante (y su AVIF) a partir del buffer ya decodificado"""
+    size = (proportional_width(original_size, height), height)
+    rendition = resize_image(img, size, fast_jpeg) if size != img.size else img
+    path = rendition_path(output_path, height)
+    save_image(rendition, path, fmt, quality, speed)
+    result = {'height': height, 'width': size[0], 'path': str(path), 'bytes': os.path.getsize(path)}
+    if avif and fmt != 'AVIF':
+        result['avif'] = save_avif(rendition, avif_path(path), avif)
+    return result
+
+def prune_renditions(output_path, renditions):
+    """Borra las variantes de output_path (y sus AVIF) que no están en renditions
+
+    Son las de alturas que ya no están en la escalera, o todas si ya no se
+    generan. Solo se miran <nombre>.<altura><ext> y <nombre>.<altura><ext>.avif
+    con la extensión de output_path: las de foo.webp no son de foo.jpeg.
+    """
+    output_path = Path(output_path)
+    folder = output_path.parent / RENDITIONS_DIR
+    if not folder.is_dir():
+        return
+    keep = {Path(r['path']) for r in renditions} | {Path(r['avif']['path']) for r in renditions if r.get('avif')}
+    pattern = re.compile(rf"{re.escape(output_path.stem)}\.\d+{re.escape(output_path.suffix)}(\.avif)?",
+                         re.IGNORECASE)
+    for path in folder.iterdir():
+        if pattern.fullmatch(path.name) and path not in keep:
+            path.unlink()
+
+def render_ladder(img, original_size, output_path, heights, fmt, quality=QUALITY, fast_jpeg=True,
+                  avif=None, speed=AVIF_SPEED):
+    """Genera en paralelo (hilos; PIL libera el GIL al redimensionar y codificar)
+    todas las variantes de la escalera desde el mismo buffer decodificado"""
+    if not heights:
+        return []
+    rendition_path(output_path, heights[0]).parent.mkdir(exist_ok=True)
+    with ThreadPoolExecutor(max_workers=min(RENDITION_THREADS, len(heights))) as executor:
+        return list(executor.map(
+            lambda height: save_rendition(img, original_size, output_path, height, fmt, quality,
+                                          fast_jpeg, avif, speed),
+            heights))
+
+def animation_frames(img, size):
+    """Generador de (fotograma RGBA redimensionado, duración en ms)
+
+    Solo hay un fotograma de origen decodificado a la vez; PIL compone cada
+    uno sobre el buffer compartido de la animación al hacer seek.
+    """
+    for frame in ImageSequence.Iterator(img):
+        # PIL actualiza info['duration'] al cargar el fotograma, no al hacer seek
+        rgba = frame.convert('RGBA')
+        duration = frame.info.get('duration', 0) or 0
+        if rgba.size != size:
+            rgba = rgba.resize(size, Image.Resampling.LANCZOS)
+        yield rgba, duration
+
+def streaming_webp_encoder(first, loop, quality):
+    """Codificador incremental de WebP animado con el primer fotograma ya añadido, o None
+
+    Es el objeto privado PIL._webp.WebPAnimEncoder que usa save_all por
+    dentro; si esta versión de Pillow no lo tiene o ha cambiado su firma
+    (TypeError) se devuelve None y se usa la API pública.
+    """
+    try:
+        from PIL import _webp
+        # (tamaño, fondo, repeticiones, minimize_size, kmin, kmax, allow_mixed, verbose)
+        encoder = _webp.WebPAnimEncoder(first.size, 0, loop, False, ANIMATED_WEBP_KMIN, ANIMATED_WEBP_KMAX,
+                                        False, False)
+        # (imagen, marca de tiempo, lossless, quality, alpha_quality, method)
+        encoder.add(first.getim(), 0, False, quality, 100, ANIMATED_WEBP_METHOD)
+    except (ImportError, AttributeError, TypeError):
+        return None
+    return encoder
+
+def save_animated_webp(frames, output_path, quality=QUALITY, loop=0):
+    """Codifica un WebP animado a partir de un iterador de (fotograma, duración)
+
+    Con el codificador incremental cada fotograma se añade y se libera según
+    llega, así que la memoria no crece con la duración del clip. Si no está
+    disponible, se reúnen los fotogramas (ya redimensionados) y se usa save_all.
+    Devuelve el número de fotogramas.
+    """
+    frames = iter(frames)
+    first, first_duration = next(frames)
+
+    encoder = streaming_webp_encoder(first, loop, quality)
+    if encoder is None:
+        rest = list(frames)
+        first.save(output_path, 'WEBP', save_all=True, append_images=[frame for frame, _ in rest],
+                   duration=[first_duration] + [duration for _, duration in rest], loop=loop,
+                   quality=quality, method=ANIMATED_WEBP_METHOD, kmin=ANIMATED_WEBP_KMIN,
+                   kmax=ANIMATED_WEBP_KMAX)
+        return 1 + len(rest)
+
+    timestamp = first_duration
+    count = 1
+    for frame, duration in frames:
+        encoder.add(frame.getim(), round(timestamp), False, quality, 100, ANIMATED_WEBP_METHOD)
+        timestamp += duration
+        count += 1
+    encoder.add(None, round(timestamp), False, quality, 100, 0)
+    data = encoder.assemble('', '', '')
+    if data is None:
+        raise OSError("El codificador WebP no devolvió datos")
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return count
+
+def optimize_animated_webp(img, input_path, output_path, max_height=MAX_HEIGHT, quality=QUALITY,
+                           metrics=False):
+    """Redimensiona y re-codifica todos los fotogramas de un WebP animado
+
+    Conserva duraciones y número de repeticiones. No genera variantes ni AVIF.
+    """
+    original_size = os.path.getsize(input_path)
+    original_data = Path(input_path).read_bytes() if metrics else None
+    original_width, original_height = img.size
+    new_size = img.size
+    if original_height > max_height:
+        new_size = (proportional_width(img.size, max_height), max_height)
+
+    placeholder = placeholders.make_placeholder(img)  # Del primer fotograma
+    prune_renditions(output_path, [])
+    frame_count = save_animated_webp(animation_frames(img, new_size), output_path, quality,
+                                     loop=img.info.get('loop', 0))
+    new_file_size = os.path.getsize(output_path)
+    return {
+        'success': True,
+        'original_size': original_size,
+        'new_size': new_file_size,
+        'reduction': ((original_size - new_file_size) / original_size) * 100,
+        'original_dimensions': (original_width, original_height),
+        'new_dimensions': new_size,
+        'animated': True,
+        'frames': frame_count,
+        'renditions': [],
+        'quality_search': None,
+        'avif': None,
+        'placeholder': placeholder,
+        'metrics': quality_metrics(original_data, output_path) if metrics else None
+    }
+
+def optimize_image(input_path, output_path, max_height=MAX_HEIGHT, quality=QUALITY, fast_jpeg=True,
+                   renditions=(), target_ssim=None, metrics=False, avif=None, output_format=None,
+                   speed=AVIF_SPEED):
+    """Optimiza una imagen reduciendo su tamaño manteniendo alta calidad
+
+    renditions: alturas de la escalera de variantes (srcset) a generar además
+    de la salida principal, desde una única decodificación. Nunca se amplía:
+    se omiten las alturas mayores que la original.
+    target_ssim: en vez de usar quality fija, busca por imagen la menor
+    calidad que alcanza ese SSIM (JPEG/WEBP) y la usa también en las variantes.
+    metrics: mide SSIM, MS-SSIM y PSNR de la salida frente a la imagen
+    redimensionada sin comprimir.
+    avif: {'quality': ..., 'speed': ...} para generar además una versión AVIF
+    de la salida (avif_path: <nombre>.<ext>.avif) y de cada variante.
+    output_format: formato PIL de la salida ('WEBP', 'AVIF'...) cuando no debe
+    ser el del original (normalización de JPEG/PNG); si es AVIF se codifica
+    con quality y speed.
+    El resultado incluye un marcador de posición (placeholders.py) calculado
+    desde el mismo buffer.
+    Los WebP animados se procesan fotograma a fotograma (optimize_animated_webp).
+    """
+    try:
+        original_size = os.path.getsize(input_path)
+        with Image.open(input_path) as img:
+            # Obtener dimensiones originales
+            original_width, original_height = img.size
+            fmt = output_format or image_format(img, input_path)
+            if getattr(img, 'is_animated', False) and fmt == 'WEBP':
+                return optimize_animated_webp(img, input_path, output_path, max_height, quality, metrics)
+            ladder = sorted(h for h in set(renditions) if h <= original_height)
+
+            # Decodificar una sola vez, a la escala que necesite la mayor salida
+            draft_for_height(img, max([min(max_height, original_height)] + ladder), fast_jpeg)
+            img.load()
+            
+            # Calcular nuevas dimensiones manteniendo proporción
+            # Solo redimensionar si la altura es mayor que max_height
+            output_img = img
+            if original_height > max_height:
+                # Calcular ancho proporcional basado en la altura máxima
+                new_height = max_height
+                new_width = proportional_width((original_width, original_height), max_height)
+                
+                # Redimensionar con alta calidad (LANCZOS es el mejor algoritmo)
+                output_img = resize_image(img, (new_width, new_height), fast_jpeg)
+
+            search = None
+            if target_ssim is not None and fmt in SEARCHABLE_FORMATS:
+                chosen, data, score, trials = search_quality(output_img, fmt, target_ssim)
+                fixed_bytes = len(encode_image(output_img, fmt, quality))
+                search = {'quality': chosen, 'ssim': score, 'quality_trials': trials,
+                          'bytes_saved': fixed_bytes - len(data)}
+                quality = chosen
+
+            rendition_results = render_ladder(img, (original_width, original_height), output_path,
+                                              ladder, fmt, quality, fast_jpeg, avif, speed)
+            prune_renditions(output_path, rendition_results)
+            
+            # Guardar optimizado
+            if search is not None:
+                with open(output_path, 'wb') as f:
+                    f.write(data)
+            else:
+                save_image(output_img, output_path, fmt, quality, speed)
+            avif_result = None
+            if avif and fmt != 'AVIF':
+                avif_result = save_avif(output_img, avif_path(output_path), avif)
+            
+            # Obtener tamaños de archivo
+            new_size = os.path.getsize(output_path)
+            reduction = ((original_size - new_size) / original_size) * 100
+            
+            return {
+                'success': True,
+                'original_size': original_size,
+                'new_size': new_size,
+                'reduction': reduction,
+                'original_dimensions': (original_width, original_height),
+                'new_dimensions': output_img.size,
+                'renditions': rendition_results,
+                'quality_search': search,
+                'quality': quality if fmt in SEARCHABLE_FORMATS else None,
+                'avif': avif_result,
+                'placeholder': placeholders.make_placeholder(output_img),
+                'metrics': quality_metrics(output_img, output_path) if metrics else None
+            }
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+def video_probe(video_path, probe=None):
+    """Sondeo del video (duración, dimensiones, códec, rotación, fps): el recibido o uno nuevo"""
+    if probe is None:
+        probe = media_probe.probe_media(video_path)
+    return probe
+
+def central_segment(video_duration, duration=GIF_DURATION):
+    """(inicio, duración) del tramo central de un video"""
+    if video_duration <= duration:
+        return 0, video_duration
+    return (video_duration - duration) / 2, duration
+
+def encode_gif(video_path, output_path, start_time, duration, scale, fps, colors=256, total_ms=None):
+    """Codifica un tramo del video (o un GIF entero, sin start_time) a GIF en una sola pasada de ffmpeg
+
+    El grafo divide el video escalado en dos ramas (split): una genera la
+    paleta y la otra la aplica, así el video se busca y decodifica una sola
+    vez y la paleta no pasa por disco. Antes, mpdecimate quita los fotogramas
+    casi iguales al anterior (frame_motion.decimate_filter) y, con -vsync vfr,
+    el fotograma que queda dura lo de los que se han quitado. Los que se
+    quitan al final no alargan a nadie: con total_ms (duración de la
+    animación) el último fotograma se alarga hasta completarla.
+    """
+    segment = ['-ss', str(start_time), '-t', str(duration)] if start_time is not None else []
+    cmd_gif = [
+        'ffmpeg', '-y', *segment,
+        '-i', str(video_path),
+        '-filter_complex',
+        f'{scale},fps={fps},{frame_motion.decimate_filter()},split[a][b];'
+        f'[a]palettegen=max_colors={colors}[p];[b][p]paletteuse',
+        '-vsync', 'vfr',
+        str(output_path)
+    ]
+    subprocess.run(cmd_gif, capture_output=True, check=True)
+    if total_ms is None and duration is not None:
+        total_ms = duration * 1000
+    if total_ms:
+        gif_delta.pad_final_delay(output_path, total_ms)
+
+def gif_tools():
+    """Herramientas instaladas para codificar GIFs: {'ffmpeg': bool, 'gifsicle': bool}"""
+    return {'ffmpeg': shutil.which('ffmpeg') is not None, 'gifsicle': shutil.which('gifsicle') is not None}
+
+def gif_encoder(source, tools, start_time=None, duration=None, total_ms=None):
+    """encode(params, ruta) para gif_search
+
+    Con ffmpeg se escala, se cambian los fps y se genera la paleta; gifsicle,
+    si está, optimiza los fotogramas y aplica lossy. Sin ffmpeg, gifsicle
+    hace también el escalado y la reducción de colores (los fps no cambian).
+    Sin ninguno de los dos, el re-codificador de gif_delta.py escala, reduce
+    colores y diezma fotogramas con NumPy.
+    """
+    def encode(params, output_path):
+        if not (tools['ffmpeg'] or tools['gifsicle']):
+            gif_delta.reencode_gif(source, output_path, params['width'], params['colors'], params['fps'])
+            return
+        input_path = source
+        if tools['ffmpeg']:
+            encode_gif(source, output_path, start_time, duration, f"scale={params['width']}:-1",
+                       params['fps'], params['colors'], total_ms)
+            input_path = output_path
+        if tools['gifsicle']:
+            cmd_optimize = ['gifsicle', '--optimize=3']
+            if not tools['ffmpeg']:
+                cmd_optimize += ['--resize-width', str(params['width']), '--colors', str(params['colors'])]
+            if params['lossy']:
+                cmd_optimize.append(f"--lossy={params['lossy']}")
+            cmd_optimize += ['-o', str(output_path), str(input_path)]
+            subprocess.run(cmd_optimize, capture_output=True, check=True)
+    return encode
+
+def gif_duration_ms(img):
+    """Duración total de un GIF en ms (retardo 0 = 100ms, como los navegadores)"""
+    return sum(frame.info.get('duration') or gif_delta.DEFAULT_DELAY_MS for frame in ImageSequence.Iterator(img))
+
+def gif_fps(img, total_ms=None):
+    """Fotogramas por segundo medios de un GIF"""
+    return round(img.n_frames * 1000 / (total_ms or gif_duration_ms(img)), 2)
+
+def search_gif(source, output_path, max_size_kb, source_width, max_fps, tools, start_time=None, duration=None,
+               motion=None, total_ms=None):
+    """Escribe en output_path el GIF de más calidad que no supera max_size_kb (ver gif_search.py)
+
+    motion: análisis de frame_motion.py; la búsqueda no pasa de los fps que
+    pide el movimiento del clip (gifsicle solo no puede cambiar los fps).
+    total_ms: duración de un GIF de origen (la de un video es duration).
+    """
+    if tools['ffmpeg'] or not tools['gifsicle']:
+        fps_values = tuple(sorted({min(fps, max_fps) for fps in gif_search.GIF_FPS}, reverse=True))
+        if motion is not None:
+            top = frame_motion.adaptive_fps(motion, fps_values)
+            fps_values = tuple(fps for fps in fps_values if fps <= top)
+    else:
+        fps_values = (max_fps,)
+    lossy_values = gif_search.GIF_LOSSY if tools['gifsicle'] else (0,)
+    return gif_search.search_gif_size(gif_encoder(source, tools, start_time, duration, total_ms), output_path,
+                                      max_size_kb * 1024, source_width, fps_values, lossy_values)
+
+def convert_video_to_gif(video_path, output_path, duration=GIF_DURATION, max_size_kb=MAX_GIF_SIZE_KB,
+                         probe=None):
+    """Convierte un video a GIF optimizado (2 segundos de la parte central, máximo 300KB)
+
+    Requiere ffmpeg; gifsicle es opcional (añade lossy a la búsqueda).
+    probe: sondeo ya hecho del video (media_probe), para no lanzar ffprobe otra vez.
+    """
+    try:
+        # Duración, dimensiones y fps del video en un solo sondeo
+        probe = video_probe(video_path, probe)
+        if probe is None:
+            return {'success': False, 'error': 'No se pudo obtener la duración del video'}
+        
+        # Calcular punto de inicio (parte central del video)
+        start_time, actual_duration = central_segment(probe['duration'], duration)
+        
+        # Ancho, fps, colores y lossy: la combinación de más calidad que cabe en max_size_kb
+        # (sin pasar de los fps del propio video ni de los que pide su movimiento)
+        max_fps = min(max(gif_search.GIF_FPS), probe['fps'] or max(gif_search.GIF_FPS))
+        motion = frame_motion.video_motion(video_path, start_time, actual_duration,
+                                           (probe['width'], probe['height']), probe['fps'])
+        search = search_gif(video_path, output_path, max_size_kb, probe['width'], max_fps,
+                            gif_tools(), start_time, actual_duration, motion)
+        gif_size_kb = os.path.getsize(output_path) / 1024
+        
+        original_size = os.path.getsize(video_path) if video_path.exists() else 0
+        new_size = os.path.getsize(output_path)
+        
+        return {
+            'success': True,
+            'original_size': original_size,
+            'new_size': new_size,
+            'gif_size_kb': gif_size_kb,
+            'duration': actual_duration,
+            'start_time': start_time,
+            'gif_search': search,
+            'motion': motion
+        }
+    except subprocess.CalledProcessError as e:
+        return {'success': False, 'error': f'Error en ffmpeg: {str(e)}'}
+    except FileNotFoundError:
+        return {'success': False, 'error': 'ffmpeg no está instalado. Instala ffmpeg para convertir videos.'}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+def clip_paths(video_path):
+    """Rutas del clip de un video: <carpeta>/_clips/<nombre>.mp4, .webm y .webp (póster)"""
+    video_path = Path(video_path)
+    base = video_path.parent / CLIPS_DIR / video_path.stem
+    return {'mp4': base.with_suffix('.mp4'), 'webm': base.with_suffix('.webm'),
+            'poster': base.with_suffix('.webp')}
+
+def convert_video_to_clip(video_path, duration=GIF_DURATION, max_width=CLIP_MAX_WIDTH, probe=None):
+    """Convierte el tramo central de un video en clips MP4 (H.264) y WebM (VP9)
+    sin audio, pensados para reproducirse en bucle, más un póster WebP
+
+    El bucle lo hace el reproductor (<video loop muted autoplay playsinline>);
+    el MP4 lleva el índice al principio (+faststart) para empezar a reproducirse
+    antes de terminar la descarga. new_size es el tamaño del MP4, el formato
+    que reproduce cualquier navegador.
+    """
+    try:
+        probe = video_probe(video_path, probe)
+        if probe is None:
+            return {'success': False, 'error': 'No se pudo obtener la duración del video'}
+        start_time, actual_duration = central_segment(probe['duration'], duration)
+
+        # yuv420p exige dimensiones pares: ancho par y alto proporcional par (-2)
+        scale = f"scale={min(probe['width'], max_width) // 2 * 2}:-2"
+
+        paths = clip_paths(video_path)
+        paths['mp4'].parent.mkdir(exist_ok=True)
+        segment = ['-ss', str(start_time), '-t', str(actual_duration), '-i', str(video_path)]
+
+        cmd_mp4 = [
+            'ffmpeg', '-y', *segment, '-an', '-vf', scale,
+            '-c:v', 'libx264', '-preset', 'slow', '-crf', str(CLIP_H264_CRF),
+            '-pix_fmt', 'yuv420p', '-movflags', '+faststart',
+            str(paths['mp4'])
+        ]
+        subprocess.run(cmd_mp4, capture_output=True, check=True)
+
+        cmd_webm = [
+            'ffmpeg', '-y', *segment, '-an', '-vf', scale,
+            '-c:v', 'libvpx-vp9', '-crf', str(CLIP_VP9_CRF), '-b:v', '0',
+            '-row-mt', '1', '-pix_fmt', 'yuv420p',
+            str(paths['webm'])
+        ]
+        subprocess.run(cmd_webm, capture_output=True, check=True)
+
+        # Póster: primer fotograma del clip (lo que se ve mientras carga), en PNG
+        # por una tubería y codificado a WebP con PIL
+        cmd_poster = [
+            'ffmpeg', '-v', 'error', '-ss', str(start_time), '-i', str(video_path),
+            '-frames:v', '1', '-vf', scale, '-f', 'image2pipe', '-c:v', 'png', '-'
+        ]
+        result = subprocess.run(cmd_poster, capture_output=True, check=True)
+        with Image.open(io.BytesIO(result.stdout)) as poster:
+            poster.load()
+            poster_size = poster.size
+            save_image(poster, paths['poster'], 'WEBP', POSTER_QUALITY)
+
+        outputs = {name: {'path': str(path), 'bytes': os.path.getsize(path)} for name, path in paths.items()}
+        return {
+            'success': True,
+            'original_size': os.path.getsize(video_path),
+            'new_size': outputs['mp4']['bytes'],
+            'duration': actual_duration,
+            'start_time': start_time,
+            'clip': dict(outputs, width=poster_size[0], height=poster_size[1], duration=actual_duration)
+        }
+    except subprocess.CalledProcessError as e:
+        return {'success': False, 'error': f'Error en ffmpeg: {str(e)}'}
+    except FileNotFoundError:
+        return {'success': False, 'error': 'ffmpeg no está instalado. Instala ffmpeg para convertir videos.'}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+def quality_metrics(reference, output_path):
+    """SSIM, MS-SSIM y PSNR del archivo generado frente a su referencia
+
+    reference: imagen PIL (redimensionada, sin comprimir) o bytes del
+    original de una animación. Un fallo al medir no invalida la optimización.
+    """
+    try:
+        import image_metrics
+
+        with Image.open(output_path) as output:
+            if isinstance(reference, bytes):
+                with Image.open(io.BytesIO(reference)) as original:
+                    return image_metrics.compare_frames(original, output)
+            return image_metrics.compare(reference, output)
+    except Exception as e:
+        return {'error': str(e)}
+
+def optimize_gif(gif_path, max_size_kb=MAX_GIF_SIZE_KB, metrics=False):
+    """Optimiza un GIF existente para que no ocupe más de 300KB
+
+    Con metrics, compara fotograma a fotograma el resultado con el original.
+    """
+    original_data = Path(gif_path).read_bytes() if metrics else None
+    result = reduce_gif(gif_path, max_size_kb)
+    if metrics and result['success'] and result.get('optimized', False):
+        result['metrics'] = quality_metrics(original_data, gif_path)
+    return result
+
+def reduce_gif(gif_path, max_size_kb=MAX_GIF_SIZE_KB):
+    """Reduce un GIF en su sitio con ffmpeg/gifsicle (o con gif_delta.py si no hay ninguno)"""
+    try:
+        original_size = os.path.getsize(gif_path)
+        original_size_kb = original_size / 1024
+        
+        if original_size_kb <= max_size_kb:
+            return {
+                'success': True,
+                'original_size': original_size,
+                'new_size': original_size,
+                'gif_size_kb': original_size_kb,
+                'optimized': False,
+                'message': 'Ya está dentro del límite'
+            }
+        
+        # Buscar la combinación de más calidad que cabe (con ffmpeg, gifsicle o gif_delta.py)
+        with Image.open(gif_path) as img:
+            total_ms = gif_duration_ms(img)
+            width, fps = img.width, gif_fps(img, total_ms)
+            motion = frame_motion.gif_motion(img)
+        search = search_gif(gif_path, gif_path, max_size_kb, width, fps, gif_tools(), motion=motion,
+                            total_ms=total_ms)
+        new_size = os.path.getsize(gif_path)
+        
+        return {
+            'success': True,
+            'original_size': original_size,
+            'new_size': new_size,
+            'gif_size_kb': new_size / 1024,
+            'optimized': True,
+            'gif_search': search,
+            'motion': motion
+        }
+    except subprocess.CalledProcessError as e:
+        return {'success': False, 'error': f'Error al codificar el GIF: {str(e)}'}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+def gif_search_settings():
+    """Rejilla de la búsqueda de GIFs (si cambia, los GIFs se vuelven a buscar)"""
+    return {'widths': list(gif_search.GIF_WIDTHS), 'fps': list(gif_search.GIF_FPS),
+            'colors': list(gif_search.GIF_COLORS), 'lossy': list(gif_search.GIF_LOSSY),
+            'merge_tolerance': frame_motion.MERGE_TOLERANCE, 'decimate': frame_motion.decimate_filter(),
+            'motion_per_frame': frame_motion.MOTION_PER_FRAME}
+
+def encoder_settings(kind, path, renditions=(), target_ssim=None, avif=None, normalize=None,
+                     video_output='gif', primary_avif=None):
+    """Ajustes que determinan la salida de un archivo (clave de la caché incremental)
+
+    Si cambia cualquiera de estos valores el archivo se vuelve a procesar.
+    """
+    ext = Path(path).suffix.lower()
+    if kind == 'image':
+        settings = {'kind': kind, 'format': ext, 'max_height': MAX_HEIGHT, 'quality': QUALITY}
+        if renditions:
+            settings['renditions'] = sorted(set(renditions))
+        if target_ssim is not None:
+            settings['target_ssim'] = target_ssim
+        if avif:
+            settings['avif'] = dict(avif)
+        converts = normalize and ext in NORMALIZABLE_EXTENSIONS
+        if converts:
+            settings['normalize'] = normalize
+        if ext == '.avif' or (converts and NORMALIZE_FORMATS[normalize] == 'AVIF'):
+            # Salida principal en AVIF: si cambian --avif-quality o --avif-speed se vuelve a codificar
+            settings['primary_avif'] = dict(primary_avif or {'quality': AVIF_QUALITY, 'speed': AVIF_SPEED})
+        return settings
+    if kind == 'video':
+        settings = {'kind': kind, 'duration': GIF_DURATION, 'max_gif_size_kb': MAX_GIF_SIZE_KB,
+                    'gif_search': gif_search_settings()}
+        if video_output != 'gif':
+            settings.update(output=video_output, clip_max_width=CLIP_MAX_WIDTH, h264_crf=CLIP_H264_CRF,
+                            vp9_crf=CLIP_VP9_CRF, poster_quality=POSTER_QUALITY)
+        return settings
+    return {'kind': kind, 'max_gif_size_kb': MAX_GIF_SIZE_KB, 'gif_search': gif_search_settings()}
+
+def find_tracks_root(folder):
+    """(public/tracks que contiene folder, folder relativa a ella), o (folder, None) si no está dentro de ninguno"""
+    from optimize_all_images import TRACKS_DIR
+
+    folder = Path(folder).resolve()
+    for root in [folder, *folder.parents]:
+        if root.parts[-len(TRACKS_DIR.parts):] == TRACKS_DIR.parts:
+            return root, folder.relative_to(root).as_posix()
+    return folder, None
+
+
+def main(current_dir=None):
+    """Optimiza una sola carpeta (y sus subcarpetas) con el mismo motor que optimize_all_images.py
+
+    Dentro de public/tracks se ejecuta sobre la raíz de los tracks limitado a
+    la carpeta (--only), con la caché y el almacén de originales del
+    proyecto: tracks.json y assets.json no se escriben en la carpeta.
+    """
+    # Carpeta a procesar: argumento, o el directorio de trabajo actual
+    if current_dir is None:
+        current_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path.cwd()
+
+    import optimize_all_images
+    from backup_store import BACKUP_STORE_DIR
+    from optimize_cache import MANIFEST_PATH
+
+    root, folder = find_tracks_root(current_dir)
+    if folder is None:
+        return optimize_all_images.main([str(current_dir)])
+    project = root.parents[len(optimize_all_images.TRACKS_DIR.parts) - 1]
+    return optimize_all_images.main([str(root), '--only', folder,
+                                     '--cache', str(project / MANIFEST_PATH),
+                                     '--backup-store', str(project / BACKUP_STORE_DIR)])
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Paquetes de rango de bytes por segmento
+Las imágenes y GIFs ya optimizados de cada segmento (el track suelto o cada
+subcarpeta, los mismos grupos que tracks.json) se concatenan tal cual en un
+solo archivo, <segmento>/_pack/<firma>.pack, en el orden en que los lista
+tracks.json. El cliente puede pedir una imagen con una petición Range
+(bytes=offset-offset+length-1) o descargar el segmento entero en orden por
+una sola conexión e ir cortándolo.
+- Sin cabecera ni relleno: el índice (paquete, desplazamiento, longitud y
+  tipo MIME) se guarda en assets.json, en la sección "pack" de cada archivo
+- El nombre lleva la firma de sus archivos (ruta, tamaño y mtime): si nada
+  cambia no se vuelve a escribir, y los paquetes que ya no se usan se borran
+"""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+from media_walker import prune_generated
+from tracks_index import ROOT_FOLDER, collation_key, segment_of
+
+PACK_DIR = "_pack"
+PACK_SUFFIX = ".pack"
+PACK_KINDS = ('image', 'gif')
+PACK_MIN_ITEMS = 2  # Con menos archivos el paquete no ahorra ninguna petición
+PACK_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.avif': 'image/avif',
+    '.gif': 'image/gif',
+}
+
+
+def pack_segments(files, tracks_dir):
+    """{carpeta del segmento: [MediaFile]} en el orden de tracks.json"""
+    groups = {}
+    for item in files:
+        segment = segment_of(item.rel) if item.kind in PACK_KINDS else None
+        if segment is None:
+            continue
+        track, subfolder = segment
+        folder = Path(tracks_dir) / track if subfolder == ROOT_FOLDER else Path(tracks_dir) / track / subfolder
+        groups.setdefault(folder, []).append(item)
+    return {folder: sorted(items, key=lambda item: collation_key(item.rel.rsplit('/', 1)[-1]))
+            for folder, items in groups.items() if len(items) >= PACK_MIN_ITEMS}
+
+
+def signature(items):
+    """Firma de los archivos de un paquete (y de su orden)"""
+    digest = hashlib.sha256()
+    for item in items:
+        digest.update(f"{item.rel}\0{item.size}\0{item.mtime_ns}\n".encode())
+    return digest.hexdigest()[:12]
+
+
+def write_pack(path, items):
+    """Concatena los archivos en path de forma atómica"""
+    path.parent.mkdir(exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'wb') as out:
+        for item in items:
+            with open(item.path, 'rb') as f:
+                shutil.copyfileobj(f, out)
+    os.replace(tmp_path, path)
+
+
+def build_packs(files, tracks_dir):
+    """Escribe los paquetes que falten y borra los que sobran (files: recorrido, TrackFiles)
+
+    Devuelve ({ruta relativa del archivo: {'pack': ruta del paquete, 'offset',
+    'length', 'type'}}, paquetes escritos, paquetes reutilizados).
+    """
+    entries = {}
+    keep = set()
+    written = reused = 0
+    for folder, items in sorted(pack_segments(files, tracks_dir).items()):
+        path = folder / PACK_DIR / f"{signature(items)}{PACK_SUFFIX}"
+        keep.add(path)
+        if path.exists():
+            reused += 1
+        else:
+            write_pack(path, items)
+            written += 1
+        offset = 0
+        for item in items:
+            entries[item.rel] = {'pack': path, 'offset': offset, 'length': item.size,
+                                 'type': PACK_TYPES[item.path.suffix.lower()]}
+            offset += item.size
+
+    prune_generated(files, PACK_DIR, keep)
+    return entries, written, reused
@@ -0,0 +1,91 @@
+"""
+Marcadores de posición (LQIP) de las imágenes
+Para cada imagen se generan, desde el buffer ya decodificado:
+- Un WebP diminuto (PLACEHOLDER_SIZE px en el lado mayor, desenfocado) como
+  data URI en base64, que el front-end puede pintar estirado al instante
+- Un BlurHash (https://blurha.sh): unos 30 caracteres con los primeros
+  coeficientes de la DCT de la imagen, calculados con NumPy
+Los dos se guardan en assets.json y se copian a tracks.json.
+"""
+
+import base64
+import io
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+PLACEHOLDER_SIZE = 24  # Lado mayor del WebP en píxeles
+PLACEHOLDER_QUALITY = 40
+PLACEHOLDER_BLUR = 1.0  # Radio del desenfoque gaussiano (en píxeles del WebP diminuto)
+BLURHASH_COMPONENTS = (4, 3)  # Componentes (lado mayor, lado menor)
+BLURHASH_SIZE = 32  # Lado mayor de la miniatura sobre la que se calcula el BlurHash
+
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def base83(value, length):
+    return ''.join(BASE83[value // 83 ** (length - 1 - i) % 83] for i in range(length))
+
+
+def srgb_to_linear(values):
+    values = values / 255.0
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(value):
+    value = min(max(value, 0.0), 1.0)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash(pixels, components_x, components_y):
+    """BlurHash de píxeles RGB uint8 (alto, ancho, 3)
+
+    Todos los coeficientes salen de una sola contracción de NumPy:
+    factor[j, i] = media de linear(píxel) * cos(pi i x / ancho) * cos(pi j y / alto).
+    """
+    height, width = pixels.shape[:2]
+    linear = srgb_to_linear(pixels.astype(np.float64))
+    basis_x = np.cos(np.pi * np.arange(components_x)[:, np.newaxis] * np.arange(width) / width)
+    basis_y = np.cos(np.pi * np.arange(components_y)[:, np.newaxis] * np.arange(height) / height)
+    factors = np.einsum('jy,ix,yxc->jic', basis_y, basis_x, linear) * (2 / (width * height))
+    factors[0, 0] /= 2
+    factors = factors.reshape(-1, 3)
+    dc, ac = factors[0], factors[1:]
+
+    result = base83((components_x - 1) + (components_y - 1) * 9, 1)
+    if len(ac):
+        quantised_max = int(max(0, min(82, np.floor(np.abs(ac).max() * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+    else:
+        quantised_max, max_value = 0, 1
+    result += base83(quantised_max, 1)
+    result += base83((linear_to_srgb(dc[0]) << 16) + (linear_to_srgb(dc[1]) << 8) + linear_to_srgb(dc[2]), 4)
+    quantised = np.clip(np.floor(np.sign(ac) * np.abs(ac / max_value) ** 0.5 * 9 + 9.5), 0, 18).astype(int)
+    for r, g, b in quantised:
+        result += base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+def make_placeholder(img):
+    """{'webp': data URI, 'blurhash': ...} de una imagen PIL ya decodificada"""
+    rgba = img.convert('RGBA')
+    tiny = rgba.copy()
+    tiny.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.BOX)
+    buffer = io.BytesIO()
+    tiny.filter(ImageFilter.GaussianBlur(PLACEHOLDER_BLUR)).save(buffer, 'WEBP', quality=PLACEHOLDER_QUALITY)
+
+    small = rgba.convert('RGB')
+    small.thumbnail((BLURHASH_SIZE, BLURHASH_SIZE), Image.Resampling.BOX)
+    longest, shortest = BLURHASH_COMPONENTS
+    components = (longest, shortest) if small.width >= small.height else (shortest, longest)
+    return {'webp': 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii'),
+            'blurhash': blurhash(np.asarray(small), *components)}
+
+
+def placeholder_from_file(path):
+    """Marcador de posición del primer fotograma de un archivo (para imágenes que no se han reprocesado)"""
+    with Image.open(path) as img:
+        img.draft('RGB', (BLURHASH_SIZE * 2, BLURHASH_SIZE * 2))  # Solo afecta a los JPEG
+        return make_placeholder(img)
@@ -0,0 +1,40 @@
+"""Salidas de assets.json: se borran cuando ninguna entrada las usa"""
+
+from asset_manifest import AssetManifest, asset_url
+
+
+def output(tracks_dir, rel):
+    (tracks_dir / rel).parent.mkdir(parents=True, exist_ok=True)
+    (tracks_dir / rel).write_bytes(b'x')
+    return {'path': rel, 'url': asset_url(rel), 'bytes': 1}
+
+
+def formats(tracks_dir, rel, avif_rel):
+    return {'jpeg': output(tracks_dir, rel), 'avif': output(tracks_dir, avif_rel)}
+
+
+def test_shared_output_survives_until_nobody_uses_it(tmp_path):
+    manifest = AssetManifest(tmp_path)
+    manifest.set('T/foo.jpeg', 'formats', formats(tmp_path, 'T/foo.jpeg', 'T/foo.avif'))
+    manifest.set('T/foo.webp', 'formats', formats(tmp_path, 'T/foo.webp', 'T/foo.avif'))
+
+    manifest.set('T/foo.jpeg', 'formats', formats(tmp_path, 'T/foo.jpeg', 'T/foo.jpeg.avif'))
+    assert (tmp_path / 'T/foo.avif').exists()  # foo.webp todavía lo usa
+    manifest.set('T/foo.webp', 'formats', None)
+    assert not (tmp_path / 'T/foo.avif').exists()
+    assert (tmp_path / 'T/foo.webp').exists()  # El propio asset nunca se borra
+    assert (tmp_path / 'T/foo.jpeg.avif').exists()
+
+
+def test_prune_and_reload(tmp_path):
+    manifest = AssetManifest(tmp_path)
+    manifest.set('T/a.jpeg', 'renditions', [output(tmp_path, 'T/_renditions/a.300.jpeg')])
+    manifest.set('T/b.jpeg', 'renditions', [output(tmp_path, 'T/_renditions/b.300.jpeg')])
+    manifest.save()
+
+    manifest = AssetManifest.load(tmp_path)
+    manifest.set('T/a.webp', 'renditions', [manifest.get('T/a.jpeg', 'renditions')[0]])  # Misma salida
+    assert manifest.prune(['T/a.webp', 'T/b.jpeg']) == 0
+    assert (tmp_path / 'T/_renditions/a.300.jpeg').exists()
+    assert manifest.prune(['T/b.jpeg']) == 1
+    assert not (tmp_path / 'T/_renditions/a.300.jpeg').exists()
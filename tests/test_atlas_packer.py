@@ -0,0 +1,49 @@
+"""Empaquetado por estanterías de las hojas de atlas"""
+
+import random
+from types import SimpleNamespace
+
+from atlas_packer import ATLAS_QUALITY, pack_shelves, sheet_quality
+
+
+def check_packing(sizes, max_side, padding):
+    placements, sheets = pack_shelves(sizes, max_side, padding)
+    assert len(placements) == len(sizes)
+    by_sheet = {}
+    for (w, h), (sheet, x, y) in zip(sizes, placements):
+        sheet_w, sheet_h = sheets[sheet]
+        assert 0 <= x and x + w <= sheet_w <= max_side
+        assert 0 <= y and y + h <= sheet_h <= max_side
+        by_sheet.setdefault(sheet, []).append((x, y, x + w + padding, y + h + padding))
+    for rects in by_sheet.values():
+        for i, a in enumerate(rects):
+            for b in rects[i + 1:]:
+                assert a[2] <= b[0] or b[2] <= a[0] or a[3] <= b[1] or b[3] <= a[1], (a, b)
+    return placements, sheets
+
+
+def test_random_sizes_do_not_overlap():
+    rng = random.Random(3)
+    for _ in range(20):
+        sizes = [(rng.randint(1, 120), rng.randint(1, 120)) for _ in range(rng.randint(1, 60))]
+        check_packing(sizes, 256, 2)
+
+
+def test_single_sheet_is_roughly_square():
+    placements, sheets = check_packing([(32, 32)] * 16, 2048, 0)
+    assert sheets == [(128, 128)]
+    assert {sheet for sheet, _, _ in placements} == {0}
+
+
+def test_overflow_opens_new_sheets():
+    placements, sheets = check_packing([(100, 100)] * 10, 210, 2)
+    assert len(sheets) == 3
+    assert [sum(1 for sheet, _, _ in placements if sheet == index) for index in range(3)] == [4, 4, 2]
+
+
+def test_sheet_quality_uses_the_highest_recorded():
+    items = [(SimpleNamespace(rel=rel), (8, 8)) for rel in ('a', 'b', 'c')]
+    recorded = {'a': 70, 'b': 84, 'c': 78}
+    assert sheet_quality(items, recorded.get) == 84
+    assert sheet_quality(items, {'a': 70}.get) == ATLAS_QUALITY
+    assert sheet_quality(items) == ATLAS_QUALITY
@@ -0,0 +1,53 @@
+"""Nombres con huella: enlaces duros cuyo contenido no cambia aunque el archivo se reescriba"""
+
+import os
+
+from fingerprints import FINGERPRINT_DIR, build_fingerprints, detach_fingerprints
+from media_walker import walk_tracks
+from optimize_cache import stat_key
+
+
+def make_tree(root):
+    for rel, data in {'Viaje/1.jpg': b'jpg-uno', 'Viaje/2.png': b'png-dos', 'Viaje/copia.jpg': b'jpg-uno'}.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return [root / 'Viaje/1.jpg', root / 'Viaje/2.png', root / 'Viaje/copia.jpg']
+
+
+def test_names_are_hard_links_shared_by_equal_content(tmp_path):
+    paths = make_tree(tmp_path)
+    fingerprints, linked, reused = build_fingerprints(paths, walk_tracks(tmp_path), tmp_path)
+
+    assert (linked, reused) == (2, 1)
+    assert fingerprints[paths[0]] == fingerprints[paths[2]]
+    assert fingerprints[paths[0]].parent == tmp_path / FINGERPRINT_DIR
+    assert os.path.samefile(paths[1], fingerprints[paths[1]])
+
+
+def test_detached_name_keeps_its_content_and_is_pruned_later(tmp_path):
+    paths = make_tree(tmp_path)
+    fingerprints, _, _ = build_fingerprints(paths, walk_tracks(tmp_path), tmp_path)
+    recorded = {path: (stat_key(path), target) for path, target in fingerprints.items()}
+    old = fingerprints[paths[1]]
+
+    assert detach_fingerprints([paths[1]], recorded) == 1
+    with open(paths[1], 'r+b') as f:  # Reescritura en su sitio, como los motores
+        f.write(b'PNG')
+    assert old.read_bytes() == b'png-dos'
+
+    fingerprints, linked, _ = build_fingerprints(paths, walk_tracks(tmp_path), tmp_path, recorded)
+    assert linked == 1
+    assert fingerprints[paths[1]].read_bytes() == b'PNG-dos'
+    assert not old.exists()
+
+
+def test_standalone_copy_is_linked_again(tmp_path):
+    paths = make_tree(tmp_path)
+    fingerprints, _, _ = build_fingerprints(paths, walk_tracks(tmp_path), tmp_path)
+    recorded = {path: (stat_key(path), target) for path, target in fingerprints.items()}
+    detach_fingerprints([paths[1]], recorded)
+
+    _, linked, reused = build_fingerprints(paths, walk_tracks(tmp_path), tmp_path, recorded)
+    assert (linked, reused) == (1, 2)
+    assert os.path.samefile(paths[1], fingerprints[paths[1]])
@@ -0,0 +1,80 @@
+"""Re-codificador de GIFs: mismos fotogramas y duración con menos datos"""
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from gif_delta import delay_offsets, pad_final_delay, reencode_gif
+
+SIZE = (40, 30)
+COLORS = [(255, 0, 0), (0, 128, 255), (20, 200, 40), (250, 250, 250)]
+
+
+def make_frames():
+    """Fondo fijo y un cuadrado que se mueve; el tercer fotograma repite el segundo"""
+    frames = []
+    for step in (0, 8, 8, 16):
+        pixels = np.zeros((SIZE[1], SIZE[0], 3), dtype=np.uint8)
+        pixels[:] = COLORS[0]
+        pixels[5:15, step:step + 10] = COLORS[1]
+        pixels[20:, :] = COLORS[2]
+        pixels[22:26, 30:36] = COLORS[3]
+        frames.append(Image.fromarray(pixels))
+    return frames
+
+
+def composed(path):
+    """[(píxeles RGB, duración)] de los fotogramas ya compuestos, uniendo los repetidos"""
+    result = []
+    with Image.open(path) as img:
+        for frame in ImageSequence.Iterator(img):
+            pixels = np.array(frame.convert('RGB'))
+            duration = frame.info.get('duration', 0)
+            if result and np.array_equal(result[-1][0], pixels):
+                result[-1][1] += duration
+            else:
+                result.append([pixels, duration])
+    return result
+
+
+def write_source(path):
+    first, *rest = make_frames()
+    first.save(path, 'GIF', save_all=True, append_images=rest, duration=[100, 200, 300, 400], loop=0,
+               optimize=False)
+
+
+def test_reencode_keeps_frames_and_timing(tmp_path):
+    source = tmp_path / 'in.gif'
+    write_source(source)
+    result = reencode_gif(source, tmp_path / 'out.gif')
+
+    expected = composed(source)
+    actual = composed(tmp_path / 'out.gif')
+    assert result['frames_out'] == len(expected) == 3
+    assert [duration for _, duration in actual] == [duration for _, duration in expected] == [100, 500, 400]
+    for (want, _), (got, _) in zip(expected, actual):
+        assert np.array_equal(want, got)
+    assert result['bytes'] == (tmp_path / 'out.gif').stat().st_size
+
+
+def test_reencode_only_stores_changed_rectangles(tmp_path):
+    source = tmp_path / 'in.gif'
+    write_source(source)
+    reencode_gif(source, tmp_path / 'out.gif')
+    with Image.open(tmp_path / 'out.gif') as img:
+        img.seek(1)
+        x0, y0, x1, y1 = img.dispose_extent
+    assert (x1 - x0, y1 - y0) != SIZE
+    assert y1 <= 15
+
+
+def test_pad_final_delay(tmp_path):
+    source = tmp_path / 'in.gif'
+    write_source(source)
+    reencode_gif(source, tmp_path / 'out.gif')
+    data = (tmp_path / 'out.gif').read_bytes()
+    delays = [int.from_bytes(data[offset:offset + 2], 'little') for offset in delay_offsets(data)]
+    assert delays == [10, 50, 40]
+
+    assert pad_final_delay(tmp_path / 'out.gif', 1500) == 500
+    assert [duration for _, duration in composed(tmp_path / 'out.gif')] == [100, 500, 900]
+    assert pad_final_delay(tmp_path / 'out.gif', 1500) == 0
@@ -0,0 +1,64 @@
+"""Búsqueda de parámetros de GIF con un codificador falso de tamaño conocido"""
+
+from pathlib import Path
+
+import gif_search
+from gif_search import SizeModel, candidates, search_gif_size
+
+SOURCE_WIDTH = 640
+FPS_VALUES = (15, 10, 6)
+LOSSY_VALUES = (0, 40, 80)
+
+
+def fake_size(params):
+    """Ley de potencias como la de SizeModel (exponentes dentro de EXPONENT_LIMITS)"""
+    return int(1000 * (params['width'] / 160) ** 2 * (params['fps'] / 15) * (params['colors'] / 256) ** 0.5
+               * 0.5 ** (params['lossy'] / 80))
+
+
+def fake_encoder(calls):
+    def encode(params, path):
+        calls.append(params)
+        Path(path).write_bytes(b'\0' * fake_size(params))
+    return encode
+
+
+def test_candidates_are_ranked_and_capped_to_the_source():
+    ranked = candidates(SOURCE_WIDTH, FPS_VALUES, LOSSY_VALUES)
+    assert ranked[0] == {'width': SOURCE_WIDTH, 'fps': 15, 'colors': 256, 'lossy': 0}
+    assert max(params['width'] for params in ranked) == SOURCE_WIDTH
+    assert len(ranked) == len({tuple(sorted(params.items())) for params in ranked})
+    scores = [gif_search.quality_score(params, SOURCE_WIDTH, 15) for params in ranked]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_size_model_recovers_the_exponents():
+    base = {'width': 160, 'fps': 15, 'colors': 256, 'lossy': 0}
+    trials = {'base': fake_size(base), 'width': fake_size(dict(base, width=320)), 'width_value': 320,
+              'fps': fake_size(dict(base, fps=6)), 'fps_value': 6,
+              'colors': fake_size(dict(base, colors=gif_search.CALIBRATION_COLORS)),
+              'lossy': fake_size(dict(base, lossy=gif_search.CALIBRATION_LOSSY))}
+    model = SizeModel(base, trials)
+    for params in candidates(SOURCE_WIDTH, FPS_VALUES, LOSSY_VALUES)[::37]:
+        assert abs(model.predict(params) - fake_size(params)) <= 0.01 * fake_size(params) + 2
+
+
+def test_search_picks_the_best_candidate_that_fits(tmp_path):
+    calls = []
+    max_bytes = 9000
+    result = search_gif_size(fake_encoder(calls), tmp_path / 'out.gif', max_bytes, SOURCE_WIDTH,
+                             FPS_VALUES, LOSSY_VALUES, threads=2)
+    expected = next(params for params in candidates(SOURCE_WIDTH, FPS_VALUES, LOSSY_VALUES)
+                    if fake_size(params) <= max_bytes)
+    assert {key: result[key] for key in expected} == expected
+    assert result['within_limit']
+    assert result['bytes'] == fake_size(expected) == (tmp_path / 'out.gif').stat().st_size
+    assert result['trials'] == len(calls) < 20
+
+
+def test_search_writes_the_smallest_trial_when_nothing_fits(tmp_path):
+    result = search_gif_size(fake_encoder([]), tmp_path / 'out.gif', 10, SOURCE_WIDTH, FPS_VALUES,
+                             LOSSY_VALUES, threads=2)
+    smallest = min(candidates(SOURCE_WIDTH, FPS_VALUES, LOSSY_VALUES), key=fake_size)
+    assert not result['within_limit']
+    assert result['bytes'] == fake_size(smallest) == (tmp_path / 'out.gif').stat().st_size
@@ -0,0 +1,32 @@
+"""JSON versionados: ida y vuelta, y archivos de otra versión o dañados tratados como vacíos"""
+
+from json_store import load_versioned, save_versioned
+from optimize_cache import OptimizeCache
+
+
+def test_round_trip_creates_parent_and_leaves_no_temporary(tmp_path):
+    path = tmp_path / '.optimize_cache' / 'manifest.json'
+    save_versioned(path, 2, {'entries': {'Viaje/ñu.png': {'hash': 'ab'}}})
+
+    assert load_versioned(path, 2) == {'version': 2, 'entries': {'Viaje/ñu.png': {'hash': 'ab'}}}
+    assert [p.name for p in path.parent.iterdir()] == ['manifest.json']
+
+
+def test_other_version_missing_or_damaged_files_are_empty(tmp_path):
+    path = tmp_path / 'probes.json'
+    save_versioned(path, 1, {'probes': {'x': 1}})
+    assert load_versioned(path, 2) == {}
+    assert load_versioned(tmp_path / 'falta.json', 1) == {}
+    path.write_text('{"version": 1, "probes"', encoding='utf-8')
+    assert load_versioned(path, 1) == {}
+
+
+def test_stores_only_write_when_dirty(tmp_path):
+    path = tmp_path / '.optimize_cache' / 'manifest.json'
+    cache = OptimizeCache.load(path)
+    cache.save()
+    assert not path.exists()
+
+    cache.record('Viaje/1.jpg', {'q': 85}, 'ab', [3, 4])
+    cache.save()
+    assert OptimizeCache.load(path).entries == {'Viaje/1.jpg': {'settings': {'q': 85}, 'hash': 'ab', 'stat': [3, 4]}}
@@ -0,0 +1,59 @@
+"""Hashes perceptuales y árbol BK de media_dedup"""
+
+import random
+
+import numpy as np
+from PIL import Image
+
+from media_dedup import BKTree, dhash, hamming, phash, thumbnails
+
+
+def test_bk_tree_matches_brute_force():
+    rng = random.Random(7)
+    keys = [rng.getrandbits(64) for _ in range(300)]
+    keys += [key ^ (1 << rng.randrange(64)) for key in keys[:50]]  # Vecinos a distancia 1
+    tree = BKTree()
+    for index, key in enumerate(keys):
+        tree.add(key, index)
+    for query in keys[:20] + [rng.getrandbits(64) for _ in range(20)]:
+        for radius in (0, 1, 8, 24):
+            expected = sorted(index for index, key in enumerate(keys) if hamming(query, key) <= radius)
+            assert sorted(tree.query(query, radius)) == expected
+
+
+def test_bk_tree_keeps_values_with_the_same_key():
+    tree = BKTree()
+    tree.add(0b1010, 'a')
+    tree.add(0b1010, 'b')
+    tree.add(0b0101, 'c')
+    assert sorted(tree.query(0b1010, 0)) == ['a', 'b']
+    assert tree.query(0b1111, 1) == []
+    assert BKTree().query(0, 64) == []
+
+
+def test_dhash_bits():
+    rising = np.tile(np.arange(9, dtype=np.int16), (8, 1))
+    assert dhash(np.stack([rising, rising[:, ::-1]])) == [2 ** 64 - 1, 0]
+
+
+def scene(size):
+    """Imagen con formas grandes (la misma escena a cualquier tamaño)"""
+    y, x = np.mgrid[0:size[1], 0:size[0]] / np.array(size[::-1])[:, np.newaxis, np.newaxis]
+    red = 255 * ((x - 0.3) ** 2 + (y - 0.4) ** 2 < 0.06)
+    green = 255 * x
+    blue = 255 * (y > 0.7)
+    return Image.fromarray(np.stack([red, green, blue], -1).astype(np.uint8))
+
+
+def hashes(path):
+    large, small = thumbnails(path)
+    return phash(large[np.newaxis])[0], dhash(small[np.newaxis])[0]
+
+
+def test_perceptual_hashes_survive_format_and_size(tmp_path):
+    scene((400, 300)).save(tmp_path / 'a.png')
+    scene((160, 120)).save(tmp_path / 'b.jpg', quality=60)
+    scene((400, 300)).transpose(Image.Transpose.ROTATE_90).save(tmp_path / 'c.png')  # Otra imagen
+    a, b, c = hashes(tmp_path / 'a.png'), hashes(tmp_path / 'b.jpg'), hashes(tmp_path / 'c.png')
+    assert hamming(a[0], b[0]) <= 4 and hamming(a[1], b[1]) <= 6
+    assert hamming(a[0], c[0]) > 8
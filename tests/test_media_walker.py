@@ -0,0 +1,20 @@
+"""Clasificación del recorrido: un .avif es una imagen salvo que sea la alternativa de otra"""
+
+from media_walker import alternate_names, walk_tracks
+
+
+def test_alternate_names():
+    names = ['foo.jpeg', 'foo.jpeg.avif', 'foo.webp', 'foo.webp.avif', 'old.png', 'old.avif',
+             'solo.avif', 'x.avif.avif', 'notas.txt', 'notas.avif']
+    assert alternate_names(names) == {'foo.jpeg.avif', 'foo.webp.avif', 'old.avif'}
+
+
+def test_walk_classifies_primary_avif_as_image(tmp_path):
+    (tmp_path / 'T').mkdir()
+    for name in ('a.avif', 'b.webp', 'b.webp.avif', 'guion.js'):
+        (tmp_path / 'T' / name).write_bytes(b'')
+    (tmp_path / 'T' / '_renditions').mkdir()
+    files = walk_tracks(tmp_path)
+    assert {item.rel: item.kind for item in files} == {
+        'T/a.avif': 'image', 'T/b.webp': 'image', 'T/b.webp.avif': 'alternate', 'T/guion.js': 'guion'}
+    assert files.skipped_dirs == {'_renditions': [tmp_path / 'T' / '_renditions']}
@@ -0,0 +1,46 @@
+"""Paquetes por segmento: cada archivo se recupera con su desplazamiento y longitud"""
+
+import os
+
+from media_walker import walk_tracks
+from packfiles import PACK_DIR, build_packs
+
+
+def make_tree(root):
+    files = {'Viaje/1.png': b'png-uno', 'Viaje/2.webp': b'webp-dos' * 3, 'Viaje/10.gif': b'gif-diez' * 5,
+             'Viaje/notas/a.jpg': b'jpg-a', 'Viaje/notas/b.jpg': b'jpg-b' * 7, 'Solo/unico.png': b'uno'}
+    for rel, data in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return files
+
+
+def test_offsets_round_trip(tmp_path):
+    contents = make_tree(tmp_path)
+    entries, written, reused = build_packs(walk_tracks(tmp_path), tmp_path)
+
+    assert (written, reused) == (2, 0)
+    assert set(entries) == set(contents) - {'Solo/unico.png'}  # Un solo archivo no se empaqueta
+    for rel, entry in entries.items():
+        with open(entry['pack'], 'rb') as f:
+            f.seek(entry['offset'])
+            assert f.read(entry['length']) == contents[rel]
+    assert entries['Viaje/10.gif']['type'] == 'image/gif'
+    # Orden de tracks.json (localeCompare, sin orden numérico) y sin huecos
+    order = sorted((entry['offset'], rel) for rel, entry in entries.items() if rel.count('/') == 1)
+    assert [rel for _, rel in order] == ['Viaje/1.png', 'Viaje/10.gif', 'Viaje/2.webp']
+    assert entries['Viaje/2.webp']['offset'] + entries['Viaje/2.webp']['length'] == \
+        os.path.getsize(entries['Viaje/2.webp']['pack'])
+
+
+def test_unchanged_packs_are_reused_and_stale_ones_pruned(tmp_path):
+    make_tree(tmp_path)
+    first, _, _ = build_packs(walk_tracks(tmp_path), tmp_path)
+    assert build_packs(walk_tracks(tmp_path), tmp_path)[1:] == (0, 2)
+
+    (tmp_path / 'Viaje' / '2.webp').write_bytes(b'otro contenido')
+    second, written, reused = build_packs(walk_tracks(tmp_path), tmp_path)
+    assert (written, reused) == (1, 1)
+    assert not first['Viaje/1.png']['pack'].exists()
+    assert list((tmp_path / 'Viaje' / PACK_DIR).iterdir()) == [second['Viaje/1.png']['pack']]
@@ -0,0 +1,37 @@
+"""BlurHash y marcadores de posición"""
+
+import base64
+import io
+
+import numpy as np
+from PIL import Image
+
+from placeholders import PLACEHOLDER_SIZE, base83, blurhash, make_placeholder
+
+
+def gradient():
+    y, x = np.mgrid[0:12, 0:16]
+    return np.stack([x * 16, y * 20, (x * y * 3) % 256], -1).astype(np.uint8)
+
+
+def test_blurhash_matches_the_reference_encoder():
+    # Cadenas calculadas con el paquete de referencia blurhash 1.1.5 (blurhash.encode)
+    assert blurhash(gradient(), 4, 3) == "LsGuUH2+wtouqdR,jwe@f_fmfSff"
+    assert blurhash(gradient(), 3, 4) == "TsGuUH2+wtqdR,jwf_fmfSt3Sijp"
+
+
+def test_blurhash_of_a_flat_image():
+    pixels = np.full((8, 8, 3), (255, 0, 0), dtype=np.uint8)
+    result = blurhash(pixels, 4, 3)
+    assert len(result) == 1 + 1 + 4 + 2 * (4 * 3 - 1)
+    assert result[2:6] == base83(0xFF0000, 4)
+
+
+def test_make_placeholder():
+    img = Image.fromarray(np.repeat(np.repeat(gradient(), 20, axis=0), 20, axis=1))
+    placeholder = make_placeholder(img)
+    assert placeholder['blurhash'][0] == base83(3 + 2 * 9, 1)  # 4 x 3 componentes: imagen apaisada
+    prefix = 'data:image/webp;base64,'
+    assert placeholder['webp'].startswith(prefix)
+    with Image.open(io.BytesIO(base64.b64decode(placeholder['webp'][len(prefix):]))) as tiny:
+        assert max(tiny.size) == PLACEHOLDER_SIZE
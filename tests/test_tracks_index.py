@@ -0,0 +1,61 @@
+"""tracks.json: forma de las entradas y orden de localeCompare (acentos y mayúsculas solo desempatan)"""
+
+import json
+
+from PIL import Image
+
+from media_walker import walk_tracks
+from tracks_index import ROOT_FOLDER, TRACKS_INDEX_NAME, build_tracks, collation_key, write_tracks_index
+
+NAMES = ['Émile.png', 'abc.png', 'arbol.png', '2.webp', 'Árbol.png', 'ab.png', '_x.png',
+         'a b.png', 'árbol.png', '10.gif', 'emile.png', 'Arbol.png', 'zeta.PNG']
+# Orden de localeCompare: puntuación < dígitos (sin orden numérico) < letras
+EXPECTED = ['_x.png', '10.gif', '2.webp', 'a b.png', 'ab.png', 'abc.png', 'arbol.png', 'Arbol.png',
+            'árbol.png', 'Árbol.png', 'emile.png', 'Émile.png', 'zeta.PNG']
+
+
+def make_tree(root):
+    (root / 'Viaje' / 'Día 1').mkdir(parents=True)
+    for name in NAMES:
+        Image.new('RGB', (8, 6), 'red').save(root / 'Viaje' / name)
+    Image.new('RGB', (4, 4)).save(root / 'Viaje' / 'ab.png.avif')  # Alternativa AVIF: no se lista
+    (root / 'Viaje' / 'Día 1' / 'canción.mp3').write_bytes(b'mp3')
+    (root / 'Viaje' / 'Día 1' / 'guion.js').write_text('export default []', encoding='utf-8')
+    (root / 'Vacío').mkdir()
+
+
+def test_collation_key_matches_locale_compare():
+    assert sorted(NAMES, key=collation_key) == EXPECTED
+
+
+def test_build_tracks_schema_and_order(tmp_path):
+    make_tree(tmp_path)
+    tracks = build_tracks(walk_tracks(tmp_path))
+
+    assert list(tracks) == ['Viaje']  # Los tracks sin archivos no aparecen
+    assert list(tracks['Viaje']) == [ROOT_FOLDER, 'Día 1']
+    root = tracks['Viaje'][ROOT_FOLDER]
+    assert (root['audio'], root['guiones']) == ([], [])
+    assert [entry['name'] for entry in root['images']] == EXPECTED[1:]  # El recorrido salta los '_'
+    entry = root['images'][2]
+    assert entry == {'path': 'Viaje/a b.png', 'url': '/tracks/Viaje/a%20b.png', 'name': 'a b.png',
+                     'bytes': (tmp_path / 'Viaje' / 'a b.png').stat().st_size,
+                     'width': 8, 'height': 6, 'format': 'png', 'animated': False, 'frames': 1}
+    assert root['images'][8]['url'] == '/tracks/Viaje/%C3%81rbol.png'
+
+    day = tracks['Viaje']['Día 1']
+    assert day['images'] == []
+    assert day['audio'] == [{'path': 'Viaje/Día 1/canción.mp3', 'url': '/tracks/Viaje/D%C3%ADa%201/canci%C3%B3n.mp3',
+                             'name': 'canción.mp3', 'bytes': 3}]
+    assert [entry['name'] for entry in day['guiones']] == ['guion.js']
+
+
+def test_unchanged_tree_keeps_index_and_cached_headers(tmp_path):
+    make_tree(tmp_path)
+    assert write_tracks_index(tmp_path)
+    index = json.loads((tmp_path / TRACKS_INDEX_NAME).read_text(encoding='utf-8'))
+    assets = json.loads((tmp_path / 'assets.json').read_text(encoding='utf-8'))['assets']
+    assert assets['Viaje/zeta.PNG']['header']['width'] == 8
+
+    assert not write_tracks_index(tmp_path)
+    assert json.loads((tmp_path / TRACKS_INDEX_NAME).read_text(encoding='utf-8')) == index
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Índice estático de tracks (public/tracks/tracks.json)
+Genera en el build el mismo documento que devolvía /api/tracks al recorrer
+public/tracks en cada petición:
+
+  {"tracks": {track: {subcarpeta o "__root__": {"audio": [...], "images": [...],
+                                                 "guiones": [...]}}},
+   "generatedAt": "..."}
+
+con entradas {"path", "url", "name", "bytes"} ordenadas por nombre como
+localeCompare; las imágenes llevan además "width", "height", "format",
+"animated" y "frames", leídos solo de la cabecera, para que el front-end
+pueda maquetar y repartir bytes antes de pedir nada, y las secciones de
+assets.json que sirven al cargar: "placeholder" (LQIP y BlurHash),
+"atlas" (hoja y rectángulo, con --atlas) y "pack" (paquete, desplazamiento
+y longitud, con --pack). Con --fingerprint, "url" es la del nombre con
+huella (caché inmutable) y "path" sigue siendo la ruta del archivo. El API solo tiene que
+leerlo. Se parte del recorrido de media_walker, así que no se listan
+carpetas ni archivos que empiecen por '_' (variantes, clips y temporales
+del optimizador).
+"""
+
+import json
+import os
+import sys
+import unicodedata
+from datetime import datetime, timezone
+from pathlib import Path
+
+from asset_manifest import AssetManifest, asset_url
+from media_probe import probe_image
+from media_walker import GUION_NAME, walk_tracks
+
+TRACKS_INDEX_NAME = "tracks.json"
+ROOT_FOLDER = "__root__"  # Archivos sueltos en la carpeta del track
+
+# Igual que en app/api/tracks/route.ts
+IGNORED_FOLDERS = ('backups', 'node_modules', '.git', '_backup_original', '_renditions', '_clips', '_atlas', '_pack', '_immutable')
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.m4a', '.aac')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg', '.avif')
+ASSET_SECTIONS = ('placeholder', 'atlas', 'pack')  # Secciones de assets.json que se copian a cada imagen
+HEADER_SECTION = 'header'  # Cabecera de cada imagen en assets.json, con el [tamaño, mtime] del que salió
+
+# Orden de los signos de puntuación en la colación raíz de ICU (la de localeCompare)
+PUNCTUATION_ORDER = "_-,;:!?.'\"()[]{}@*/\\&#%`^+<=>|~$"
+
+
+def collation_key(name):
+    """Clave de orden parecida a String.prototype.localeCompare sin locale (ICU)
+
+    Espacios < puntuación < dígitos < letras; los acentos y las mayúsculas
+    solo desempatan (sin acento antes que con acento, minúscula antes que
+    mayúscula).
+    """
+    primary, accents, cases = [], [], []
+    for char in name:
+        decomposed = unicodedata.normalize('NFD', char)
+        base = decomposed[0]
+        if base.isspace():
+            primary.append((0, ''))
+        elif base.isdigit():
+            primary.append((2, base))
+        elif base.isalpha():
+            primary.append((3, base.casefold()))
+        else:
+            order = PUNCTUATION_ORDER.find(base)
+            primary.append((1, chr(order if order >= 0 else len(PUNCTUATION_ORDER) + ord(base))))
+        accents.append(decomposed[1:])
+        cases.append(base.isupper())
+    return primary, accents, cases
+
+
+def segment_of(rel):
+    """(track, subcarpeta o ROOT_FOLDER) de una ruta relativa, o None si no se lista"""
+    parts = rel.split('/')
+    if len(parts) < 2 or any(part in IGNORED_FOLDERS for part in parts[:-1]):
+        return None
+    return parts[0], ROOT_FOLDER if len(parts) == 2 else parts[1]
+
+
+def is_listed_image(item):
+    """¿Aparece el archivo en "images" de tracks.json?"""
+    return item.kind != 'alternate' and item.rel.lower().endswith(IMAGE_EXTENSIONS) and segment_of(item.rel)
+
+
+def update_headers(manifest, files):
+    """Guarda en assets.json la cabecera de las imágenes listadas cuyo stat ha cambiado
+
+    Así una ejecución sin cambios no abre ninguna imagen. Las que no se
+    pueden leer también se anotan (sin dimensiones), para no reintentarlas.
+    Devuelve cuántas cabeceras se leyeron.
+    """
+    count = 0
+    for item in files:
+        if not is_listed_image(item):
+            continue
+        header = manifest.get(item.rel, HEADER_SECTION)
+        if header and header.get('stat') == item.stat:
+            continue
+        manifest.set(item.rel, HEADER_SECTION, dict(probe_image(item.path) or {}, stat=item.stat))
+        count += 1
+    return count
+
+
+def image_header(item, asset):
+    """Dimensiones, formato y fotogramas de una imagen: los de assets.json si su stat no ha cambiado"""
+    header = asset.get(HEADER_SECTION)
+    if header and header.get('stat') == item.stat:
+        return {key: value for key, value in header.items() if key != 'stat'}
+    return probe_image(item.path) or {}
+
+
+def file_entry(item, image=False, assets=None):
+    """Entrada de un MediaFile; las imágenes con sus dimensiones, fotogramas y ASSET_SECTIONS"""
+    asset = (assets or {}).get(item.rel, {})
+    entry = {'path': item.rel, 'url': asset.get('immutable', {}).get('url') or asset_url(item.rel),
+             'name': item.rel.rsplit('/', 1)[-1], 'bytes': item.size}
+    if image:
+        entry.update(image_header(item, asset))
+        entry.update((section, asset[section]) for section in ASSET_SECTIONS if asset.get(section))
+    return entry
+
+
+def build_tracks(files, assets=None):
+    """{track: {subcarpeta: {'audio', 'images', 'guiones'}}} de la lista del recorrido
+
+    assets: entradas de assets.json, de donde salen las ASSET_SECTIONS.
+    Las subcarpetas incluyen sus archivos a cualquier profundidad; solo se
+    añaden las subcarpetas y los tracks con algún archivo.
+    """
+    groups = {}
+    for item in files:
+        segment = segment_of(item.rel)
+        if segment is not None:
+            track, subfolder = segment
+            groups.setdefault(track, {}).setdefault(subfolder, []).append(item)
+
+    tracks = {}
+    for track in sorted(groups):
+        track_data = {}
+        # __root__ primero y después las subcarpetas en orden de directorio
+        for subfolder in sorted(groups[track], key=lambda name: (name != ROOT_FOLDER, name)):
+            items = groups[track][subfolder]
+            audio, images, guiones = [], [], []
+            for item in items:
+                lower = item.rel.lower()
+                if item.kind == 'alternate':  # foto.webp.avif junto a foto.webp (media_walker.alternate_names)
+                    continue
+                if lower.endswith(AUDIO_EXTENSIONS):
+                    audio.append(file_entry(item, assets=assets))
+                elif lower.endswith(IMAGE_EXTENSIONS):
+                    images.append(file_entry(item, image=True, assets=assets))
+                elif item.rel.rsplit('/', 1)[-1] == GUION_NAME:
+                    guiones.append(file_entry(item))
+            if audio or images or guiones:
+                track_data[subfolder] = {
+                    name: sorted(entries, key=lambda entry: collation_key(entry['name']))
+                    for name, entries in (('audio', audio), ('images', images), ('guiones', guiones))
+                }
+        if track_data:
+            tracks[track] = track_data
+    return tracks
+
+
+def write_tracks_index(tracks_dir, files=None):
+    """Escribe <tracks_dir>/tracks.json si ha cambiado; devuelve True si se escribió
+
+    Si los tracks no cambian se conserva el archivo (y su generatedAt). Las
+    cabeceras de las imágenes nuevas o modificadas se guardan en assets.json.
+    """
+    tracks_dir = Path(tracks_dir)
+    files = walk_tracks(tracks_dir) if files is None else files
+    manifest = AssetManifest.load(tracks_dir)
+    update_headers(manifest, files)
+    manifest.save()
+    tracks = build_tracks(files, manifest.assets)
+    path = tracks_dir / TRACKS_INDEX_NAME
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if json.load(f).get('tracks') == tracks:
+                return False
+    except (OSError, ValueError):
+        pass
+
+    generated_at = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'tracks': tracks, 'generatedAt': generated_at}, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return True
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    tracks_dir = Path(argv[0]) if argv else Path("public/tracks")
+    if not tracks_dir.exists():
+        print(f"Error: No se encuentra el directorio {tracks_dir}")
+        return 1
+    if write_tracks_index(tracks_dir):
+        print(f"Índice de tracks actualizado: {tracks_dir / TRACKS_INDEX_NAME}")
+    else:
+        print(f"Índice de tracks sin cambios: {tracks_dir / TRACKS_INDEX_NAME}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())